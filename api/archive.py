@@ -0,0 +1,166 @@
+"""Parquet copies of archived telemetry quarters, for column scans.
+
+`manage.py archive-telemetry` writes each purged quarter (api.partitions) to
+TELEMETRY_ARCHIVE_DIR as a zstd-compressed Parquet file, sorted by
+(timestamp, id) in row groups of ROW_GROUP_ROWS readings, and records the
+file in the partition catalog. Files are written once: archived quarters
+never change.
+
+When a request's time range lies entirely in quarters that have a file,
+GET /telemetry/aggregate (where the rollups can't answer) and
+GET /telemetry/export read the files instead of the database. Row groups
+outside the range are skipped by their timestamp statistics, only the
+needed columns are decoded from the memory-mapped file, and filtering and
+grouping run vectorised in Arrow; an aggregate never touches the
+`pollutants`/`location` text.
+
+Needs pyarrow (pip install pyarrow). Without it nothing is exported and all
+reads go to the database.
+"""
+import os
+
+from flask import current_app
+from sqlalchemy import select
+
+from api.models import db, TelemetryPartition, partition_catalog, partition_entity
+
+try:
+    import pyarrow
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+ROW_GROUP_ROWS = 65536
+# Column order of the files; names follow the serializers (pH, not the SQL column ph)
+FIELDS = ('id', 'buoy_id', 'timestamp', 'salinity', 'temperature', 'pH', 'pollutants', 'location')
+
+
+def available():
+    return pyarrow is not None
+
+
+def enabled():
+    return pyarrow is not None and current_app.config['TELEMETRY_ARCHIVE_READS']
+
+
+def _schema():
+    return pyarrow.schema([
+        ('id', pyarrow.int64()), ('buoy_id', pyarrow.int64()), ('timestamp', pyarrow.timestamp('us')),
+        ('salinity', pyarrow.float64()), ('temperature', pyarrow.float64()), ('pH', pyarrow.float64()),
+        ('pollutants', pyarrow.string()), ('location', pyarrow.string()),
+    ])
+
+
+def _path(file_name):
+    return os.path.join(current_app.config['TELEMETRY_ARCHIVE_DIR'], file_name)
+
+
+def export_quarter(partition):
+    """Write an archived quarter to Parquet and record the file. Returns its size in bytes.
+
+    The caller commits.
+    """
+    entity = partition_entity(partition.quarter)
+    file_name = f'{partition.table_name}.parquet'
+    path = _path(file_name)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    schema = _schema()
+    stmt = (select(*(getattr(entity, field) for field in FIELDS))
+            .order_by(entity.timestamp, entity.id)
+            .execution_options(yield_per=ROW_GROUP_ROWS))
+    # Written under a temporary name so readers never see a partial file
+    with pq.ParquetWriter(path + '.tmp', schema, compression='zstd') as writer:
+        for rows in db.session.execute(stmt).partitions():
+            writer.write_batch(pyarrow.record_batch(
+                [pyarrow.array(column, type=field.type) for column, field in zip(zip(*rows), schema)],
+                schema=schema))
+    os.replace(path + '.tmp', path)
+    partition.archive_file = file_name
+    return os.path.getsize(path)
+
+
+def export_due(force=False):
+    """Export purged quarters that have no file yet (all of them with `force`).
+
+    Each quarter is committed on its own. Returns [(TelemetryPartition, bytes)].
+    """
+    stmt = select(TelemetryPartition).where(TelemetryPartition.purged_at.is_not(None))
+    if not force:
+        stmt = stmt.where(TelemetryPartition.archive_file.is_(None))
+    exported = []
+    for partition in db.session.execute(stmt.order_by(TelemetryPartition.start)).scalars().all():
+        exported.append((partition, export_quarter(partition)))
+        db.session.commit()
+    partition_catalog().invalidate()
+    return exported
+
+
+def files_for(since, until):
+    """Archive files holding every reading in [since, until), oldest first.
+
+    None when archive reads are off or part of the range has no file.
+    """
+    if not enabled() or until is None:
+        return None
+    partitions = partition_catalog().get()
+    if not partitions or until > partitions[-1].end or (since is not None and since >= until):
+        return None
+    files = [p.archive_file for p in partitions if (since is None or p.end > since) and p.start < until]
+    return files if None not in files else None
+
+
+def _row_groups(parquet, since, until):
+    """Indexes of the row groups whose timestamp range overlaps [since, until)."""
+    column = FIELDS.index('timestamp')
+    groups = []
+    for index in range(parquet.num_row_groups):
+        stats = parquet.metadata.row_group(index).column(column).statistics
+        if stats is None or not stats.has_min_max or (
+                (since is None or stats.max >= since) and stats.min < until):
+            groups.append(index)
+    return groups
+
+
+def _scan(files, columns, buoy_id, since, until):
+    """Record batches of `columns` for the readings in range, in file order."""
+    read = list(dict.fromkeys((*columns, 'buoy_id', 'timestamp')))
+    for file_name in files:
+        parquet = pq.ParquetFile(_path(file_name), memory_map=True)
+        groups = _row_groups(parquet, since, until)
+        if not groups:
+            continue
+        for batch in parquet.iter_batches(batch_size=ROW_GROUP_ROWS, row_groups=groups, columns=read):
+            timestamps = batch.column('timestamp')
+            mask = pc.less(timestamps, pyarrow.scalar(until, pyarrow.timestamp('us')))
+            if since is not None:
+                mask = pc.and_(mask, pc.greater_equal(timestamps, pyarrow.scalar(since, pyarrow.timestamp('us'))))
+            if buoy_id is not None:
+                mask = pc.and_(mask, pc.equal(batch.column('buoy_id'), buoy_id))
+            batch = batch.filter(mask).select(list(columns))
+            if batch.num_rows:
+                yield batch
+
+
+def export_rows(files, fields, buoy_id, since, until):
+    """Batches of row tuples in `fields` order, oldest first, like a yield_per query."""
+    for batch in _scan(files, fields, buoy_id, since, until):
+        yield list(zip(*(column.to_pylist() for column in batch.columns)))
+
+
+def aggregate(files, bucket, metrics, per_buoy, buoy_id, since, until):
+    """Rows shaped like the SQL aggregate's: bucket_start[, buoy_id], count, <metric>_min/_max/_avg."""
+    keys = ['bucket_start', 'buoy_id'] if per_buoy else ['bucket_start']
+    columns = ('timestamp', 'buoy_id', *metrics)
+    schema = pyarrow.schema([_schema().field(column) for column in columns])
+    table = pyarrow.Table.from_batches(list(_scan(files, columns, buoy_id, since, until)), schema=schema)
+    table = table.append_column('bucket_start', pc.floor_temporal(table.column('timestamp'), unit=bucket))
+
+    aggregations = [('timestamp', 'count')]
+    for metric in metrics:
+        aggregations += [(metric, 'min'), (metric, 'max'), (metric, 'mean')]
+    grouped = table.group_by(keys, use_threads=False).aggregate(aggregations)
+    grouped = grouped.sort_by([(key, 'ascending') for key in keys])
+
+    renames = {'timestamp_count': 'count', **{f'{metric}_mean': f'{metric}_avg' for metric in metrics}}
+    return grouped.rename_columns([renames.get(name, name) for name in grouped.column_names]).to_pylist()
@@ -0,0 +1,150 @@
+"""Role-based access control for the telemetry endpoints.
+
+Role -> permission grants are resolved into frozensets at import, so the
+`permission_required` decorator costs one set lookup per request no matter
+how many roles exist. Verified access tokens are also cached by their raw
+header value, so a device re-using its token skips the signature check and
+claim decoding on every request after the first.
+
+Passwords are hashed with Config.PASSWORD_HASH_METHOD. A login whose stored
+hash was made with other parameters re-hashes the password it just verified,
+so changing the setting upgrades (or cheapens) accounts as they sign in.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from api import serializers
+
+ROLE_PERMISSIONS = {
+    'admin': ('create', 'read', 'update', 'delete'),
+    'researcher': ('create', 'read'),
+    'consumer': ('read',),
+    'user': ('read',),
+}
+
+# Telemetry fields a role may see; roles not listed here see every field
+ROLE_FIELDS = {
+    'consumer': ('id', 'timestamp', 'salinity', 'pH'),
+}
+
+ROLES_WITH_PERMISSION = {
+    permission: frozenset(role for role, granted in ROLE_PERMISSIONS.items() if permission in granted)
+    for permission in {p for granted in ROLE_PERMISSIONS.values() for p in granted}
+}
+FIELD_SETS = {role: frozenset(fields) for role, fields in ROLE_FIELDS.items()}
+SERIALIZERS = {role: serializers.TelemetrySerializer(fields) for role, fields in ROLE_FIELDS.items()}
+
+
+class TokenCache:
+    """Bounded LRU of raw Authorization header -> (jwt_header, jwt_data)."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1].get('exp', 0) <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, jwt_header, jwt_data):
+        with self._lock:
+            self._entries[key] = (jwt_header, jwt_data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
+
+
+_hash_prefixes = {}
+
+
+def _hash_prefix(method):
+    """The "method:params" prefix werkzeug stores for `method`, defaults filled in."""
+    prefix = _hash_prefixes.get(method)
+    if prefix is None:
+        prefix = _hash_prefixes[method] = generate_password_hash('', method=method).split('$', 1)[0]
+    return prefix
+
+
+def verify_password(user, password):
+    """Check `password` against `user`, re-hashing it if the hash parameters changed.
+
+    A re-hash only updates user.password_hash; the caller commits.
+    """
+    if not check_password_hash(user.password_hash, password):
+        return False
+    if user.password_hash.split('$', 1)[0] != _hash_prefix(current_app.config['PASSWORD_HASH_METHOD']):
+        user.password_hash = hash_password(password)
+    return True
+
+
+def init_app(app):
+    app.extensions['token_cache'] = TokenCache(app.config['JWT_DECODE_CACHE_SIZE'])
+
+
+def _verify_access_token():
+    """Return the request's verified JWT claims, using the token cache when possible.
+
+    On a hit the same request-context values that verify_jwt_in_request()
+    sets are restored, so get_jwt()/get_jwt_identity() keep working. Only
+    tokens that passed full verification are ever cached, and expiry is
+    re-checked on every hit.
+    """
+    cache = current_app.extensions['token_cache']
+    key = request.headers.get(current_app.config['JWT_HEADER_NAME'], '')
+    entry = cache.get(key) if key and cache.maxsize else None
+    if entry is not None:
+        g._jwt_extended_jwt_header, g._jwt_extended_jwt = entry
+        g._jwt_extended_jwt_user = {'loaded_user': None}
+        g._jwt_extended_jwt_location = 'headers'
+        return entry[1]
+
+    jwt_header, jwt_data = verify_jwt_in_request()
+    if cache.maxsize:
+        cache.put(key, jwt_header, jwt_data)
+    return jwt_data
+
+
+def permission_required(permission):
+    """Require a valid access token whose role holds `permission`.
+
+    Sets g.role, g.fields (the role's permitted telemetry fields, or None for
+    all fields) and g.serializer (the role's precompiled serializer) for the
+    wrapped view.
+    """
+    allowed = ROLES_WITH_PERMISSION[permission]
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            role = _verify_access_token().get('role')
+            if role not in allowed:
+                return jsonify(msg='Insufficient permissions'), 403
+            g.role = role
+            g.fields = FIELD_SETS.get(role)
+            g.serializer = SERIALIZERS.get(role, serializers.FULL)
+            return current_app.ensure_sync(fn)(*args, **kwargs)
+        return wrapper
+    return decorator
+
@@ -0,0 +1,135 @@
+"""Read-through cache of serialized telemetry records.
+
+Entries are keyed by record id and role projection and hold the serialized
+record plus its ETag, so a hit (or a 304) needs neither a query nor
+re-serialization. Records from closed quarters can no longer change (see
+is_current_quarter), so they are cached without expiry; current-quarter
+records expire after TELEMETRY_CACHE_TTL seconds, which also bounds how
+stale another worker process can be after a write it didn't see. Writes
+in this process invalidate their records immediately.
+
+TELEMETRY_CACHE_BACKEND is "memory", "none", or an import path to a class
+taking (app) and implementing get_many/set_many/delete_many/clear.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from werkzeug.utils import import_string
+
+from api import serializers
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU with optional per-entry TTL."""
+
+    def __init__(self, app):
+        self.maxsize = app.config['TELEMETRY_CACHE_SIZE']
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                value, expires = entry
+                if expires is not None and expires <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, mapping, ttl=None):
+        expires = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            for key, value in mapping.items():
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_app(app):
+    name = app.config['TELEMETRY_CACHE_BACKEND']
+    if name == 'none':
+        backend = None
+    elif name == 'memory':
+        backend = MemoryBackend(app)
+    else:
+        backend = import_string(name)(app)
+    app.extensions['telemetry_cache'] = backend
+
+
+def _backend():
+    return current_app.extensions['telemetry_cache']
+
+
+def _key(tid, serializer):
+    return f'telemetry:{tid}:{serializer.projection}'
+
+
+def etag_for(data):
+    return hashlib.blake2b(current_app.json.dumps(data).encode(), digest_size=12).hexdigest()
+
+
+def combine_etags(etags):
+    """ETag for a response built from several cached records."""
+    return hashlib.blake2b(' '.join(etags).encode(), digest_size=12).hexdigest()
+
+
+def get_records(ids, serializer):
+    """Return {id: (data, etag)} for the ids cached under this projection."""
+    backend = _backend()
+    if backend is None:
+        return {}
+    keys = {_key(tid, serializer): tid for tid in ids}
+    return {keys[key]: value for key, value in backend.get_many(list(keys)).items()}
+
+
+def put_records(records, serializer, historical):
+    """Cache {id: data} and return {id: (data, etag)}.
+
+    `historical(id)` says whether a record is from a closed quarter and so
+    may be cached without expiry.
+    """
+    entries = {tid: (data, etag_for(data)) for tid, data in records.items()}
+    backend = _backend()
+    if backend is not None:
+        immutable = {_key(tid, serializer): e for tid, e in entries.items() if historical(tid)}
+        mutable = {_key(tid, serializer): e for tid, e in entries.items() if not historical(tid)}
+        if immutable:
+            backend.set_many(immutable)
+        if mutable:
+            backend.set_many(mutable, ttl=current_app.config['TELEMETRY_CACHE_TTL'])
+    return entries
+
+
+def clear():
+    backend = _backend()
+    if backend is not None:
+        backend.clear()
+
+
+def invalidate(ids):
+    """Drop the given records from the cache under every projection."""
+    backend = _backend()
+    if backend is None:
+        return
+    backend.delete_many([_key(tid, serializer) for tid in ids
+                         for serializer in serializers.REGISTRY.values()])
@@ -0,0 +1,178 @@
+"""Content-Encoding for request and response bodies.
+
+Requests sent with ``Content-Encoding: gzip`` or ``zstd`` are inflated as the
+view reads them, so request.get_json()/get_data() see the plain body. The
+inflated size is counted while decoding, and reading stops with 413 as soon as
+it passes COMPRESSION_MAX_INFLATED_BYTES, before a small zip bomb can expand
+into memory. Corrupt bodies are answered with 400, and other encodings with 415.
+
+Responses are compressed for clients that send a matching Accept-Encoding;
+zstd is preferred over gzip at equal quality. A body is compressed only if it
+is at least COMPRESSION_MIN_SIZE bytes. Streamed responses (the exports) are
+always compressed: each chunk is compressed and flushed as it is produced,
+without buffering the whole body. Levels are COMPRESSION_GZIP_LEVEL and
+COMPRESSION_ZSTD_LEVEL. Low levels keep the added latency small.
+Compressed responses get a weak ETag, since their bytes differ from the
+uncompressed ones.
+
+zstd needs the zstandard package (pip install zstandard). Without it, only
+gzip is offered, and zstd request bodies are answered with 415.
+"""
+import gzip
+import io
+import zlib
+
+from flask import current_app, jsonify, request
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.wsgi import LimitedStream
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+DECODE_ERRORS = (OSError, EOFError, zlib.error) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+READ_CHUNK = 64 * 1024
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'application/javascript', 'image/svg+xml'}
+
+
+class CorruptBody(BadRequest):
+    description = 'Request body could not be decompressed'
+
+
+class InflatedTooLarge(RequestEntityTooLarge):
+    description = 'Decompressed request body is too large'
+
+
+def request_encodings():
+    """Content-Encodings accepted on request bodies."""
+    return ('gzip', 'x-gzip', 'zstd') if zstandard is not None else ('gzip', 'x-gzip')
+
+
+def response_encodings():
+    """Content-Encodings offered on responses, preferred first."""
+    return ('zstd', 'gzip') if zstandard is not None else ('gzip',)
+
+
+class InflatingStream(io.RawIOBase):
+    """Read-only stream of a compressed body's inflated bytes, capped at `limit`."""
+
+    def __init__(self, raw, encoding, limit):
+        if encoding == 'zstd':
+            self._decoded = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        else:
+            self._decoded = gzip.GzipFile(fileobj=raw, mode='rb')
+        self._limit = limit
+        self.inflated = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            count = self._decoded.readinto(buffer)
+        except DECODE_ERRORS as e:
+            raise CorruptBody(f'Request body could not be decompressed: {e}') from None
+        self.inflated += count
+        if self.inflated > self._limit:
+            raise InflatedTooLarge(f'Decompressed request body exceeds {self._limit} bytes')
+        return count
+
+    def readall(self):
+        chunks = []
+        while chunk := self.read(READ_CHUNK):
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+
+class Encoder:
+    """Incremental gzip or zstd compressor for one response body."""
+
+    def __init__(self, encoding, config):
+        if encoding == 'zstd':
+            self._compressor = zstandard.ZstdCompressor(level=config['COMPRESSION_ZSTD_LEVEL']).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._compressor = zlib.compressobj(config['COMPRESSION_GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._sync = zlib.Z_SYNC_FLUSH
+
+    def chunk(self, data):
+        """Compress `data` and flush it, so the client can decode it right away."""
+        return self._compressor.compress(data) + self._compressor.flush(self._sync)
+
+    def finish(self, data=b''):
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+def _compress_stream(chunks, encoder):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if chunk:
+                yield encoder.chunk(chunk)
+        yield encoder.finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def _decode_request():
+    encoding = (request.headers.get('Content-Encoding') or '').strip().lower()
+    if encoding in ('', 'identity'):
+        return None
+    if encoding not in request_encodings():
+        return jsonify(msg=f'Unsupported Content-Encoding: {encoding}'), 415
+    environ = request.environ
+    raw = environ['wsgi.input']
+    if 'wsgi.input_terminated' not in environ:
+        raw = LimitedStream(raw, request.content_length or 0)
+    environ['wsgi.input'] = InflatingStream(raw, encoding, current_app.config['COMPRESSION_MAX_INFLATED_BYTES'])
+    # The inflated length is unknown; the stream ends where the compressed body does
+    environ['wsgi.input_terminated'] = True
+    return None
+
+
+def _compressible(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304) or response.direct_passthrough:
+        return False
+    if 'Content-Encoding' in response.headers or response.cache_control.no_transform:
+        return False
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype.endswith('+json') or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def _compress_response(response):
+    if not current_app.config['COMPRESSION_ENABLED'] or request.method == 'HEAD' or not _compressible(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(response_encodings())
+    if encoding is None:
+        return response
+
+    encoder = Encoder(encoding, current_app.config)
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoder)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < current_app.config['COMPRESSION_MIN_SIZE']:
+            return response
+        response.set_data(encoder.finish(body))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _client_error(e):
+    return jsonify(msg=e.description), e.code
+
+
+def init_app(app):
+    app.before_request(_decode_request)
+    app.after_request(_compress_response)
+    app.register_error_handler(CorruptBody, _client_error)
+    app.register_error_handler(InflatedTooLarge, _client_error)
@@ -12,6 +12,24 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO", "false").lower() == "true"
+    # Connection pool; in-memory SQLite shares a single connection, so no pool sizing
+    SQLALCHEMY_ENGINE_OPTIONS = {} if SQLALCHEMY_DATABASE_URI in ("sqlite://", "sqlite:///:memory:") else {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false").lower() == "true",
+    }
+
+    # SQLite performance profile, set on every new connection by api.sqlite
+    # (SQLITE_PROFILE=default keeps SQLite's own journaling and sync settings)
+    SQLITE_PRAGMAS = {} if os.getenv("SQLITE_PROFILE", "performance") == "default" else {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        # Negative values are KiB: 64 MiB of page cache per connection
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    }
 
     # JWT
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-jwt-secret-change-me")
@@ -20,6 +38,118 @@ class Config:
     JWT_TOKEN_LOCATION = ["headers"]
     JWT_HEADER_NAME = "Authorization"
     JWT_HEADER_TYPE = "Bearer"
+    # Verified access tokens remembered by api.auth (0 disables the cache)
+    JWT_DECODE_CACHE_SIZE = int(os.getenv("JWT_DECODE_CACHE_SIZE", "4096"))
+
+    # api.users: cached user id/role lookups; misses (no such user) are cached
+    # for the shorter negative TTL. Entries are dropped when a user changes.
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+    USER_CACHE_NEGATIVE_TTL = int(os.getenv("USER_CACHE_NEGATIVE_TTL", "30"))
+
+    # Password hashing: a werkzeug generate_password_hash method with its cost
+    # parameters, e.g. "scrypt:32768:8:1" (n:r:p) or "pbkdf2:sha256:600000".
+    # Stored hashes made with other parameters are upgraded at the next login.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+
+    # Telemetry ingest
+    TELEMETRY_BULK_MAX_ROWS = int(os.getenv("TELEMETRY_BULK_MAX_ROWS", "10000"))
+    TELEMETRY_BULK_CHUNK_SIZE = int(os.getenv("TELEMETRY_BULK_CHUNK_SIZE", "500"))
+    # "sync" commits each POST /telemetry; "async" queues it (202) for the batch writer in
+    # api.ingest; "spool" fsyncs it to a durable spool file (api.spool) before the 202
+    TELEMETRY_INGEST_MODE = os.getenv("TELEMETRY_INGEST_MODE", "sync")
+    TELEMETRY_INGEST_QUEUE_SIZE = int(os.getenv("TELEMETRY_INGEST_QUEUE_SIZE", "10000"))
+    TELEMETRY_INGEST_BATCH_SIZE = int(os.getenv("TELEMETRY_INGEST_BATCH_SIZE", "500"))
+    TELEMETRY_INGEST_FLUSH_INTERVAL = float(os.getenv("TELEMETRY_INGEST_FLUSH_INTERVAL", "0.2"))
+    TELEMETRY_INGEST_SHUTDOWN_TIMEOUT = float(os.getenv("TELEMETRY_INGEST_SHUTDOWN_TIMEOUT", "30"))
+    # Reject readings whose buoy_id is not a registered user (checked in bulk
+    # against the api.users cache rather than left to the foreign key)
+    TELEMETRY_VALIDATE_BUOY_IDS = os.getenv("TELEMETRY_VALIDATE_BUOY_IDS", "false").lower() == "true"
+    # Recently stored (buoy_id, timestamp) keys kept in memory so repeats skip the INSERT
+    TELEMETRY_DEDUP_CACHE_SIZE = int(os.getenv("TELEMETRY_DEDUP_CACHE_SIZE", "100000"))
+    # One spool directory per process
+    TELEMETRY_SPOOL_DIR = os.getenv("TELEMETRY_SPOOL_DIR", "spool")
+    TELEMETRY_SPOOL_MAX_BYTES = int(os.getenv("TELEMETRY_SPOOL_MAX_BYTES", str(256 * 1024 * 1024)))
+    TELEMETRY_SPOOL_BATCH_SIZE = int(os.getenv("TELEMETRY_SPOOL_BATCH_SIZE", "5000"))
+    TELEMETRY_SPOOL_REPLAY_INTERVAL = float(os.getenv("TELEMETRY_SPOOL_REPLAY_INTERVAL", "1.0"))
+
+    # Accepted value ranges on ingest, as "field=low:high,..." (pH 0-14, salinity in
+    # PSU, temperature in degrees C); readings outside them are rejected
+    TELEMETRY_VALUE_RANGES = {
+        field: tuple(float(v) for v in bounds.split(":"))
+        for field, bounds in (item.split("=") for item in os.getenv(
+            "TELEMETRY_VALUE_RANGES", "pH=0:14,salinity=0:70,temperature=-5:45").split(","))
+    }
+    # Bulk ingest validation: "auto" checks columns with NumPy when installed,
+    # "python" checks record by record
+    TELEMETRY_BATCH_VALIDATOR = os.getenv("TELEMETRY_BATCH_VALIDATOR", "auto")
+
+    # Telemetry listing (keyset pagination)
+    TELEMETRY_PAGE_SIZE = int(os.getenv("TELEMETRY_PAGE_SIZE", "100"))
+    TELEMETRY_MAX_PAGE_SIZE = int(os.getenv("TELEMETRY_MAX_PAGE_SIZE", "1000"))
+
+    # Streaming export: rows fetched per server-side cursor batch
+    TELEMETRY_EXPORT_BATCH_SIZE = int(os.getenv("TELEMETRY_EXPORT_BATCH_SIZE", "1000"))
+
+    # Maintain hourly/daily rollups on every telemetry write; aggregates read them
+    TELEMETRY_ROLLUPS_ENABLED = os.getenv("TELEMETRY_ROLLUPS_ENABLED", "true").lower() == "true"
+
+    # Closed quarters archived into their own tables (manage.py partition-telemetry):
+    # the newest KEEP quarters, counting the current one, stay in `telemetry`;
+    # each process re-reads the partition catalog every CATALOG_TTL seconds
+    TELEMETRY_PARTITION_KEEP_QUARTERS = int(os.getenv("TELEMETRY_PARTITION_KEEP_QUARTERS", "2"))
+    TELEMETRY_PARTITION_CATALOG_TTL = int(os.getenv("TELEMETRY_PARTITION_CATALOG_TTL", "30"))
+
+    # Parquet files of archived quarters (manage.py archive-telemetry, needs pyarrow);
+    # aggregates and exports entirely within them are read from the files
+    TELEMETRY_ARCHIVE_DIR = os.getenv("TELEMETRY_ARCHIVE_DIR", "archive")
+    TELEMETRY_ARCHIVE_READS = os.getenv("TELEMETRY_ARCHIVE_READS", "true").lower() == "true"
+
+    # Read-through cache for GET /telemetry/<id> and bulk GET ("memory", "none"
+    # or an import path); TTL applies to current-quarter records only
+    TELEMETRY_CACHE_BACKEND = os.getenv("TELEMETRY_CACHE_BACKEND", "memory")
+    TELEMETRY_CACHE_SIZE = int(os.getenv("TELEMETRY_CACHE_SIZE", "10000"))
+    TELEMETRY_CACHE_TTL = int(os.getenv("TELEMETRY_CACHE_TTL", "30"))
+
+    # JSON responses: "auto" uses orjson when installed, else the stdlib encoder
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+    JSON_SORT_KEYS = os.getenv("JSON_SORT_KEYS", "false").lower() == "true"
+    JSON_COMPACT = os.getenv("JSON_COMPACT", "true").lower() == "true"
+
+    # Content-Encoding (api.compression): gzip/zstd request bodies are inflated
+    # while read, up to MAX_INFLATED_BYTES; responses of at least MIN_SIZE bytes,
+    # and all streamed ones, are compressed for clients that accept gzip or zstd
+    # (zstd needs zstandard). Low levels, as compression runs on the request path
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "1"))
+    COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "1"))
+    COMPRESSION_MAX_INFLATED_BYTES = int(os.getenv("COMPRESSION_MAX_INFLATED_BYTES", str(32 * 1024 * 1024)))
+
+    # Per-route latency, size and SQL metrics at /metrics (api.metrics)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_LATENCY_BUCKETS = [float(b) for b in os.getenv(
+        "METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10").split(",")]
+
+    # Sampling profiler (api.profiler): dump the stacks of requests slower than
+    # PROFILE_SLOW_MS, plus a PROFILE_SAMPLE_RATE fraction of all requests
+    PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "false").lower() == "true"
+    PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "1000"))
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+    # Production server: gunicorn -c gunicorn.conf.py wsgi:app (see api/server.py).
+    # SERVER_WORKERS=0 sizes the worker pool from the available CPUs
+    SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:5030")
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0"))
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", "4"))
+    SERVER_PRELOAD = os.getenv("SERVER_PRELOAD", "false").lower() == "true"
+    SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "30"))
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+    SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "5"))
+    # Recycle each worker after this many requests (0 = never), with 10% jitter
+    SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
 
     # CORS / Swagger etc. can be added here as needed
     PROPAGATE_EXCEPTIONS = True
@@ -0,0 +1,261 @@
+"""Asynchronous telemetry ingest: a bounded queue drained by a batch writer.
+
+With TELEMETRY_INGEST_MODE=async, POST /telemetry validates the reading,
+stamps it with its receive time and puts it on an in-process queue instead
+of committing it. A single writer thread takes readings off the queue until
+it has TELEMETRY_INGEST_BATCH_SIZE of them or TELEMETRY_INGEST_FLUSH_INTERVAL
+seconds have passed, then writes the batch with one executemany INSERT and
+one commit. Request latency no longer includes a commit, and bursts of
+writers no longer contend for the SQLite write lock.
+If the database rejects a batch, it is split until the failing readings are
+isolated; only those are dropped and counted as failed.
+
+Readings are acknowledged before they are durable: anything still queued
+when the process dies is lost. On normal interpreter exit the queue is
+drained before the writer stops. TELEMETRY_INGEST_MODE=spool (api.spool)
+keeps the same 202 contract but fsyncs each reading to disk first.
+
+Every path stores readings through insert_rows, which skips readings whose
+natural key (buoy_id, timestamp) is already stored, so a retried upload
+never creates a duplicate row. RecentReadings remembers recently stored
+keys so a repeat can be answered without touching the database.
+"""
+import atexit
+import datetime
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+
+from api import rollups
+from api.models import db, Telemetry
+
+_STOP = object()
+
+
+def natural_key(row):
+    return row['buoy_id'], row['timestamp']
+
+
+def stamp_receive_time(rows):
+    """Give rows without a client timestamp the receive time.
+
+    Rows of one batch get distinct microseconds so they can't collide on
+    the natural key.
+    """
+    now = datetime.datetime.utcnow()
+    for offset, row in enumerate(r for r in rows if r.get('timestamp') is None):
+        row['timestamp'] = now + datetime.timedelta(microseconds=offset)
+
+
+_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def _insert_skipping_duplicates():
+    return (_INSERTS[db.engine.dialect.name](Telemetry)
+            .on_conflict_do_nothing(index_elements=['buoy_id', 'timestamp'])
+            .returning(Telemetry.id, Telemetry.buoy_id, Telemetry.timestamp))
+
+
+def insert_rows(rows):
+    """Insert validated, timestamped rows with INSERT ... ON CONFLICT DO NOTHING.
+
+    Returns the new id for each row, or None where the reading was already
+    stored (or repeated earlier in `rows`). Only new rows are folded into
+    the rollups. The caller commits, then calls remember().
+    """
+    inserted = {(buoy_id, ts): tid
+                for tid, buoy_id, ts in db.session.execute(_insert_skipping_duplicates(), rows)}
+    ids = []
+    for row in rows:
+        ids.append(inserted.pop(natural_key(row), None))
+    rollups.record_inserts([row for row, tid in zip(rows, ids) if tid is not None])
+    return ids
+
+
+def insert_isolating_failures(rows):
+    """Insert and commit rows, setting aside the ones the database rejects.
+
+    The batch is tried whole first. If it fails, it is rolled back and split
+    in halves, down to single rows, so one bad reading can't take the rest
+    of an acknowledged batch with it. Returns (rows, ids) for what was
+    committed and [(row, exception)] for the rows that failed on their own.
+    """
+    try:
+        ids = insert_rows(rows)
+        db.session.commit()
+        return rows, ids, []
+    except Exception as e:
+        db.session.rollback()
+        if len(rows) == 1:
+            return [], [], [(rows[0], e)]
+    middle = len(rows) // 2
+    first_rows, first_ids, first_failures = insert_isolating_failures(rows[:middle])
+    rest_rows, rest_ids, rest_failures = insert_isolating_failures(rows[middle:])
+    return first_rows + rest_rows, first_ids + rest_ids, first_failures + rest_failures
+
+
+class RecentReadings:
+    """Thread-safe LRU of recently stored natural keys -> telemetry id."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            tid = self._entries.get(key)
+            if tid is not None:
+                self._entries.move_to_end(key)
+            return tid
+
+    def add_many(self, mapping):
+        if not self.maxsize:
+            return
+        with self._lock:
+            for key, tid in mapping.items():
+                self._entries[key] = tid
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def recent_readings(app=None):
+    return (app or current_app).extensions['recent_readings']
+
+
+def remember(rows, ids, app=None):
+    """Record committed rows (and the ids of their stored readings) as recently seen."""
+    recent_readings(app).add_many({natural_key(row): tid for row, tid in zip(rows, ids) if tid is not None})
+
+
+def forget(keys):
+    """Drop natural keys of readings that were deleted or re-keyed."""
+    recent_readings().discard_many(keys)
+
+
+class IngestQueue:
+    def __init__(self, app):
+        self.app = app
+        self.capacity = app.config['TELEMETRY_INGEST_QUEUE_SIZE']
+        self.batch_size = app.config['TELEMETRY_INGEST_BATCH_SIZE']
+        self.flush_interval = app.config['TELEMETRY_INGEST_FLUSH_INTERVAL']
+        self._queue = queue.Queue(self.capacity)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {'accepted': 0, 'rejected': 0, 'written': 0, 'duplicates': 0, 'failed': 0, 'batches': 0}
+        self.last_error = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='telemetry-ingest', daemon=True)
+                self._thread.start()
+
+    def submit(self, row):
+        """Queue a validated row; False if the queue is full."""
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.stats['rejected'] += 1
+            return False
+        with self._lock:
+            self.stats['accepted'] += 1
+        return True
+
+    def flush(self):
+        """Block until every queued reading has been written (or has failed)."""
+        self._queue.join()
+
+    def stop(self, timeout=None):
+        """Drain the queue, then stop the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def status(self):
+        with self._lock:
+            stats = dict(self.stats)
+        return {'queue_depth': self._queue.qsize(), 'capacity': self.capacity,
+                'writer_alive': self._thread is not None and self._thread.is_alive(),
+                'last_error': self.last_error, **stats}
+
+    def _next_batch(self):
+        """Wait for a first reading, then collect more until the batch is full or the interval ends."""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Put it back so the loop ends after this batch is written
+                self._queue.task_done()
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                self._queue.task_done()
+                return
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, rows):
+        with self.app.app_context():
+            stored, ids, failures = insert_isolating_failures(rows)
+        for row, e in failures:
+            self.app.logger.error('Telemetry reading %r could not be written: %s', row, e)
+        remember(stored, ids, self.app)
+        written = sum(tid is not None for tid in ids)
+        with self._lock:
+            self.stats['written'] += written
+            self.stats['duplicates'] += len(stored) - written
+            self.stats['failed'] += len(failures)
+            self.stats['batches'] += 1
+            if failures:
+                self.last_error = str(failures[-1][1])
+
+
+def init_app(app):
+    app.extensions['recent_readings'] = RecentReadings(app.config['TELEMETRY_DEDUP_CACHE_SIZE'])
+    mode = app.config['TELEMETRY_INGEST_MODE']
+    ingest_queue = None
+    if mode == 'async':
+        ingest_queue = IngestQueue(app)
+    elif mode == 'spool':
+        from api.spool import Spool
+        ingest_queue = Spool(app)
+    elif mode != 'sync':
+        raise ValueError(f'Unknown TELEMETRY_INGEST_MODE {mode!r}; expected "sync", "async" or "spool"')
+    if ingest_queue is not None:
+        ingest_queue.start()
+        atexit.register(ingest_queue.stop, app.config['TELEMETRY_INGEST_SHUTDOWN_TIMEOUT'])
+    app.extensions['ingest_queue'] = ingest_queue
@@ -0,0 +1,76 @@
+"""JSON providers for API responses.
+
+Both providers encode datetimes natively as ISO-8601, so models and
+serializers can hand datetimes straight to jsonify() instead of calling
+isoformat() per row. `create_provider` picks one from Config.JSON_PROVIDER:
+"orjson" (requires the orjson package), "stdlib", or "auto" to prefer orjson
+when it is installed.
+"""
+import datetime
+import decimal
+import uuid
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider, with ISO-8601 datetimes instead of HTTP dates."""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(JSONProvider):
+    """orjson-backed provider; writes response bodies as bytes without a str round trip."""
+
+    mimetype = 'application/json'
+    sort_keys = False
+    compact = True
+
+    def _option(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._option(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=_default, option=self._option(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def create_provider(app):
+    choice = app.config['JSON_PROVIDER']
+    if choice not in ('auto', 'orjson', 'stdlib'):
+        raise ValueError(f'Unknown JSON_PROVIDER: {choice!r}')
+    if choice == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER is "orjson" but the orjson package is not installed')
+    use_orjson = choice == 'orjson' or (choice == 'auto' and orjson is not None)
+
+    provider = OrjsonProvider(app) if use_orjson else StdlibJSONProvider(app)
+    provider.sort_keys = app.config['JSON_SORT_KEYS']
+    provider.compact = app.config['JSON_COMPACT']
+    return provider
@@ -354,31 +354,48 @@ if __name__ == '__main__':
 
 
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import (
-    JWTManager, create_access_token, jwt_required, get_jwt_identity, get_jwt
+    JWTManager, create_access_token, create_refresh_token, jwt_required, get_jwt_identity
 )
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_migrate import Migrate
 from flask_marshmallow import Marshmallow
 from flask_swagger_ui import get_swaggerui_blueprint
+from sqlalchemy import delete, func, select, tuple_, update
 
-from api.models import db, User, Telemetry
+from api.models import db, User, Telemetry, archived_until, telemetry_sources, telemetry_sources_for_ids
 from api.config import Config
+from api import (
+    archive, auth, cache, compression, formats, ingest, json_provider, metrics, profiler, rollups, sqlite, users, validation,
+)
+from api.validation import TELEMETRY_FIELDS, parse_timestamp, validate_record
+from api.auth import permission_required
 
 from datetime import timedelta
+import base64
+import csv
 import datetime
+import io
 
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = json_provider.create_provider(app)
 
 CORS(app)
 jwt = JWTManager(app)
 db.init_app(app)
+sqlite.init_app(app, db)
+metrics.init_app(app, db)
+profiler.init_app(app)
+compression.init_app(app)
 migrate = Migrate(app, db)
 ma = Marshmallow(app)
+auth.init_app(app)
+users.init_app(app)
+cache.init_app(app)
+ingest.init_app(app)
 
 
 # ---------------------------
@@ -472,13 +489,13 @@ def register():
         print("Missing fields")  # Debug
         return jsonify({'msg': 'Missing username, password, or email'}), 400
 
-    if User.query.filter_by(username=username).first():
+    if users.by_username(username) is not None:
         print("User already exists")  # Debug
         return jsonify({'msg': 'User already exists'}), 400
 
     new_user = User(
         username=username,
-        password_hash=generate_password_hash(password),
+        password_hash=auth.hash_password(password),
         email=email,
         role=role
     )
@@ -521,87 +538,426 @@ def login():
     password = data.get('password')
     print("Login attempt:", username, password)  # Debug
 
-    user = User.query.filter_by(username=username).first()
+    # Unknown usernames are answered from the user cache without a query
+    info = users.by_username(username)
+    user = db.session.get(User, info.id) if info is not None else None
     print("User found:", user)  # Debug
 
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user or not auth.verify_password(user, password):
         print("Login failed")  # Debug
         return jsonify({'msg': 'Invalid username or password'}), 401
+    if db.session.is_modified(user):
+        db.session.commit()  # password re-hashed with the current parameters
 
-    access_token = create_access_token(
+    print("Login success")  # Debug
+    return jsonify({
+        'access_token': issue_access_token(user),
+        # Exchange at /refresh for new access tokens without re-sending the password
+        'refresh_token': create_refresh_token(identity=str(user.id))
+    }), 201
+
+
+@app.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    # The role is looked up again so role changes and deleted accounts take effect
+    user = users.by_id(int(get_jwt_identity()))
+    if user is None:
+        return jsonify(msg='User no longer exists'), 401
+    return jsonify({'access_token': issue_access_token(user)}), 200
+
+
+def issue_access_token(user):
+    return create_access_token(
         identity=str(user.id),
         additional_claims={'role': user.role},
         expires_delta=timedelta(hours=12)
     )
-    print("Login success")  # Debug
-    return jsonify({'access_token': access_token}), 201
 
 # ---------------------------
 # Telemetry CRUD
 # ---------------------------
 
 @app.route('/telemetry', methods=['POST'])
-@jwt_required()
+@permission_required('create')
 def create_telemetry():
-    claims = get_jwt()
-    role = claims.get('role')
-    if role not in ['admin', 'researcher']:
-        return jsonify(msg='Insufficient permissions'), 403
+    data, error = ingest_payload()
+    if error:
+        return error
+    row, problem = validate_record(data)
+    if problem:
+        return jsonify(msg=f'Reading {problem}'), 400
+    if unknown_buoys([row]):
+        return jsonify(msg=f"Reading has an unknown buoy_id: {row['buoy_id']}"), 400
+    if archived_readings([row]):
+        return jsonify(msg='Readings in archived quarters are read-only'), 403
+    ingest.stamp_receive_time([row])
+
+    # Retries of a recently stored reading are answered from memory
+    response = stored_reading(ingest.recent_readings().get(ingest.natural_key(row)))
+    if response is not None:
+        return response
+
+    ingest_queue = app.extensions['ingest_queue']
+    if ingest_queue is not None:
+        return enqueue_telemetry(ingest_queue, row)
 
-    data = request.get_json() or {}
     try:
-        telemetry = Telemetry(
-            buoy_id=data['buoy_id'],
-            salinity=data['salinity'],
-            pH=data['pH'],
-            pollutants=data.get('pollutants'),
-            temperature=data.get('temperature'),
-            location=data.get('location')
-        )
-        db.session.add(telemetry)
+        [tid] = ingest.insert_rows([row])
         db.session.commit()
-        return jsonify(id=telemetry.id, data=telemetry.to_dict()), 201
-    except KeyError as e:
-        return jsonify(msg=f"Missing required field: {e.args[0]}"), 400
     except Exception as e:
         db.session.rollback()
         return jsonify(msg=str(e)), 400
 
+    if tid is None:
+        # Stored before, but no longer in the recent-readings LRU
+        tid = db.session.execute(select(Telemetry.id).where(
+            Telemetry.buoy_id == row['buoy_id'], Telemetry.timestamp == row['timestamp'])).scalar_one()
+        ingest.remember([row], [tid])
+        return stored_reading(tid)
+    ingest.remember([row], [tid])
+    return jsonify(id=tid, data={'id': tid, **row}), 201
+
+
+def ingest_payload():
+    """The body of an ingest request, as JSON or MessagePack (api.formats).
+
+    Returns (payload, None), or (None, error response) when the body can't be decoded.
+    """
+    if request.mimetype in formats.MSGPACK_MIMETYPES:
+        if not formats.msgpack_available():
+            return None, (jsonify(msg='MessagePack bodies are not supported by this server'), 415)
+        try:
+            return formats.decode_msgpack(request.get_data()), None
+        except ValueError as e:
+            return None, (jsonify(msg=str(e)), 400)
+    return request.get_json(), None
+
+
+def stored_reading(tid):
+    """Answer a repeated upload with the reading already stored under `tid`.
+
+    Returns None if there is no such reading, e.g. it has since been deleted.
+    """
+    if tid is None:
+        return None
+    existing = fetch_rows_by_id([tid]).get(tid)
+    if existing is None:
+        return None
+    return jsonify(id=tid, data=existing, msg='Duplicate reading, already stored'), 200
+
+
+def enqueue_telemetry(ingest_queue, row):
+    """Async ingest: hand a validated, timestamped reading off to the batch writer."""
+    response = jsonify(msg='Accepted for ingest', data=row)
+    if not ingest_queue.submit(row):
+        response = jsonify(msg='Ingest queue is full, retry later')
+        response.headers['Retry-After'] = '1'
+        return response, 429
+    return response, 202
+
+
+@app.route('/telemetry/ingest/status', methods=['GET'])
+@permission_required('read')
+def ingest_status():
+    ingest_queue = app.extensions['ingest_queue']
+    if ingest_queue is None:
+        return jsonify(mode='sync'), 200
+    return jsonify(mode=app.config['TELEMETRY_INGEST_MODE'], **ingest_queue.status()), 200
+
+
+def encode_cursor(ts, tid):
+    raw = f'{ts.isoformat()}|{tid}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    ts, tid = raw.rsplit('|', 1)
+    return datetime.datetime.fromisoformat(ts), int(tid)
+
+
+def parse_range_args():
+    """Read (buoy_id, since, until) from the query string; absent values are None.
+
+    Raises ValueError on malformed values.
+    """
+    buoy_id = request.args.get('buoy_id')
+    since = request.args.get('since')
+    until = request.args.get('until')
+    return (int(buoy_id) if buoy_id else None,
+            parse_timestamp(since) if since else None,
+            parse_timestamp(until) if until else None)
+
+
+def range_filters(buoy_column, time_column, buoy_id, since, until):
+    filters = []
+    if buoy_id is not None:
+        filters.append(buoy_column == buoy_id)
+    if since is not None:
+        filters.append(time_column >= since)
+    if until is not None:
+        filters.append(time_column < until)
+    return filters
+
+
+def source_queries(columns, buoy_id, since, until, newest_first=False):
+    """One SELECT of `columns(entity)` per table holding readings in [since, until).
+
+    Tables come oldest first (newest first with `newest_first`) and never
+    overlap in time, so their results can simply be concatenated; archived
+    quarters outside the range are skipped.
+    """
+    sources = telemetry_sources(since, until)
+    for entity, filters in reversed(sources) if newest_first else sources:
+        yield entity, select(*columns(entity)).where(
+            *filters, *range_filters(entity.buoy_id, entity.timestamp, buoy_id, since, until))
+
+
+@app.route('/telemetry', methods=['GET'])
+@permission_required('read')
+def list_telemetry():
+    """List telemetry newest first, filtered by buoy and time range.
+
+    Pages are keyed on (timestamp, id) rather than OFFSET, so fetching any
+    page is a single index range scan of `limit` rows (one per table when a
+    page crosses into archived quarters).
+    """
+    try:
+        limit = int(request.args.get('limit', app.config['TELEMETRY_PAGE_SIZE']))
+        buoy_id, since, until = parse_range_args()
+        cursor = request.args.get('cursor')
+        cursor = decode_cursor(cursor) if cursor else None
+    except (ValueError, UnicodeDecodeError):
+        return jsonify(msg='Invalid limit, timestamp or cursor'), 400
+    if not 1 <= limit <= app.config['TELEMETRY_MAX_PAGE_SIZE']:
+        return jsonify(msg=f"limit must be between 1 and {app.config['TELEMETRY_MAX_PAGE_SIZE']}"), 400
+
+    serializer = g.serializer
+    if cursor is not None:
+        # Quarters newer than the cursor hold nothing for this page
+        try:
+            after_cursor = cursor[0] + timedelta(microseconds=1)
+        except OverflowError:  # a crafted cursor at datetime.max
+            return jsonify(msg='Invalid limit, timestamp or cursor'), 400
+        until = min(until, after_cursor) if until is not None else after_cursor
+
+    # The trailing labelled key columns feed the cursor whatever the role sees
+    def columns(entity):
+        return (*serializer.columns_for(entity), entity.timestamp.label('key_ts'), entity.id.label('key_id'))
+
+    rows = []
+    for entity, stmt in source_queries(columns, buoy_id, since, until, newest_first=True):
+        if cursor is not None:
+            stmt = stmt.where(tuple_(entity.timestamp, entity.id) < cursor)
+        rows += db.session.execute(stmt.order_by(entity.timestamp.desc(), entity.id.desc())
+                                   .limit(limit + 1 - len(rows))).all()
+        if len(rows) > limit:
+            break
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].key_ts, rows[-1].key_id)
+
+    return jsonify(data=serializer.rows(rows), next_cursor=next_cursor), 200
+
+
+def export_ndjson(batches, serializer):
+    for batch in batches:
+        yield '\n'.join(app.json.dumps(serializer.row(row)) for row in batch) + '\n'
+
+
+def export_csv(batches, serializer):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(serializer.fields)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_batches(serializer, buoy_id, since, until):
+    """Batches of rows, oldest first, streamed from one table after another."""
+    for entity, stmt in source_queries(serializer.columns_for, buoy_id, since, until):
+        stmt = (stmt.order_by(entity.timestamp, entity.id)
+                .execution_options(yield_per=app.config['TELEMETRY_EXPORT_BATCH_SIZE']))
+        yield from db.session.execute(stmt).partitions()
+
+
+@app.route('/telemetry/export', methods=['GET'])
+@permission_required('read')
+def export_telemetry():
+    """Stream telemetry as NDJSON or CSV, oldest first.
+
+    Rows are read in `yield_per` batches from a streaming cursor and written
+    out as they arrive, so memory stays flat regardless of export size.
+    Ranges entirely within Parquet-archived quarters are read from the files.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify(msg='format must be "ndjson" or "csv"'), 400
+    try:
+        range_args = parse_range_args()
+    except ValueError:
+        return jsonify(msg='Invalid buoy_id or timestamp'), 400
+
+    serializer = g.serializer
+    files = archive.files_for(*range_args[1:])
+    if files is not None:
+        batches = archive.export_rows(files, serializer.fields, *range_args)
+    else:
+        batches = export_batches(serializer, *range_args)
+    if fmt == 'csv':
+        body, mimetype = export_csv(batches, serializer), 'text/csv'
+    else:
+        body, mimetype = export_ndjson(batches, serializer), 'application/x-ndjson'
+    return Response(stream_with_context(body), mimetype=mimetype), 200
+
+
+AGGREGATE_METRICS = ('salinity', 'temperature', 'pH')
+
+
+def raw_aggregate_queries(bucket, metrics, per_buoy, buoy_id, since, until):
+    """GROUP BY over raw telemetry rows: O(readings in range).
+
+    One statement per table in range; buckets never span quarters, so the
+    results concatenate in order.
+    """
+    for entity, source_filters in telemetry_sources(since, until):
+        bucket_start = rollups.time_bucket(bucket, entity.timestamp).label('bucket_start')
+        group_by = [bucket_start, entity.buoy_id] if per_buoy else [bucket_start]
+        columns = [func.count(entity.id).label('count')]
+        for metric in metrics:
+            column = getattr(entity, metric)
+            columns += [func.min(column).label(f'{metric}_min'),
+                        func.max(column).label(f'{metric}_max'),
+                        func.avg(column).label(f'{metric}_avg')]
+        filters = range_filters(entity.buoy_id, entity.timestamp, buoy_id, since, until)
+        yield select(*group_by, *columns).where(*source_filters, *filters).group_by(*group_by).order_by(*group_by)
+
+
+def rollup_aggregate_queries(bucket, metrics, per_buoy, buoy_id, since, until):
+    """Merge pre-aggregated hourly/daily rollup rows: O(buckets in range)."""
+    model = rollups.ROLLUP_MODELS[bucket]
+    group_by = [model.bucket_start, model.buoy_id] if per_buoy else [model.bucket_start]
+    columns = [func.sum(model.count).label('count')]
+    for metric in metrics:
+        prefix = metric.lower()
+        columns += [func.min(getattr(model, f'{prefix}_min')).label(f'{metric}_min'),
+                    func.max(getattr(model, f'{prefix}_max')).label(f'{metric}_max'),
+                    (func.sum(getattr(model, f'{prefix}_sum')) / func.sum(model.count)).label(f'{metric}_avg')]
+    filters = range_filters(model.buoy_id, model.bucket_start, buoy_id, since, until)
+    return [select(*group_by, *columns).where(*filters).group_by(*group_by).order_by(*group_by)]
+
+
+@app.route('/telemetry/aggregate', methods=['GET'])
+@permission_required('read')
+def aggregate_telemetry():
+    """Return count/min/max/avg per buoy per time bucket, computed in SQL.
+
+    Hour and day buckets are served from the rollup tables when the requested
+    range falls on bucket boundaries; anything else groups the raw rows, read
+    from the Parquet archive when the range lies entirely in archived quarters.
+    Roles that may not see buoy_id (consumers) get buckets aggregated across
+    the selected buoys, and only the metrics their role is allowed to read.
+    """
+    bucket = request.args.get('bucket', 'hour')
+    if bucket not in rollups.BUCKET_FORMATS:
+        return jsonify(msg='bucket must be one of: minute, hour, day'), 400
+    try:
+        buoy_id, since, until = parse_range_args()
+    except ValueError:
+        return jsonify(msg='Invalid buoy_id or timestamp'), 400
+
+    fields = g.fields
+    per_buoy = fields is None or 'buoy_id' in fields
+    metrics = tuple(m for m in AGGREGATE_METRICS if fields is None or m in fields)
+    use_rollups = (rollups.enabled() and bucket in rollups.ROLLUP_MODELS
+                   and rollups.is_aligned(since, bucket) and rollups.is_aligned(until, bucket))
+    files = None if use_rollups else archive.files_for(since, until)
+    if files is not None:
+        rows = archive.aggregate(files, bucket, metrics, per_buoy, buoy_id, since, until)
+    else:
+        build_queries = rollup_aggregate_queries if use_rollups else raw_aggregate_queries
+        statements = build_queries(bucket, metrics, per_buoy, buoy_id, since, until)
+        rows = (row for stmt in statements for row in db.session.execute(stmt).mappings())
+
+    result = []
+    for row in rows:
+        item = {'bucket_start': row['bucket_start'], 'count': row['count']}
+        if per_buoy:
+            item['buoy_id'] = row['buoy_id']
+        for metric in metrics:
+            item[metric] = {'min': row[f'{metric}_min'], 'max': row[f'{metric}_max'],
+                            'avg': row[f'{metric}_avg']}
+        result.append(item)
+    return jsonify(bucket=bucket, data=result), 200
+
+
+def cached_records(ids, serializer):
+    """Return {id: (data, etag)} for the ids that exist, read through the cache.
+
+    Misses are fetched with one IN query and cached; records from closed
+    quarters never change, so they are cached without expiry.
+    """
+    records = cache.get_records(ids, serializer)
+    missing = [tid for tid in ids if tid not in records]
+    if missing:
+        rows = []
+        for entity, filters in telemetry_sources_for_ids(missing):
+            rows += db.session.execute(
+                select(*serializer.columns_for(entity), entity.id.label('key_id'), entity.timestamp.label('key_ts'))
+                .where(entity.id.in_(missing), *filters)
+            ).all()
+            found = {row.key_id for row in rows}
+            missing = [tid for tid in missing if tid not in found]
+            if not missing:
+                break
+        historical = {row.key_id for row in rows if not is_current_quarter(row.key_ts)}
+        records.update(cache.put_records({row.key_id: serializer.row(row) for row in rows},
+                                         serializer, historical.__contains__))
+    return records
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
 
 @app.route('/telemetry/<int:tid>', methods=['GET'])
-@jwt_required()
+@permission_required('read')
 def get_telemetry(tid):
-    claims = get_jwt()
-    role = claims.get('role')
-
-    telemetry = Telemetry.query.get(tid)
-    if not telemetry:
+    records = cached_records([tid], g.serializer)
+    if tid not in records:
         return jsonify(msg='Not found'), 404
 
-    data = telemetry.to_dict()
-    if role == 'consumer':
-        filtered = {k: v for k, v in data.items() if k in ['salinity', 'pH', 'id', 'timestamp']}
-        return jsonify(id=tid, data=filtered), 200
+    data, etag = records[tid]
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
 
-    return jsonify(id=tid, data=data), 200
+    response = jsonify(id=tid, data=data)
+    response.set_etag(etag)
+    return response, 200
 
 
 @app.route('/telemetry/<int:tid>', methods=['PUT'])
-@jwt_required()
+@permission_required('update')
 def update_telemetry(tid):
-    claims = get_jwt()
-    role = claims.get('role')
-    if role != 'admin':
-        return jsonify(msg='Insufficient permissions'), 403
-
     telemetry = Telemetry.query.get(tid)
     if not telemetry:
+        if fetch_rows_by_id([tid]):  # moved to an archived quarter's table
+            return jsonify(msg='Edits to pre-current quarter records are not allowed'), 403
         return jsonify(msg='Not found'), 404
 
     if not is_current_quarter(telemetry.timestamp):
         return jsonify(msg='Edits to pre-current quarter records are not allowed'), 403
 
     data = request.get_json() or {}
+    old_buoy_id = telemetry.buoy_id
     try:
         telemetry.buoy_id = data.get('buoy_id', telemetry.buoy_id)
         telemetry.salinity = data.get('salinity', telemetry.salinity)
@@ -609,7 +965,10 @@ def update_telemetry(tid):
         telemetry.pollutants = data.get('pollutants', telemetry.pollutants)
         telemetry.temperature = data.get('temperature', telemetry.temperature)
         telemetry.location = data.get('location', telemetry.location)
+        rollups.refresh([(old_buoy_id, telemetry.timestamp), (telemetry.buoy_id, telemetry.timestamp)])
         db.session.commit()
+        cache.invalidate([tid])
+        ingest.forget([(old_buoy_id, telemetry.timestamp)])
         return jsonify(id=tid, data=telemetry.to_dict()), 200
     except Exception as e:
         db.session.rollback()
@@ -617,15 +976,12 @@ def update_telemetry(tid):
 
 
 @app.route('/telemetry/<int:tid>', methods=['DELETE'])
-@jwt_required()
+@permission_required('delete')
 def delete_telemetry(tid):
-    claims = get_jwt()
-    role = claims.get('role')
-    if role != 'admin':
-        return jsonify(msg='Insufficient permissions'), 403
-
     telemetry = Telemetry.query.get(tid)
     if not telemetry:
+        if fetch_rows_by_id([tid]):  # moved to an archived quarter's table
+            return jsonify(msg='Deletes to pre-current quarter records are not allowed'), 403
         return jsonify(msg='Not found'), 404
 
     if not is_current_quarter(telemetry.timestamp):
@@ -633,7 +989,10 @@ def delete_telemetry(tid):
 
     try:
         db.session.delete(telemetry)
+        rollups.refresh([(telemetry.buoy_id, telemetry.timestamp)])
         db.session.commit()
+        cache.invalidate([tid])
+        ingest.forget([(telemetry.buoy_id, telemetry.timestamp)])
         return jsonify(msg='Deleted'), 200
     except Exception as e:
         db.session.rollback()
@@ -645,11 +1004,8 @@ def delete_telemetry(tid):
 # ---------------------------
 
 @app.route('/telemetry/bulk', methods=['GET'])
-@jwt_required()
+@permission_required('read')
 def bulk_get_telemetry():
-    claims = get_jwt()
-    role = claims.get('role')
-
     ids = request.args.getlist('ids')
     if not ids:
         return jsonify(msg='Query parameter "ids" is required'), 400
@@ -659,51 +1015,173 @@ def bulk_get_telemetry():
     except ValueError:
         return jsonify(msg='All IDs must be integers'), 400
 
-    records = Telemetry.query.filter(Telemetry.id.in_(ids)).all()
-    result = []
-    for record in records:
-        data = record.to_dict()
-        if role == 'consumer':
-            filtered = {k: v for k, v in data.items() if k in ['salinity', 'pH', 'id', 'timestamp']}
-            result.append(filtered)
-        else:
-            result.append(data)
-    return jsonify(data=result), 200
+    ids = list(dict.fromkeys(ids))
+    records = cached_records(ids, g.serializer)
+    found = [records[tid] for tid in ids if tid in records]
+    etag = cache.combine_etags(e for _, e in found)
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
+
+    response = jsonify(data=[data for data, _ in found])
+    response.set_etag(etag)
+    return response, 200
+
+
+def unknown_buoys(rows):
+    """Indexes of the rows whose buoy_id is not a registered user.
+
+    Only checked with TELEMETRY_VALIDATE_BUOY_IDS; all of the batch's buoy_ids
+    are resolved at once through the user cache.
+    """
+    if not app.config['TELEMETRY_VALIDATE_BUOY_IDS']:
+        return []
+    missing = users.missing_ids(row['buoy_id'] for row in rows)
+    return [index for index, row in enumerate(rows) if row['buoy_id'] in missing]
+
+
+def archived_readings(rows):
+    """Indexes of the rows timestamped in an archived (read-only) quarter."""
+    boundary = archived_until()
+    if boundary is None:
+        return []
+    return [index for index, row in enumerate(rows)
+            if row.get('timestamp') is not None and row['timestamp'] < boundary]
+
+
+def record_errors(errors):
+    return [{'index': index, 'msg': f'Record {index} {problem}'} for index, problem in errors]
+
+
+@app.route('/telemetry/bulk', methods=['POST'])
+@permission_required('create')
+def bulk_create_telemetry():
+    """Insert a batch of readings in one transaction.
+
+    The whole batch is validated first and, by default, rejected if any
+    record is invalid, listing every invalid record. With ?partial=true the
+    valid records are stored and the invalid ones reported as `rejected`.
+    The batch may be JSON, MessagePack or a packed frame (api.formats).
+    """
+    partial = request.args.get('partial', 'false').lower() == 'true'
+    max_rows = app.config['TELEMETRY_BULK_MAX_ROWS']
+    if request.mimetype == formats.FRAME_MIMETYPE:
+        try:
+            rows, errors = formats.decode_frame(request.get_data(), max_rows)
+        except ValueError as e:
+            return jsonify(msg=str(e)), 400
+    else:
+        data, error = ingest_payload()
+        if error:
+            return error
+        if not isinstance(data, list) or not data:
+            return jsonify(msg='Payload must be a non-empty list of telemetry records'), 400
+        if len(data) > max_rows:
+            return jsonify(msg=f'Batch exceeds {max_rows} records'), 400
+        rows, errors = validation.validate_batch(data)
+
+    if errors and not partial:
+        index, problem = errors[0]
+        return jsonify(msg=f'Record {index} {problem}', errors=record_errors(errors)), 400
+    # Payload index of each valid row
+    invalid = {index for index, _ in errors}
+    positions = [index for index in range(len(rows) + len(errors)) if index not in invalid]
+
+    unknown, archived = unknown_buoys(rows), archived_readings(rows)
+    if not partial:
+        if unknown:
+            index = unknown[0]
+            return jsonify(msg=f"Record {index} has an unknown buoy_id: {rows[index]['buoy_id']}"), 400
+        if archived:
+            return jsonify(msg=f'Record {archived[0]} is in an archived quarter; archived quarters are read-only'), 403
+    elif unknown or archived:
+        errors += [(positions[index], f"has an unknown buoy_id: {rows[index]['buoy_id']}") for index in unknown]
+        errors += [(positions[index], 'is in an archived quarter; archived quarters are read-only')
+                   for index in archived if index not in unknown]
+        dropped = set(unknown) | set(archived)
+        positions = [position for index, position in enumerate(positions) if index not in dropped]
+        rows = [row for index, row in enumerate(rows) if index not in dropped]
+        errors.sort()
+    if not rows:
+        return jsonify(msg='No valid records', errors=record_errors(errors)), 400
+
+    # One executemany INSERT ... ON CONFLICT DO NOTHING RETURNING per chunk,
+    # all inside one transaction; readings already stored are skipped
+    ingest.stamp_receive_time(rows)
+    chunk_size = app.config['TELEMETRY_BULK_CHUNK_SIZE']
+    try:
+        ids = []
+        for start in range(0, len(rows), chunk_size):
+            ids.extend(ingest.insert_rows(rows[start:start + chunk_size]))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(msg=str(e)), 400
+
+    ingest.remember(rows, ids)
+    created_ids = [tid for tid in ids if tid is not None]
+    duplicates = [positions[index] for index, tid in enumerate(ids) if tid is None]
+    if partial:
+        return jsonify(created_ids=created_ids, duplicates=duplicates, rejected=record_errors(errors),
+                       msg='Bulk upload successful'), 201
+    return jsonify(created_ids=created_ids, duplicates=duplicates, msg='Bulk upload successful'), 201
+
+
+def fetch_rows_by_id(ids):
+    """Fetch {id: row dict} for the given IDs with chunked IN (...) SELECTs.
+
+    Rows are returned as plain dicts rather than ORM instances, so set-based
+    writes that follow don't need to reconcile the identity map.
+    """
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return {}
+    chunk_size = app.config['TELEMETRY_BULK_CHUNK_SIZE']
+    rows = {}
+    for entity, filters in telemetry_sources_for_ids(ids):
+        columns = [entity.id, entity.timestamp] + [getattr(entity, f) for f in TELEMETRY_FIELDS]
+        for start in range(0, len(ids), chunk_size):
+            stmt = select(*columns).where(entity.id.in_(ids[start:start + chunk_size]), *filters)
+            for row in db.session.execute(stmt).mappings():
+                rows[row['id']] = dict(row)
+        ids = [tid for tid in ids if tid not in rows]
+        if not ids:
+            break
+    return rows
 
 
 @app.route('/telemetry/bulk', methods=['PUT'])
-@jwt_required()
+@permission_required('update')
 def bulk_update_telemetry():
-    claims = get_jwt()
-    role = claims.get('role')
-    if role != 'admin':
-        return jsonify(msg='Insufficient permissions'), 403
-
     data = request.get_json() or []
     if not isinstance(data, list):
         return jsonify(msg='Payload must be a list of telemetry records with IDs'), 400
 
     try:
         for entry in data:
-            tid = entry.get('id')
-            if not tid:
+            if not isinstance(entry, dict) or not entry.get('id'):
                 return jsonify(msg='Each record must contain an ID'), 400
+        existing = fetch_rows_by_id(int(entry['id']) for entry in data)
 
-            telemetry = Telemetry.query.get(tid)
-            if not telemetry:
-                return jsonify(msg=f'Record with ID {tid} not found'), 404
-
-            if not is_current_quarter(telemetry.timestamp):
-                return jsonify(msg=f'Edits to pre-current quarter records are not allowed (ID: {tid})'), 403
-
-            telemetry.buoy_id = entry.get('buoy_id', telemetry.buoy_id)
-            telemetry.salinity = entry.get('salinity', telemetry.salinity)
-            telemetry.pH = entry.get('pH', telemetry.pH)
-            telemetry.pollutants = entry.get('pollutants', telemetry.pollutants)
-            telemetry.temperature = entry.get('temperature', telemetry.temperature)
-            telemetry.location = entry.get('location', telemetry.location)
-
+        # Walk the payload in order so the first offending ID is reported,
+        # merging repeated IDs the same way sequential ORM updates would.
+        merged = {}
+        for entry in data:
+            tid = int(entry['id'])
+            current = merged.get(tid) or existing.get(tid)
+            if current is None:
+                return jsonify(msg=f"Record with ID {entry['id']} not found"), 404
+            if not is_current_quarter(current['timestamp']):
+                return jsonify(msg=f"Edits to pre-current quarter records are not allowed (ID: {entry['id']})"), 403
+            merged[tid] = {**current, **{f: entry[f] for f in TELEMETRY_FIELDS if f in entry}}
+
+        params = [{'id': tid, **{f: row[f] for f in TELEMETRY_FIELDS}} for tid, row in merged.items()]
+        # ORM bulk UPDATE by primary key: a single executemany
+        db.session.execute(update(Telemetry), params)
+        rollups.refresh([(existing[tid]['buoy_id'], row['timestamp']) for tid, row in merged.items()] +
+                        [(row['buoy_id'], row['timestamp']) for row in merged.values()])
         db.session.commit()
+        cache.invalidate(merged)
+        ingest.forget((existing[tid]['buoy_id'], existing[tid]['timestamp']) for tid in merged)
         return jsonify(msg='Bulk update successful'), 200
     except Exception as e:
         db.session.rollback()
@@ -711,26 +1189,32 @@ def bulk_update_telemetry():
 
 
 @app.route('/telemetry/bulk', methods=['DELETE'])
-@jwt_required()
+@permission_required('delete')
 def bulk_delete_telemetry():
-    claims = get_jwt()
-    role = claims.get('role')
-    if role != 'admin':
-        return jsonify(msg='Insufficient permissions'), 403
-
     body = request.get_json() or {}
     ids = body.get('ids')
     if not isinstance(ids, list):
         return jsonify(msg='Payload must contain a list of IDs'), 400
 
     try:
+        existing = fetch_rows_by_id(int(tid) for tid in ids)
+        # Unknown IDs are skipped; the first closed-quarter ID blocks the batch
         for tid in ids:
-            telemetry = Telemetry.query.get(tid)
-            if telemetry:
-                if not is_current_quarter(telemetry.timestamp):
-                    return jsonify(msg=f'Deletes to pre-current quarter records are not allowed (ID: {tid})'), 403
-                db.session.delete(telemetry)
+            row = existing.get(int(tid))
+            if row and not is_current_quarter(row['timestamp']):
+                return jsonify(msg=f'Deletes to pre-current quarter records are not allowed (ID: {tid})'), 403
+
+        found_ids = list(existing)
+        chunk_size = app.config['TELEMETRY_BULK_CHUNK_SIZE']
+        for start in range(0, len(found_ids), chunk_size):
+            db.session.execute(
+                delete(Telemetry).where(Telemetry.id.in_(found_ids[start:start + chunk_size])),
+                execution_options={'synchronize_session': False}
+            )
+        rollups.refresh([(row['buoy_id'], row['timestamp']) for row in existing.values()])
         db.session.commit()
+        cache.invalidate(found_ids)
+        ingest.forget((row['buoy_id'], row['timestamp']) for row in existing.values())
         return jsonify(msg='Bulk delete successful'), 200
     except Exception as e:
         db.session.rollback()
@@ -757,7 +1241,9 @@ app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 # ---------------------------
 
 if __name__ == '__main__':
-    # Ensure app runs on all interfaces for Docker/WSL and enables debug logs
-    app.run(host='0.0.0.0', port=5030, debug=True)
+    # Development server; FLASK_DEBUG=1 enables the debugger. In production
+    # run `gunicorn -c gunicorn.conf.py wsgi:app` instead.
+    # Ensure app runs on all interfaces for Docker/WSL
+    app.run(host='0.0.0.0', port=5030, debug=app.debug)
 
 
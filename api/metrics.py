@@ -0,0 +1,163 @@
+"""Per-route request metrics in the Prometheus text format, served at /metrics.
+
+For every request this records latency, request and response body sizes,
+and the number and total time of SQL statements it ran (from the engine's
+before/after_cursor_execute events). Statements per request is a histogram,
+so a route whose count grows with its payload, an N+1 pattern, stands out in
+the upper buckets.
+
+Streaming responses are measured up to the point the response is returned;
+their body size and any statements run while streaming are not counted.
+Background work (the ingest writer, spool replay) runs outside a request
+and is not recorded.
+"""
+import bisect
+import threading
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self._series = {}
+
+    def observe(self, label_values, value):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_values, series in sorted(self._series.items()):
+            labels = list(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{_format_labels(labels + [("le", bound)])}}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{_format_labels(labels)}}} {_format_number(series[-1])}')
+            lines.append(f'{self.name}_count{{{_format_labels(labels)}}} {cumulative}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series = {}
+
+    def inc(self, label_values, amount=1):
+        self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self._series.items()):
+            lines.append(f'{self.name}{{{_format_labels(zip(self.label_names, label_values))}}} '
+                         f'{_format_number(value)}')
+        return lines
+
+
+class RequestMetrics:
+    def __init__(self, app):
+        buckets = tuple(app.config['METRICS_LATENCY_BUCKETS'])
+        route = ('method', 'route')
+        self.latency = Histogram('http_request_duration_seconds', 'Time to produce the response.',
+                                 route + ('status',), buckets)
+        self.request_size = Histogram('http_request_size_bytes', 'Request body size.', route, SIZE_BUCKETS)
+        self.response_size = Histogram('http_response_size_bytes', 'Response body size (not streamed).',
+                                       route, SIZE_BUCKETS)
+        self.statements = Histogram('db_statements_per_request', 'SQL statements executed per request.',
+                                    route, STATEMENT_BUCKETS)
+        self.statements_total = Counter('db_statements_total', 'SQL statements executed.', route)
+        self.statement_seconds = Counter('db_statement_duration_seconds_total',
+                                         'Time spent executing SQL statements.', route)
+        self._lock = threading.Lock()
+
+    def record(self, method, route, status, elapsed, request_bytes, response_bytes, statements, sql_seconds):
+        key = (method, route)
+        with self._lock:
+            self.latency.observe(key + (str(status),), elapsed)
+            self.request_size.observe(key, request_bytes)
+            if response_bytes is not None:
+                self.response_size.observe(key, response_bytes)
+            self.statements.observe(key, statements)
+            self.statements_total.inc(key, statements)
+            self.statement_seconds.inc(key, sql_seconds)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.latency, self.request_size, self.response_size,
+                           self.statements, self.statements_total, self.statement_seconds):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _start_request():
+    g._metrics = {'start': time.perf_counter(), 'statements': 0, 'sql_seconds': 0.0}
+
+
+def _finish_request(response):
+    state = g.pop('_metrics', None)
+    rule = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+    if state is None or rule == '/metrics':
+        return response
+    response_bytes = None if response.is_streamed else response.calculate_content_length()
+    current_app.extensions['metrics'].record(
+        request.method, rule, response.status_code, time.perf_counter() - state['start'],
+        request.content_length or 0, response_bytes, state['statements'], state['sql_seconds'])
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    if started is None or not has_request_context():
+        return
+    state = g.get('_metrics')
+    if state is not None:
+        state['statements'] += 1
+        state['sql_seconds'] += time.perf_counter() - started
+
+
+def init_app(app, db):
+    if not app.config['METRICS_ENABLED']:
+        return
+    app.extensions['metrics'] = RequestMetrics(app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(app.extensions['metrics'].render(), mimetype='text/plain; version=0.0.4')
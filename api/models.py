@@ -1,6 +1,12 @@
-from flask_sqlalchemy import SQLAlchemy
+import threading
+import time
+from collections import namedtuple
 from datetime import datetime
 
+from flask import current_app
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import aliased
+
 db = SQLAlchemy()
 
 
@@ -9,7 +15,7 @@ class User(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     role = db.Column(db.String(50), nullable=False, default="user")  # 'admin', 'researcher', 'consumer'
 
@@ -22,6 +28,14 @@ class User(db.Model):
 
 class Telemetry(db.Model):
     __tablename__ = "telemetry"
+    __table_args__ = (
+        # Natural key of a reading: rejects duplicate uploads, and serves
+        # "buoy N between t0 and t1" listings and keyset pagination
+        db.Index("uq_telemetry_buoy_id_timestamp", "buoy_id", "timestamp", unique=True),
+        # Never hand out an id twice: purging the newest rows into an archived
+        # quarter must not let SQLite reuse their ids for new readings
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     buoy_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
@@ -49,5 +63,205 @@ class Telemetry(db.Model):
             "pH": self.pH,
             "pollutants": self.pollutants,
             "location": self.location,
-            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            # Encoded as ISO-8601 by the app's JSON provider
+            "timestamp": self.timestamp,
         }
+
+
+class RollupMixin:
+    """Per-buoy summary of readings in one time bucket.
+
+    Sums are stored rather than averages so buckets can be merged exactly.
+    """
+    buoy_id = db.Column(db.Integer, primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
+
+    salinity_sum = db.Column(db.Float, nullable=False)
+    salinity_min = db.Column(db.Float, nullable=False)
+    salinity_max = db.Column(db.Float, nullable=False)
+    temperature_sum = db.Column(db.Float, nullable=False)
+    temperature_min = db.Column(db.Float, nullable=False)
+    temperature_max = db.Column(db.Float, nullable=False)
+    ph_sum = db.Column(db.Float, nullable=False)
+    ph_min = db.Column(db.Float, nullable=False)
+    ph_max = db.Column(db.Float, nullable=False)
+
+
+class TelemetryHourly(RollupMixin, db.Model):
+    __tablename__ = "telemetry_hourly"
+
+    def __repr__(self):
+        return f"<TelemetryHourly buoy {self.buoy_id} @ {self.bucket_start}>"
+
+
+class TelemetryDaily(RollupMixin, db.Model):
+    __tablename__ = "telemetry_daily"
+
+    def __repr__(self):
+        return f"<TelemetryDaily buoy {self.buoy_id} @ {self.bucket_start}>"
+
+
+class SpoolSegment(db.Model):
+    """A spool segment already loaded into telemetry.
+
+    Written in the same transaction as the segment's rows, so a segment
+    whose file survived a crash after commit is skipped on replay instead
+    of being inserted twice.
+    """
+    __tablename__ = "telemetry_spool_segment"
+
+    name = db.Column(db.String(100), primary_key=True)
+    rows = db.Column(db.Integer, nullable=False)
+    loaded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<SpoolSegment {self.name} ({self.rows} rows)>"
+
+
+class TelemetryPartition(db.Model):
+    """A closed quarter whose readings were moved into their own table.
+
+    `telemetry` keeps the open quarters; see api.partitions for archiving and
+    `telemetry_sources` below for routing queries. Rows stay in `telemetry`
+    too until `purged_at`, so processes still using an older copy of this
+    catalog keep finding them there.
+    """
+    __tablename__ = "telemetry_partition"
+
+    quarter = db.Column(db.String(6), primary_key=True)  # e.g. "2025q3"
+    table_name = db.Column(db.String(64), nullable=False, unique=True)
+    start = db.Column(db.DateTime, nullable=False)
+    end = db.Column(db.DateTime, nullable=False)
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    min_id = db.Column(db.Integer, nullable=True)
+    max_id = db.Column(db.Integer, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    purged_at = db.Column(db.DateTime, nullable=True)
+    # Parquet copy under TELEMETRY_ARCHIVE_DIR, once exported (api.archive)
+    archive_file = db.Column(db.String(255), nullable=True)
+
+    def __repr__(self):
+        return f"<TelemetryPartition {self.quarter} ({self.rows} rows)>"
+
+
+# ---------------------------
+# Quarter partition routing
+# ---------------------------
+
+# Tables of archived quarters, created by api.partitions rather than migrations
+PARTITION_METADATA = db.MetaData()
+PARTITION_TABLE_PREFIX = "telemetry_q_"
+_partition_lock = threading.Lock()
+_partition_entities = {}
+
+Partition = namedtuple("Partition", "quarter entity start end min_id max_id archive_file")
+
+
+def quarter_bounds(ts):
+    """(start, end) of the calendar quarter containing `ts`."""
+    start = datetime(ts.year, 3 * ((ts.month - 1) // 3) + 1, 1)
+    end = datetime(start.year + 1, 1, 1) if start.month == 10 else datetime(start.year, start.month + 3, 1)
+    return start, end
+
+
+def quarter_name(start):
+    return f"{start.year}q{(start.month - 1) // 3 + 1}"
+
+
+def partition_table(quarter):
+    """The Table for an archived quarter's readings: `telemetry`'s columns and indexes."""
+    name = PARTITION_TABLE_PREFIX + quarter
+    with _partition_lock:
+        table = PARTITION_METADATA.tables.get(name)
+        if table is None:
+            table = db.Table(
+                name, PARTITION_METADATA,
+                *(db.Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable)
+                  for c in Telemetry.__table__.columns),
+            )
+            db.Index(f"uq_{name}_buoy_id_timestamp", table.c.buoy_id, table.c.timestamp, unique=True)
+            db.Index(f"ix_{name}_timestamp", table.c.timestamp)
+        return table
+
+
+def partition_entity(quarter):
+    """Telemetry mapped onto a partition table, usable wherever Telemetry is."""
+    entity = _partition_entities.get(quarter)
+    if entity is None:
+        entity = aliased(Telemetry, partition_table(quarter), adapt_on_names=True)
+        _partition_entities[quarter] = entity
+    return entity
+
+
+class PartitionCatalog:
+    """TelemetryPartition rows, re-read at most every `ttl` seconds."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._partitions = ()
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if time.monotonic() >= self._expires:
+                rows = db.session.execute(db.select(TelemetryPartition).order_by(TelemetryPartition.start))
+                self._partitions = tuple(
+                    Partition(p.quarter, partition_entity(p.quarter), p.start, p.end, p.min_id, p.max_id,
+                              p.archive_file)
+                    for p in rows.scalars())
+                self._expires = time.monotonic() + self.ttl
+            return self._partitions
+
+    def invalidate(self):
+        with self._lock:
+            self._expires = 0.0
+
+
+def partition_catalog():
+    extensions = current_app.extensions
+    if "telemetry_partitions" not in extensions:
+        extensions["telemetry_partitions"] = PartitionCatalog(current_app.config["TELEMETRY_PARTITION_CATALOG_TTL"])
+    return extensions["telemetry_partitions"]
+
+
+def archived_until():
+    """End of the newest archived quarter: readings before it are read-only. None if none are."""
+    partitions = partition_catalog().get()
+    return partitions[-1].end if partitions else None
+
+
+def telemetry_sources(since=None, until=None):
+    """(entity, filters) pairs holding the readings in [since, until), oldest first.
+
+    Archived quarters outside the range are pruned. The last pair is always
+    `telemetry` itself, restricted to the quarters that are not archived.
+    Every reading lives in exactly one source, and sources don't overlap in
+    time, so per-source results can be concatenated in order.
+    """
+    partitions = partition_catalog().get()
+    sources = [(p.entity, ()) for p in partitions
+               if (since is None or p.end > since) and (until is None or p.start < until)]
+    if not partitions:
+        return sources + [(Telemetry, ())]
+    boundary = partitions[-1].end
+    if until is None or until > boundary:
+        sources.append((Telemetry, (Telemetry.timestamp >= boundary,)))
+    return sources
+
+
+def telemetry_sources_for_ids(ids):
+    """(entity, filters) pairs that may hold any of `ids`.
+
+    Live rows in `telemetry` come first, then the archived quarters whose id
+    range covers one of `ids`, newest first; callers can stop as soon as
+    every id has been found.
+    """
+    partitions = partition_catalog().get()
+    if not partitions:
+        return [(Telemetry, ())]
+    sources = [(Telemetry, (Telemetry.timestamp >= partitions[-1].end,))]
+    sources += [(p.entity, ()) for p in reversed(partitions)
+                if p.min_id is not None and any(p.min_id <= tid <= p.max_id for tid in ids)]
+    return sources
@@ -0,0 +1,140 @@
+"""Archiving closed quarters of telemetry into per-quarter tables.
+
+`telemetry` holds the quarters still open to writes. Older quarters are
+moved into a table of their own (`telemetry_q_2025q1`, ...) and listed in
+`telemetry_partition`; reads go through api.models.telemetry_sources, which
+skips the quarters outside a query's time range, so range scans, index
+sizes and VACUUM/autovacuum on `telemetry` only ever cover recent data.
+Archived quarters are read-only: edits, deletes and new readings with a
+timestamp in them are refused.
+
+Archiving runs in two phases so that processes holding an older copy of the
+catalog (TELEMETRY_PARTITION_CATALOG_TTL) never miss a reading:
+
+1. archive: copy the quarter into its table, sorted by (buoy_id, timestamp)
+   and indexed after the load, and register it. Rows stay in `telemetry`.
+2. purge, once `purge_delay` seconds have passed: copy any readings that
+   processes with the old catalog inserted meanwhile, then delete the
+   quarter from `telemetry`.
+"""
+import datetime
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
+from api.models import (db, Telemetry, TelemetryPartition, archived_until, partition_catalog,
+                        partition_table, quarter_bounds, quarter_name)
+
+
+def _columns(table):
+    return [column.name for column in table.columns]
+
+
+def _hot_rows(start, end):
+    hot = Telemetry.__table__
+    return (select(*hot.columns)
+            .where(hot.c.timestamp >= start, hot.c.timestamp < end)
+            .order_by(hot.c.buoy_id, hot.c.timestamp))
+
+
+def _stats(table):
+    count, min_id, max_id = db.session.execute(
+        select(func.count(), func.min(table.c.id), func.max(table.c.id))).one()
+    return {'rows': count, 'min_id': min_id, 'max_id': max_id}
+
+
+def quarters_to_archive(keep, now=None):
+    """(start, end) of the quarters in `telemetry` that are due for archiving, oldest first.
+
+    The newest `keep` quarters, counting the current one, stay in `telemetry`.
+    """
+    cutoff, _ = quarter_bounds(now or datetime.datetime.utcnow())
+    for _ in range(keep - 1):
+        cutoff, _ = quarter_bounds(cutoff - datetime.timedelta(days=1))
+    boundary = archived_until()
+    oldest = select(func.min(Telemetry.timestamp)).where(Telemetry.timestamp < cutoff)
+    if boundary is not None:
+        oldest = oldest.where(Telemetry.timestamp >= boundary)
+    oldest = db.session.execute(oldest).scalar()
+    quarters = []
+    start = quarter_bounds(oldest)[0] if oldest is not None else cutoff
+    # Archived quarters stay contiguous, so an empty quarter in between is archived too
+    if boundary is not None:
+        start = min(start, boundary)
+    while start < cutoff:
+        quarters.append(quarter_bounds(start))
+        start = quarters[-1][1]
+    return quarters
+
+
+def archive_quarter(start, end):
+    """Copy one quarter into its own table and register it. The caller commits."""
+    quarter = quarter_name(start)
+    table = partition_table(quarter)
+    db.session.execute(CreateTable(table))
+    db.session.execute(insert(table).from_select(_columns(table), _hot_rows(start, end)))
+    # Built after the load, over sorted rows: compact, and much faster than row by row
+    for index in table.indexes:
+        index.create(db.session.connection())
+    db.session.execute(text(f'ANALYZE {table.name}'))
+    partition = TelemetryPartition(quarter=quarter, table_name=table.name, start=start, end=end,
+                                   archived_at=datetime.datetime.utcnow(), **_stats(table))
+    db.session.add(partition)
+    return partition
+
+
+def purge_quarter(partition):
+    """Move late readings into an archived quarter's table and drop the quarter from `telemetry`.
+
+    The caller commits.
+    """
+    table = partition_table(partition.quarter)
+    if db.engine.dialect.name == 'sqlite':
+        stmt = sqlite.insert(table)
+    else:
+        stmt = postgresql.insert(table)
+    stmt = stmt.from_select(_columns(table), _hot_rows(partition.start, partition.end))
+    db.session.execute(stmt.on_conflict_do_nothing(index_elements=['buoy_id', 'timestamp']))
+    db.session.execute(delete(Telemetry).where(Telemetry.timestamp >= partition.start,
+                                               Telemetry.timestamp < partition.end),
+                       execution_options={'synchronize_session': False})
+    for key, value in _stats(table).items():
+        setattr(partition, key, value)
+    partition.purged_at = datetime.datetime.utcnow()
+
+
+def run(keep, purge_delay, now=None):
+    """Archive due quarters and purge those archived at least `purge_delay` seconds ago.
+
+    Each quarter is committed on its own. Returns (archived, purged) lists of
+    TelemetryPartition rows.
+    """
+    now = now or datetime.datetime.utcnow()
+    partition_catalog().invalidate()
+    archived = []
+    for start, end in quarters_to_archive(keep, now):
+        archived.append(archive_quarter(start, end))
+        db.session.commit()
+    partition_catalog().invalidate()
+
+    purged = []
+    due = datetime.datetime.utcnow() - datetime.timedelta(seconds=purge_delay)
+    for partition in db.session.execute(
+            select(TelemetryPartition)
+            .where(TelemetryPartition.purged_at.is_(None), TelemetryPartition.archived_at <= due)
+            .order_by(TelemetryPartition.start)).scalars().all():
+        purge_quarter(partition)
+        db.session.commit()
+        purged.append(partition)
+    partition_catalog().invalidate()
+    return archived, purged
+
+
+def vacuum():
+    """Return the space freed by purged quarters to the OS (SQLite only; autovacuum does this elsewhere)."""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.exec_driver_sql('VACUUM')
+    return True
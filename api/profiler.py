@@ -0,0 +1,147 @@
+"""Opt-in sampling profiler for slow requests.
+
+With PROFILE_REQUESTS enabled, a background thread snapshots the stack of
+every thread that is serving a request every PROFILE_INTERVAL_MS. Only
+sys._current_frames() runs per tick, so requests pay next to nothing for
+being watched. When a request finishes, its samples are written out if it
+took at least PROFILE_SLOW_MS, or if it falls in the PROFILE_SAMPLE_RATE
+fraction of requests; otherwise they are dropped.
+
+Dumps are collapsed-stack files (one "frame;frame;...;leaf count" line per
+distinct stack, readable by flamegraph.pl and speedscope) named after the
+route and the request ID. The request ID comes from the X-Request-ID header
+or is generated, and is echoed back in the response. `python manage.py
+profile-summary` ranks the hottest functions across all dumps.
+"""
+import glob
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import current_app, g, request
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def collapse(frame):
+    """Render a frame's stack root-first as "outer;...;inner"."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class Sampler:
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}  # thread id -> Counter of collapsed stacks
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def begin(self):
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+
+    def end(self):
+        with self._lock:
+            return self._active.pop(threading.get_ident(), Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[collapse(frame)] += 1
+
+
+def _slug(rule):
+    return re.sub(r'[^A-Za-z0-9]+', '_', rule).strip('_') or 'root'
+
+
+def _start_request():
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    g._profile_start = time.perf_counter()
+    current_app.extensions['profiler'].begin()
+
+
+def _finish_request(response):
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+
+def _dump_if_wanted(exc):
+    app = current_app
+    start = g.pop('_profile_start', None)
+    if start is None:
+        return
+    samples = app.extensions['profiler'].end()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if not samples:
+        return
+    if elapsed_ms < app.config['PROFILE_SLOW_MS'] and random.random() >= app.config['PROFILE_SAMPLE_RATE']:
+        return
+    rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    directory = app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{request.method}_{_slug(rule)}-{_slug(g.request_id)}.collapsed')
+    with open(path, 'w') as f:
+        for stack, count in samples.most_common():
+            f.write(f'{stack} {count}\n')
+    app.logger.info('Profiled %s %s in %.0f ms -> %s', request.method, rule, elapsed_ms, path)
+
+
+def read_collapsed(path):
+    with open(path) as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                yield stack.split(';'), int(count)
+
+
+def summarize(directory, top=20):
+    """Rank functions across all dumps in `directory`.
+
+    Returns (dumps, total samples, [(function, self samples, total samples)])
+    ordered by self samples: time spent in the function itself, excluding
+    what it called. Total samples count time on the stack at all.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, '*.collapsed')))
+    self_counts, total_counts, samples = Counter(), Counter(), 0
+    for path in paths:
+        for frames, count in read_collapsed(path):
+            samples += count
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+    ranked = [(frame, count, total_counts[frame]) for frame, count in self_counts.most_common(top)]
+    return len(paths), samples, ranked
+
+
+def init_app(app):
+    if not app.config['PROFILE_REQUESTS']:
+        return
+    sampler = Sampler(app.config['PROFILE_INTERVAL_MS'] / 1000)
+    app.extensions['profiler'] = sampler
+    sampler.start()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_dump_if_wanted)
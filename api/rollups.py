@@ -0,0 +1,187 @@
+"""Hourly and daily per-buoy telemetry rollups.
+
+The rollup tables are kept in step with `telemetry` inside the transaction
+of the write that changed it:
+
+* new readings are folded in with one upsert per table (counts and sums
+  add up, min/max widen);
+* updates and deletes can't be folded out of a min/max, so the buckets they
+  touched are recomputed from the raw rows in a few set-based statements.
+
+`rebuild()` recomputes everything and backs the `rebuild-rollups` command.
+"""
+import datetime
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from api.models import db, telemetry_sources, Telemetry, TelemetryHourly, TelemetryDaily
+
+BUCKET_FORMATS = {
+    'minute': '%Y-%m-%dT%H:%M:00',
+    'hour': '%Y-%m-%dT%H:00:00',
+    'day': '%Y-%m-%dT00:00:00',
+}
+ROLLUP_MODELS = {'hour': TelemetryHourly, 'day': TelemetryDaily}
+# Rollup column prefix -> Telemetry attribute
+METRICS = {'salinity': 'salinity', 'temperature': 'temperature', 'ph': 'pH'}
+KEY_CHUNK_SIZE = 500
+
+
+def enabled():
+    return current_app.config['TELEMETRY_ROLLUPS_ENABLED']
+
+
+def time_bucket(bucket, column):
+    """SQL expression truncating `column` to the start of its bucket."""
+    if db.engine.dialect.name == 'sqlite':
+        return func.strftime(BUCKET_FORMATS[bucket], column)
+    return func.date_trunc(bucket, column)
+
+
+def bucket_start(ts, bucket):
+    if bucket == 'day':
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'hour':
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(second=0, microsecond=0)
+
+
+def is_aligned(ts, bucket):
+    return ts is None or bucket_start(ts, bucket) == ts
+
+
+def _as_datetime(value):
+    # strftime() yields strings on SQLite, date_trunc() datetimes elsewhere
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(value)
+
+
+def _fold_readings(readings, bucket):
+    """Summarise reading dicts into one rollup row per (buoy_id, bucket)."""
+    rows = {}
+    for reading in readings:
+        key = (reading['buoy_id'], bucket_start(reading['timestamp'], bucket))
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = {'buoy_id': key[0], 'bucket_start': key[1], 'count': 0}
+            for prefix, attr in METRICS.items():
+                row[f'{prefix}_sum'] = 0.0
+                row[f'{prefix}_min'] = row[f'{prefix}_max'] = reading[attr]
+        row['count'] += 1
+        for prefix, attr in METRICS.items():
+            value = reading[attr]
+            row[f'{prefix}_sum'] += value
+            row[f'{prefix}_min'] = min(row[f'{prefix}_min'], value)
+            row[f'{prefix}_max'] = max(row[f'{prefix}_max'], value)
+    return list(rows.values())
+
+
+def _upsert(model):
+    table = model.__table__
+    if db.engine.dialect.name == 'sqlite':
+        stmt, least, greatest = sqlite.insert(table), func.min, func.max
+    else:
+        stmt, least, greatest = postgresql.insert(table), func.least, func.greatest
+    excluded = stmt.excluded
+    set_ = {'count': table.c.count + excluded.count}
+    for prefix in METRICS:
+        set_[f'{prefix}_sum'] = table.c[f'{prefix}_sum'] + excluded[f'{prefix}_sum']
+        set_[f'{prefix}_min'] = least(table.c[f'{prefix}_min'], excluded[f'{prefix}_min'])
+        set_[f'{prefix}_max'] = greatest(table.c[f'{prefix}_max'], excluded[f'{prefix}_max'])
+    return stmt.on_conflict_do_update(index_elements=['buoy_id', 'bucket_start'], set_=set_)
+
+
+def record_inserts(readings):
+    """Fold newly inserted readings (dicts with buoy_id, timestamp, metrics) into the rollups."""
+    if not enabled() or not readings:
+        return
+    for bucket, model in ROLLUP_MODELS.items():
+        db.session.execute(_upsert(model), _fold_readings(readings, bucket))
+
+
+def _raw_summary(entity, *where):
+    """Hourly summaries computed from raw telemetry rows of `entity` (Telemetry or an archived quarter)."""
+    hour = time_bucket('hour', entity.timestamp)
+    columns = [entity.buoy_id, hour.label('bucket_start'), func.count(entity.id).label('count')]
+    for prefix, attr in METRICS.items():
+        column = getattr(entity, attr)
+        columns += [func.sum(column).label(f'{prefix}_sum'),
+                    func.min(column).label(f'{prefix}_min'),
+                    func.max(column).label(f'{prefix}_max')]
+    return select(*columns).where(*where).group_by(entity.buoy_id, hour)
+
+
+def _hourly_summary(*where):
+    """Daily summaries merged from hourly rollup rows."""
+    day = time_bucket('day', TelemetryHourly.bucket_start)
+    columns = [TelemetryHourly.buoy_id, day.label('bucket_start'),
+               func.sum(TelemetryHourly.count).label('count')]
+    for prefix in METRICS:
+        columns += [func.sum(getattr(TelemetryHourly, f'{prefix}_sum')).label(f'{prefix}_sum'),
+                    func.min(getattr(TelemetryHourly, f'{prefix}_min')).label(f'{prefix}_min'),
+                    func.max(getattr(TelemetryHourly, f'{prefix}_max')).label(f'{prefix}_max')]
+    return select(*columns).where(*where).group_by(TelemetryHourly.buoy_id, day)
+
+
+def _summary_rows(stmt):
+    for row in db.session.execute(stmt).mappings():
+        row = dict(row)
+        row['bucket_start'] = _as_datetime(row['bucket_start'])
+        yield row
+
+
+def _replace(model, keys, summary):
+    """Swap the rollup rows for `keys` with freshly computed ones from `summary`."""
+    keys = list(keys)
+    buoys = {buoy_id for buoy_id, _ in keys}
+    start = min(ts for _, ts in keys)
+    end = max(ts for _, ts in keys) + (datetime.timedelta(days=1) if model is TelemetryDaily
+                                       else datetime.timedelta(hours=1))
+    wanted = set(keys)
+    rows = [row for row in summary(buoys, start, end)
+            if (row['buoy_id'], row['bucket_start']) in wanted]
+
+    for offset in range(0, len(keys), KEY_CHUNK_SIZE):
+        chunk = keys[offset:offset + KEY_CHUNK_SIZE]
+        db.session.execute(delete(model).where(tuple_(model.buoy_id, model.bucket_start).in_(chunk)))
+    if rows:
+        db.session.execute(insert(model), rows)
+
+
+def refresh(readings):
+    """Recompute the hour and day buckets containing `readings`.
+
+    `readings` are (buoy_id, timestamp) pairs for rows that were updated or
+    deleted; pass both the old and new buoy_id when it changed.
+    """
+    if not enabled():
+        return
+    hours = {(buoy_id, bucket_start(ts, 'hour')) for buoy_id, ts in readings}
+    if not hours:
+        return
+    db.session.flush()
+    # Only current-quarter readings change, and those are never archived
+    _replace(TelemetryHourly, hours, lambda buoys, start, end: _summary_rows(_raw_summary(
+        Telemetry, Telemetry.buoy_id.in_(buoys), Telemetry.timestamp >= start, Telemetry.timestamp < end)))
+    days = {(buoy_id, bucket_start(hour, 'day')) for buoy_id, hour in hours}
+    _replace(TelemetryDaily, days, lambda buoys, start, end: _summary_rows(_hourly_summary(
+        TelemetryHourly.buoy_id.in_(buoys), TelemetryHourly.bucket_start >= start,
+        TelemetryHourly.bucket_start < end)))
+
+
+def rebuild():
+    """Recompute both rollup tables from scratch. Returns (hourly, daily) row counts."""
+    db.session.execute(delete(TelemetryDaily))
+    db.session.execute(delete(TelemetryHourly))
+    counts = []
+    # Hours never span quarters, so each table's summaries are complete on their own
+    hourly = [_raw_summary(entity, *filters) for entity, filters in telemetry_sources()]
+    for model, statements in ((TelemetryHourly, hourly), (TelemetryDaily, [_hourly_summary()])):
+        rows = [row for stmt in statements for row in _summary_rows(stmt)]
+        for offset in range(0, len(rows), KEY_CHUNK_SIZE):
+            db.session.execute(insert(model), rows[offset:offset + KEY_CHUNK_SIZE])
+        counts.append(len(rows))
+    return tuple(counts)
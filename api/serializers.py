@@ -0,0 +1,42 @@
+"""Per-role telemetry serializers, built once at import.
+
+Each serializer knows the columns a role may read, so handlers can select
+exactly those columns in SQL and turn result rows straight into dicts,
+instead of loading whole ORM objects, calling to_dict() and filtering.
+"""
+from api.models import Telemetry
+
+# Every serializer by projection, e.g. for cache invalidation across roles
+REGISTRY = {}
+
+# Field order of serialized rows and CSV exports
+TELEMETRY_COLUMNS = ('id', 'buoy_id', 'timestamp', 'salinity', 'temperature', 'pH', 'pollutants', 'location')
+
+
+class TelemetrySerializer:
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.columns = tuple(getattr(Telemetry, f) for f in self.fields)
+        self.projection = ','.join(self.fields)
+        self._entity_columns = {Telemetry: self.columns}
+        REGISTRY[self.projection] = self
+
+    def columns_for(self, entity):
+        """self.columns on another table with Telemetry's columns, e.g. an archived quarter's."""
+        columns = self._entity_columns.get(entity)
+        if columns is None:
+            columns = self._entity_columns[entity] = tuple(getattr(entity, f) for f in self.fields)
+        return columns
+
+    def row(self, row):
+        """Map a result row whose leading values follow self.columns.
+
+        Datetimes are left as-is; the app's JSON provider encodes them.
+        """
+        return dict(zip(self.fields, row))
+
+    def rows(self, rows):
+        return [self.row(row) for row in rows]
+
+
+FULL = TelemetrySerializer(TELEMETRY_COLUMNS)
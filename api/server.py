@@ -0,0 +1,52 @@
+"""Process model for serving the API in production (gunicorn.conf.py).
+
+The app runs in SERVER_WORKERS processes with SERVER_THREADS request threads
+each (gunicorn's gthread worker). SERVER_WORKERS=0 sizes the pool from the
+CPUs this process may use, as 2 x CPUs + 1: requests spend part of their time
+waiting on the database, so a few more workers than cores keeps the CPUs
+busy. Spool ingest needs one spool directory per process, so it runs with a
+single worker and without SERVER_PRELOAD.
+
+With SERVER_PRELOAD the app is imported once in the master and the workers
+are forked from it: faster worker startup and shared memory, but a graceful
+reload (SIGHUP) then restarts workers on the code the master loaded, so
+deploys need a full restart. Threads and pooled database connections don't
+survive the fork; `after_fork` replaces them in each worker.
+"""
+import os
+
+from api import ingest, profiler
+from api.models import db
+
+
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))  # respects CPU pinning and container limits
+    return os.cpu_count() or 1
+
+
+def worker_count(config):
+    spool = config['TELEMETRY_INGEST_MODE'] == 'spool'
+    workers = config['SERVER_WORKERS'] or (1 if spool else 2 * available_cpus() + 1)
+    if spool and workers > 1:
+        raise ValueError('TELEMETRY_INGEST_MODE=spool needs SERVER_WORKERS=1 '
+                         '(each process needs its own spool directory)')
+    if spool and config['SERVER_PRELOAD']:
+        # The master would keep replaying the spool alongside its worker
+        raise ValueError('TELEMETRY_INGEST_MODE=spool does not work with SERVER_PRELOAD '
+                         '(each process needs its own spool directory)')
+    return workers
+
+
+def after_fork(app):
+    """Give a worker forked from a preloaded master its own connections and threads."""
+    with app.app_context():
+        # Leave the master's connections open for it; this process opens its own
+        db.engine.dispose(close=False)
+    # The master's ingest writer and sampler threads are gone, and their queues
+    # and locks may still be marked as waited on or held; build fresh ones
+    ingest.init_app(app)
+    sampler = app.extensions.get('profiler')
+    if sampler is not None:
+        app.extensions['profiler'] = profiler.Sampler(sampler.interval)
+        app.extensions['profiler'].start()
@@ -0,0 +1,297 @@
+"""Durable spool for telemetry that has been accepted but not yet committed.
+
+With TELEMETRY_INGEST_MODE=spool, POST /telemetry appends the validated
+reading to an append-only file in TELEMETRY_SPOOL_DIR and answers 202 once
+the record is fsynced. Concurrent requests share fsyncs (group commit): one
+thread syncs while the others wait, then every record written before that
+sync is durable. Ingest latency is one append plus a shared fsync, not a
+database commit.
+
+A replayer thread periodically rotates the spool into a uniquely named
+segment and loads it into `telemetry` in one transaction, then deletes the
+segment. The segment name is recorded in telemetry_spool_segment in that
+same transaction, so a segment that survives a crash after commit is
+skipped rather than loaded twice. Leftover spool files are replayed at
+startup. Each process needs its own spool directory.
+
+A reading the database rejects doesn't hold up the spool: the failing
+readings of a segment are found by bisecting with trial inserts that are
+rolled back. They are appended with their error to rejected.jsonl in the
+spool directory and counted as failed, and the rest of the segment loads
+as usual. Errors that say nothing about the data (OperationalError, e.g.
+a locked or unavailable database) leave the segment to be retried, and
+the segments after it are still loaded.
+
+Each record is a 4-byte big-endian payload length, a 4-byte CRC32 of the
+payload and the JSON payload. A torn record at the tail (a crash mid-append,
+which was never acknowledged) ends the replay of that file.
+"""
+import datetime
+import glob
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+
+from sqlalchemy import delete
+from sqlalchemy.exc import OperationalError
+
+from api import ingest
+from api.models import db, SpoolSegment
+
+HEADER = struct.Struct('>II')
+ACTIVE_NAME = 'telemetry.spool'
+REJECTED_NAME = 'rejected.jsonl'
+SEGMENT_SUFFIX = '.segment'
+
+
+def _to_json(row):
+    return json.dumps({**row, 'timestamp': row['timestamp'].isoformat()}, separators=(',', ':'))
+
+
+def encode_record(row):
+    payload = _to_json(row).encode()
+    return HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path):
+    """Yield the rows in a spool file, stopping at a torn or corrupt tail."""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            length, crc = HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            row = json.loads(payload)
+            row['timestamp'] = datetime.datetime.fromisoformat(row['timestamp'])
+            yield row
+
+
+def _fsync_directory(path):
+    """Make a rename durable; not possible (or needed) on Windows."""
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class Spool:
+    """Same interface as api.ingest.IngestQueue, backed by an fsynced file."""
+
+    def __init__(self, app):
+        self.app = app
+        self.directory = app.config['TELEMETRY_SPOOL_DIR']
+        self.capacity = app.config['TELEMETRY_SPOOL_MAX_BYTES']
+        self.batch_size = app.config['TELEMETRY_SPOOL_BATCH_SIZE']
+        self.replay_interval = app.config['TELEMETRY_SPOOL_REPLAY_INTERVAL']
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, ACTIVE_NAME)
+
+        self._lock = threading.Lock()       # appends, rotation, counters
+        self._sync_lock = threading.Lock()  # one fsync at a time; taken before _lock
+        self._replay_lock = threading.Lock()
+        self._file = open(self.path, 'ab')
+        self._appended = 0  # records appended (sequence number)
+        self._synced = 0    # records covered by an fsync
+        self._pending_records = 0
+        self._pending_bytes = sum(os.path.getsize(p) for p in self._files())
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.stats = {'accepted': 0, 'rejected': 0, 'written': 0, 'duplicates': 0, 'failed': 0,
+                      'fsyncs': 0, 'segments': 0}
+        self.last_error = None
+
+    def _files(self):
+        return sorted(glob.glob(os.path.join(self.directory, '*' + SEGMENT_SUFFIX))) + [self.path]
+
+    def start(self):
+        """Replay whatever a previous process left behind, then start the replayer."""
+        try:
+            self.flush()
+            self._prune_checkpoints()
+        except Exception:
+            # e.g. tables not migrated yet; the replayer thread keeps retrying
+            self.app.logger.exception('Replaying the telemetry spool at startup failed')
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='telemetry-spool', daemon=True)
+                self._thread.start()
+
+    def submit(self, row):
+        """Append a validated row and return once it is fsynced; False if the spool is full."""
+        record = encode_record(row)
+        with self._lock:
+            if self._pending_bytes + len(record) > self.capacity:
+                self.stats['rejected'] += 1
+                return False
+            self._file.write(record)
+            self._file.flush()
+            self._appended += 1
+            seq = self._appended
+            self._pending_records += 1
+            self._pending_bytes += len(record)
+            self.stats['accepted'] += 1
+            wake = self._pending_records >= self.batch_size
+        self._sync(seq)
+        if wake:
+            self._wake.set()
+        return True
+
+    def _sync(self, seq):
+        with self._sync_lock:
+            if self._synced >= seq:
+                return  # another thread's fsync already covered this record
+            with self._lock:
+                target = self._appended
+                fileno = self._file.fileno()
+            os.fsync(fileno)
+            self._synced = target
+            with self._lock:
+                self.stats['fsyncs'] += 1
+
+    def _rotate(self):
+        """Move the active spool aside as a new segment; returns False if it was empty."""
+        with self._sync_lock, self._lock:
+            if self._file.tell() == 0:
+                return False
+            os.fsync(self._file.fileno())
+            self._synced = self._appended
+            self._file.close()
+            name = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}{SEGMENT_SUFFIX}'
+            os.replace(self.path, os.path.join(self.directory, name))
+            self._file = open(self.path, 'ab')
+            self._pending_records = 0
+        _fsync_directory(self.directory)
+        return True
+
+    def _insert(self, rows):
+        ids = []
+        for start in range(0, len(rows), self.batch_size):
+            ids.extend(ingest.insert_rows(rows[start:start + self.batch_size]))
+        return ids
+
+    def _rejected_rows(self, rows):
+        """[(row, exception)] for the rows that fail to insert on their own.
+
+        Bisects with trial inserts that are always rolled back.
+        """
+        try:
+            self._insert(rows)
+            return []
+        except OperationalError:
+            raise
+        except Exception as e:
+            if len(rows) == 1:
+                return [(rows[0], e)]
+        finally:
+            db.session.rollback()
+        middle = len(rows) // 2
+        return self._rejected_rows(rows[:middle]) + self._rejected_rows(rows[middle:])
+
+    def _set_aside(self, segment, rejected):
+        with open(os.path.join(self.directory, REJECTED_NAME), 'a', encoding='utf-8') as f:
+            for row, e in rejected:
+                f.write(f'{{"segment":{json.dumps(segment)},"error":{json.dumps(str(e))},'
+                        f'"reading":{_to_json(row)}}}\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _load_segment(self, path):
+        name = os.path.basename(path)
+        size = os.path.getsize(path)
+        with self.app.app_context():
+            if db.session.get(SpoolSegment, name) is None:
+                rows, rejected = list(read_records(path)), []
+                try:
+                    ids = self._insert(rows)
+                except OperationalError:
+                    raise
+                except Exception:
+                    db.session.rollback()
+                    rejected = self._rejected_rows(rows)
+                    # Written before the commit: a crash in between may list a reading twice, never lose it
+                    self._set_aside(name, rejected)
+                    bad = {id(row) for row, _ in rejected}
+                    rows = [row for row in rows if id(row) not in bad]
+                    ids = self._insert(rows)
+                db.session.add(SpoolSegment(name=name, rows=len(rows)))
+                db.session.commit()
+                ingest.remember(rows, ids)
+                written = sum(tid is not None for tid in ids)
+                with self._lock:
+                    self.stats['written'] += written
+                    self.stats['duplicates'] += len(rows) - written
+                    self.stats['failed'] += len(rejected)
+                    self.stats['segments'] += 1
+                    if rejected:
+                        self.last_error = str(rejected[-1][1])
+        os.remove(path)
+        with self._lock:
+            self._pending_bytes -= size
+
+    def flush(self):
+        """Load everything spooled so far into the database.
+
+        A segment that can't be loaded stays spooled for the next flush;
+        the first such error is raised once the other segments are loaded.
+        """
+        with self._replay_lock:
+            self._rotate()
+            error = None
+            for path in self._files()[:-1]:
+                try:
+                    self._load_segment(path)
+                except Exception as e:
+                    # The failed transaction was rolled back with its app context
+                    with self._lock:
+                        self.last_error = str(e)
+                    error = error or e
+            if error is not None:
+                raise error
+
+    def _prune_checkpoints(self):
+        """Forget replayed segments whose files are gone; only leftovers need their marker."""
+        names = [os.path.basename(p) for p in self._files()[:-1]]
+        with self.app.app_context():
+            db.session.execute(delete(SpoolSegment).where(SpoolSegment.name.notin_(names)))
+            db.session.commit()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.replay_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception('Telemetry spool replay failed; will retry')
+
+    def stop(self, timeout=None):
+        """Stop the replayer and load what is left; anything that fails stays spooled."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.flush()
+        except Exception:
+            self.app.logger.exception('Telemetry spool replay at shutdown failed; will replay at startup')
+        with self._lock:
+            self._file.close()
+
+    def status(self):
+        with self._lock:
+            stats = dict(self.stats)
+            depth, size = self._pending_records, self._pending_bytes
+        return {'queue_depth': depth, 'pending_bytes': size, 'capacity_bytes': self.capacity,
+                'writer_alive': self._thread is not None and self._thread.is_alive(),
+                'last_error': self.last_error, **stats}
+
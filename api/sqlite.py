@@ -0,0 +1,35 @@
+"""SQLite performance profile, applied to every new DBAPI connection.
+
+With the default rollback journal a writer locks the whole file, so readers
+queue behind ingest and concurrent writers fail with "database is locked".
+WAL lets readers proceed alongside one writer, synchronous=NORMAL drops the
+fsync on every commit (WAL stays consistent; only the last transactions can
+be lost on power failure), busy_timeout makes writers wait for the lock
+instead of failing, and mmap_size / cache_size keep hot pages in memory.
+"""
+from sqlalchemy import event
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """Run the pragmas in order; Config lists journal_mode first since it affects the rest."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name in pragmas:
+            cursor.execute(f'PRAGMA {name}={pragmas[name]}')
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine, pragmas):
+    """Run `pragmas` on each new connection of a SQLite engine; other dialects are left alone."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+
+def init_app(app, db):
+    with app.app_context():
+        configure_engine(db.engine, app.config['SQLITE_PRAGMAS'])
@@ -0,0 +1,158 @@
+"""In-process cache of user existence, id and role.
+
+register, login and /refresh look users up here before going to the
+database, and ingest can check buoy_ids against it in bulk: `missing_ids`
+runs one IN (...) query for the IDs it hasn't seen yet and none once they
+are cached. Lookups that find nobody are cached as well (for
+USER_CACHE_NEGATIVE_TTL seconds), so a burst of logins for unknown usernames
+costs a dict lookup each instead of a query.
+
+Entries for users inserted, updated or deleted through the ORM are dropped
+when the transaction commits. Changes made by other processes show up once
+an entry expires (USER_CACHE_TTL).
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from itertools import chain
+
+from flask import current_app
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from api.models import db, User
+
+UserInfo = namedtuple('UserInfo', 'id username role')
+ID_CHUNK_SIZE = 500
+
+
+class UserCache:
+    """Thread-safe LRU of ('id', id) / ('username', name) -> UserInfo, or None for no such user."""
+
+    def __init__(self, maxsize, ttl, negative_ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (hit, UserInfo or None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            info, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, info
+
+    def put_many(self, mapping):
+        if not self.maxsize:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for key, info in mapping.items():
+                self._entries[key] = (info, now + (self.ttl if info is not None else self.negative_ttl))
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _cache():
+    return current_app.extensions['user_cache']
+
+
+def _entries(info):
+    return {('id', info.id): info, ('username', info.username): info}
+
+
+def _lookup(key, where):
+    hit, info = _cache().get(key)
+    if hit:
+        return info
+    row = db.session.execute(select(User.id, User.username, User.role).where(where)).first()
+    info = UserInfo(*row) if row is not None else None
+    _cache().put_many(_entries(info) if info is not None else {key: None})
+    return info
+
+
+def by_username(username):
+    """UserInfo for `username`, or None if there is no such user."""
+    return _lookup(('username', username), User.username == username)
+
+
+def by_id(user_id):
+    """UserInfo for `user_id`, or None if there is no such user."""
+    return _lookup(('id', user_id), User.id == user_id)
+
+
+def missing_ids(ids):
+    """Return the subset of `ids` that are not registered users."""
+    cache = _cache()
+    missing, unknown = set(), []
+    for user_id in set(ids):
+        hit, info = cache.get(('id', user_id))
+        if not hit:
+            unknown.append(user_id)
+        elif info is None:
+            missing.add(user_id)
+
+    entries = {}
+    for start in range(0, len(unknown), ID_CHUNK_SIZE):
+        chunk = unknown[start:start + ID_CHUNK_SIZE]
+        for row in db.session.execute(select(User.id, User.username, User.role).where(User.id.in_(chunk))):
+            entries.update(_entries(UserInfo(*row)))
+    for user_id in unknown:
+        if ('id', user_id) not in entries:
+            entries[('id', user_id)] = None
+            missing.add(user_id)
+    cache.put_many(entries)
+    return missing
+
+
+def clear():
+    _cache().clear()
+
+
+def _changed_keys(user):
+    keys = set()
+    if user.id is not None:
+        keys.add(('id', user.id))
+    history = inspect(user).attrs.username.history
+    for username in chain(history.added, history.unchanged, history.deleted, [user.username]):
+        keys.add(('username', username))
+    return keys
+
+
+def init_app(app):
+    cache = UserCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'],
+                      app.config['USER_CACHE_NEGATIVE_TTL'])
+    app.extensions['user_cache'] = cache
+
+    # Collect the users each flush touched; drop them from the cache only once
+    # the transaction commits, so no other request can re-cache the old state
+    @event.listens_for(Session, 'after_flush')
+    def collect_changed_users(session, flush_context):
+        for obj in chain(session.new, session.dirty, session.deleted):
+            if isinstance(obj, User):
+                session.info.setdefault('changed_user_keys', set()).update(_changed_keys(obj))
+
+    @event.listens_for(Session, 'after_commit')
+    def forget_changed_users(session):
+        cache.discard_many(session.info.pop('changed_user_keys', ()))
+
+    @event.listens_for(Session, 'after_soft_rollback')
+    def discard_changed_users(session, previous_transaction):
+        session.info.pop('changed_user_keys', None)
@@ -0,0 +1,228 @@
+"""Validation of telemetry ingest records.
+
+`validate_record` checks one reading (POST /telemetry). `validate_batch`
+checks a whole bulk upload and reports every invalid record, not just the
+first. With NumPy installed it works column-wise: each required field is
+pulled out of the payload once, and the type, NaN/infinity and range checks
+run as array operations over all records at once. Without NumPy, or with
+TELEMETRY_BATCH_VALIDATOR="python", it runs `validate_record` per record;
+both report the same problems.
+
+Value limits come from Config.TELEMETRY_VALUE_RANGES.
+"""
+import datetime
+
+from flask import current_app
+
+try:
+    import numpy
+except ImportError:  # optional dependency
+    numpy = None
+
+# Fields accepted on ingest; the NOT NULL metric columns must be present.
+TELEMETRY_FIELDS = ('buoy_id', 'salinity', 'pH', 'temperature', 'pollutants', 'location')
+TELEMETRY_REQUIRED_FIELDS = ('buoy_id', 'salinity', 'pH', 'temperature')
+TELEMETRY_NUMERIC_FIELDS = ('salinity', 'pH', 'temperature')
+TELEMETRY_TEXT_FIELDS = ('pollutants', 'location')
+
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MIN_EPOCH_MICROS = (datetime.datetime.min - EPOCH) // datetime.timedelta(microseconds=1)
+MAX_EPOCH_MICROS = (datetime.datetime.max - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def parse_timestamp(value):
+    """Parse an ISO-8601 value into a naive UTC datetime."""
+    ts = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if ts.tzinfo is not None:
+        try:
+            ts = ts.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        except OverflowError:  # e.g. 0001-01-01T00:00:00+01:00
+            raise ValueError(f'{value!r} is outside the supported datetime range') from None
+    return ts
+
+
+def _range_problem(field, low, high):
+    return f'has {field} outside [{low:g}, {high:g}]'
+
+
+def _with_timestamp(entry, row):
+    """Add the buoy's own measurement time to `row`; returns a problem or None.
+
+    The receive time is used when absent.
+    """
+    value = entry.get('timestamp')
+    if isinstance(value, datetime.datetime):  # e.g. a MessagePack timestamp
+        if value.tzinfo is not None:
+            try:
+                value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+            except OverflowError:
+                return 'has an invalid timestamp'
+        row['timestamp'] = value
+    elif value is not None:
+        try:
+            row['timestamp'] = parse_timestamp(value)
+        except (AttributeError, ValueError, OverflowError):
+            return 'has an invalid timestamp'
+    return None
+
+
+def validate_record(entry):
+    """Validate one ingest record.
+
+    Returns (row, None) with a row ready for INSERT, or (None, problem)
+    where problem completes a sentence about the record, e.g. "is missing
+    required field: pH".
+    """
+    if not isinstance(entry, dict):
+        return None, 'must be an object'
+    for field in TELEMETRY_REQUIRED_FIELDS:
+        if entry.get(field) is None:
+            return None, f'is missing required field: {field}'
+    if isinstance(entry['buoy_id'], bool) or not isinstance(entry['buoy_id'], int):
+        return None, 'has a non-integer buoy_id'
+    for field in TELEMETRY_NUMERIC_FIELDS:
+        value = entry[field]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None, f'has a non-numeric {field}'
+    ranges = current_app.config['TELEMETRY_VALUE_RANGES']
+    for field in TELEMETRY_NUMERIC_FIELDS:
+        value = entry[field]
+        if value != value or value in (float('inf'), float('-inf')):
+            return None, f'has a non-finite {field}'
+        low, high = ranges[field]
+        if not low <= value <= high:
+            return None, _range_problem(field, low, high)
+    for field in TELEMETRY_TEXT_FIELDS:
+        if entry.get(field) is not None and not isinstance(entry[field], str):
+            return None, f'has a non-string {field}'
+    row = {field: entry.get(field) for field in TELEMETRY_FIELDS}
+    problem = _with_timestamp(entry, row)
+    if problem:
+        return None, problem
+    return row, None
+
+
+def _validate_per_record(entries):
+    rows, errors = [], []
+    for index, entry in enumerate(entries):
+        row, problem = validate_record(entry)
+        if problem:
+            errors.append((index, problem))
+        else:
+            rows.append(row)
+    return rows, errors
+
+
+def _object_array(values):
+    # fromiter keeps nested lists/dicts as single elements, unlike numpy.array
+    return numpy.fromiter(values, dtype=object, count=len(values))
+
+
+class _Problems:
+    """The first problem of each of `count` records, flagged a whole column at a time."""
+
+    def __init__(self, count):
+        self.codes = numpy.zeros(count, dtype=numpy.int16)  # index into messages; 0 means valid
+        self.messages = [None]
+
+    def flag(self, mask, message):
+        """Record `message` for the records in `mask` that have no earlier problem."""
+        mask &= self.codes == 0
+        if mask.any():
+            self.messages.append(message)
+            self.codes[mask] = len(self.messages) - 1
+
+    def valid(self):
+        return numpy.flatnonzero(self.codes == 0)
+
+    def errors(self):
+        return [(index, self.messages[self.codes[index]]) for index in numpy.flatnonzero(self.codes).tolist()]
+
+
+def _check_values(problems, values):
+    """Flag NaN/infinite and out-of-range values in float64 arrays of TELEMETRY_NUMERIC_FIELDS."""
+    ranges = current_app.config['TELEMETRY_VALUE_RANGES']
+    for field in TELEMETRY_NUMERIC_FIELDS:
+        problems.flag(~numpy.isfinite(values[field]), f'has a non-finite {field}')
+        low, high = ranges[field]
+        problems.flag((values[field] < low) | (values[field] > high), _range_problem(field, low, high))
+
+
+def _validate_columns(entries):
+    problems = _Problems(len(entries))
+    is_dict = _object_array([type(entry) for entry in entries]) == dict
+    if not is_dict.all():
+        problems.flag(~is_dict, 'must be an object')
+        entries = [entry if ok else {} for entry, ok in zip(entries, is_dict)]
+
+    columns = {field: _object_array([entry.get(field) for entry in entries])
+               for field in TELEMETRY_REQUIRED_FIELDS}
+    for field in TELEMETRY_REQUIRED_FIELDS:
+        problems.flag(numpy.equal(columns[field], None), f'is missing required field: {field}')
+    problems.flag(_object_array(list(map(type, columns['buoy_id']))) != int, 'has a non-integer buoy_id')
+
+    values = {}
+    for field in TELEMETRY_NUMERIC_FIELDS:
+        types = _object_array(list(map(type, columns[field])))
+        numeric = (types == float) | (types == int)  # bool is its own type, so it is rejected
+        problems.flag(~numeric, f'has a non-numeric {field}')
+        values[field] = numpy.where(numeric, columns[field], numpy.nan).astype(numpy.float64)
+    _check_values(problems, values)
+    for field in TELEMETRY_TEXT_FIELDS:
+        types = _object_array([type(entry.get(field)) for entry in entries])
+        problems.flag((types != str) & (types != type(None)), f'has a non-string {field}')
+
+    rows, errors = [], problems.errors()
+    for index in problems.valid().tolist():
+        entry = entries[index]
+        row = {field: entry.get(field) for field in TELEMETRY_FIELDS}
+        problem = _with_timestamp(entry, row)
+        if problem:
+            errors.append((index, problem))
+        else:
+            rows.append(row)
+    errors.sort()
+    return rows, errors
+
+
+def validate_numeric_columns(columns, count):
+    """Validate readings given as NumPy arrays, e.g. decoded from a binary frame (api.formats).
+
+    `columns` maps buoy_id, salinity, pH, temperature and optionally
+    timestamp (int64 microseconds since the Unix epoch) to arrays of
+    `count` values, which are already of the right types; only the values
+    are checked. Returns (rows, errors) like validate_batch.
+    """
+    problems = _Problems(count)
+    values = {field: columns[field].astype(numpy.float64) for field in TELEMETRY_NUMERIC_FIELDS}
+    _check_values(problems, values)
+    if 'timestamp' in columns:
+        problems.flag((columns['timestamp'] < MIN_EPOCH_MICROS) | (columns['timestamp'] > MAX_EPOCH_MICROS),
+                      'has an invalid timestamp')
+
+    valid = problems.valid()
+    parameters = {field: values[field][valid].tolist() for field in TELEMETRY_NUMERIC_FIELDS}
+    parameters['buoy_id'] = columns['buoy_id'][valid].tolist()
+    if 'timestamp' in columns:
+        parameters['timestamp'] = columns['timestamp'][valid].astype('datetime64[us]').tolist()
+    names = list(parameters)
+    rows = [{'pollutants': None, 'location': None, **dict(zip(names, values))}
+            for values in zip(*parameters.values())]
+    return rows, problems.errors()
+
+
+def validate_batch(entries):
+    """Validate every record of a bulk upload.
+
+    Returns (rows, errors): rows ready for an executemany INSERT, in payload
+    order, for the valid records, and (index, problem) pairs for the others,
+    by index.
+    """
+    choice = current_app.config['TELEMETRY_BATCH_VALIDATOR']
+    if numpy is None or choice == 'python':
+        return _validate_per_record(entries)
+    try:
+        return _validate_columns(entries)
+    except OverflowError:  # an integer too large for float64; let the per-record path report it
+        return _validate_per_record(entries)
@@ -0,0 +1,54 @@
+"""GET /telemetry/aggregate from rollups and from raw rows, versus client-side averaging."""
+import argparse
+import json
+from collections import defaultdict
+
+from benchmarks.common import app, auth_headers, db, fresh_client, report, seed_telemetry, timed
+from api import rollups
+
+
+def client_side(client, headers, bucket_chars):
+    resp = client.get('/telemetry/export', headers=headers)
+    sums = defaultdict(lambda: [0, 0.0])
+    for line in resp.get_data(as_text=True).splitlines():
+        row = json.loads(line)
+        acc = sums[(row['timestamp'][:bucket_chars], row['buoy_id'])]
+        acc[0] += 1
+        acc[1] += row['salinity']
+    return len(resp.get_data()), {k: total / count for k, (count, total) in sums.items()}
+
+
+def server_side(client, headers, bucket):
+    resp = client.get('/telemetry/aggregate', query_string={'bucket': bucket}, headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    return len(resp.get_data()), resp.get_json()['data']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--bucket', choices=['hour', 'day'], default='hour')
+    args = parser.parse_args()
+
+    with app.app_context():
+        client = fresh_client()
+        headers = auth_headers(client)
+        seed_telemetry(args.rows)
+        rebuild_s, _ = timed(rollups.rebuild)
+        db.session.commit()
+        raw_s, (raw_bytes, _) = timed(client_side, client, headers, 13 if args.bucket == 'hour' else 10)
+        rollup_s, (agg_bytes, buckets) = timed(server_side, client, headers, args.bucket)
+        app.config['TELEMETRY_ROLLUPS_ENABLED'] = False
+        group_s, _ = timed(server_side, client, headers, args.bucket)
+        app.config['TELEMETRY_ROLLUPS_ENABLED'] = True
+
+    report(f'Per-buoy {args.bucket} averages over {args.rows:,} rows ({len(buckets):,} buckets)', [
+        ('export + client-side', f'{raw_s * 1000:.0f}ms, {raw_bytes / 2**20:.1f} MiB transferred'),
+        ('aggregate, GROUP BY raw rows', f'{group_s * 1000:.0f}ms, {agg_bytes / 2**10:.1f} KiB transferred'),
+        ('aggregate, from rollups', f'{rollup_s * 1000:.0f}ms'),
+        ('one-off rollup rebuild', f'{rebuild_s * 1000:.0f}ms'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
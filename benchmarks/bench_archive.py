@@ -0,0 +1,81 @@
+"""Archived quarters scanned from SQLite versus from their Parquet files.
+
+Seeds a temporary file-backed SQLite database with --rows readings in one
+closed quarter, archives it (api.partitions) and exports it to Parquet
+(api.archive). Reports the quarter's size as a SQLite table with its indexes
+and as a Parquet file, then times minute-bucket aggregates and a CSV export
+of the whole quarter and of one day, with TELEMETRY_ARCHIVE_READS off and on.
+"""
+import argparse
+import datetime
+import os
+import statistics
+import tempfile
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}")
+os.environ.setdefault('TELEMETRY_ARCHIVE_DIR', os.path.join(_tmp.name, 'archive'))
+
+from sqlalchemy import text  # noqa: E402
+
+from benchmarks.common import app, auth_headers, db, fresh_client, report, seed_telemetry, timed  # noqa: E402
+from api import archive, partitions  # noqa: E402
+from api.models import quarter_bounds  # noqa: E402
+
+
+def median_ms(client, headers, path, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        elapsed, resp = timed(lambda: client.get(path, query_string=params, headers=headers).get_data())
+        samples.append(elapsed * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    if not archive.available():
+        raise SystemExit('bench_archive needs pyarrow (pip install pyarrow)')
+
+    with app.app_context():
+        client = fresh_client()
+        headers = auth_headers(client)
+        start, _ = quarter_bounds(datetime.datetime.utcnow())
+        for _ in range(2):
+            start, _ = quarter_bounds(start - datetime.timedelta(days=1))
+        end = quarter_bounds(start)[1]
+        seed_telemetry(args.rows, start=start, step=(end - start) / args.rows)
+        partitions.run(keep=2, purge_delay=0)
+        [(partition, parquet_bytes)] = [(p, size) for p, size in archive.export_due() if p.rows]
+        # Pages of the quarter's table and its indexes
+        sqlite_bytes = db.session.execute(
+            text('SELECT SUM(pgsize) FROM dbstat JOIN sqlite_master USING (name) WHERE tbl_name = :name'),
+            {'name': partition.table_name}).scalar()
+
+        day = start + datetime.timedelta(days=45)
+        quarter_range = {'since': start.isoformat(), 'until': end.isoformat()}
+        day_range = {'since': day.isoformat(), 'until': (day + datetime.timedelta(days=1)).isoformat()}
+        cases = [
+            ('aggregate, minute buckets, whole quarter', '/telemetry/aggregate', {'bucket': 'minute', **quarter_range}),
+            ('aggregate, minute buckets, one day', '/telemetry/aggregate', {'bucket': 'minute', **day_range}),
+            ('export CSV, whole quarter', '/telemetry/export', {'format': 'csv', **quarter_range}),
+            ('export CSV, one day', '/telemetry/export', {'format': 'csv', **day_range}),
+        ]
+        rows = [(f'{partition.quarter}, {partition.rows:,} readings',
+                 f'SQLite table + indexes {sqlite_bytes / 2 ** 20:.1f} MiB, '
+                 f'Parquet {parquet_bytes / 2 ** 20:.1f} MiB ({sqlite_bytes / parquet_bytes:.1f}x smaller)')]
+        for label, path, params in cases:
+            app.config['TELEMETRY_ARCHIVE_READS'] = False
+            from_sql = median_ms(client, headers, path, params, args.repeat)
+            app.config['TELEMETRY_ARCHIVE_READS'] = True
+            from_files = median_ms(client, headers, path, params, args.repeat)
+            rows.append((label, f'SQLite {from_sql:9.1f} ms  Parquet {from_files:9.1f} ms '
+                                f'({from_sql / from_files:.1f}x)'))
+
+    report('Archived quarter: SQLite vs Parquet', rows)
+
+
+if __name__ == '__main__':
+    main()
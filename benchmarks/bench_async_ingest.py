@@ -0,0 +1,71 @@
+"""POST /telemetry latency: synchronous commits, the async queue and the durable spool.
+
+Runs against a temporary file-backed SQLite database (commits cost a real
+write) unless SQLALCHEMY_DATABASE_URI is set, with --threads concurrent
+clients. Reports mean request latency and end-to-end throughput, including
+the time the background writer needs to load everything accepted. Spool
+mode fsyncs every acknowledged reading; concurrent requests share fsyncs.
+"""
+import argparse
+import os
+import tempfile
+import threading
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}")
+
+from benchmarks.common import app, auth_headers, fresh_client, reading, report, timed  # noqa: E402
+from api import ingest, spool  # noqa: E402
+from api.models import db, Telemetry  # noqa: E402
+
+
+def post_all(client, headers, n, expected, threads):
+    def worker(offset):
+        for i in range(offset, n, threads):
+            resp = client.post('/telemetry', json=reading(buoy_id=1 + i % 10, i=i), headers=headers)
+            assert resp.status_code == expected, resp.get_json()
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+    app.config['TELEMETRY_SPOOL_DIR'] = os.path.join(_tmp.name, 'spool')
+
+    rows = []
+    with app.app_context():
+        client = fresh_client()
+        headers = auth_headers(client)
+
+        app.extensions['ingest_queue'] = None
+        elapsed, _ = timed(post_all, client, headers, args.requests, 201, args.threads)
+        rows.append(('sync: request latency', f'{elapsed / args.requests * args.threads * 1e6:,.0f} us'))
+        rows.append(('sync: throughput', f'{args.requests / elapsed:,.0f} readings/s'))
+
+        for mode, queue_class in (('async', ingest.IngestQueue), ('spool', spool.Spool)):
+            ingest_queue = queue_class(app)
+            app.extensions['ingest_queue'] = ingest_queue
+            ingest_queue.start()
+            accepted, _ = timed(post_all, client, headers, args.requests, 202, args.threads)
+            drained, _ = timed(ingest_queue.flush)
+            ingest_queue.stop()
+            status = ingest_queue.status()
+            detail = f"{status['fsyncs']:,} fsyncs" if mode == 'spool' else f"{status['batches']} batches"
+            rows.append((f'{mode}: request latency', f'{accepted / args.requests * args.threads * 1e6:,.0f} us'))
+            rows.append((f'{mode}: throughput incl. load', f'{args.requests / (accepted + drained):,.0f} readings/s '
+                                                           f'({detail})'))
+        db.session.remove()
+        assert db.session.query(Telemetry).count() == 3 * args.requests
+
+    report(f'{args.requests:,} POST /telemetry requests from {args.threads} threads', rows)
+
+
+if __name__ == '__main__':
+    main()
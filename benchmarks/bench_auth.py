@@ -0,0 +1,67 @@
+"""Per-request cost of the RBAC layer versus the old inline get_jwt() role check.
+
+Each variant wraps a no-op view and is called directly inside one request
+context, so the numbers are the auth overhead alone. The role table is then
+padded with extra roles to show the per-request cost doesn't grow with it.
+"""
+import argparse
+import time
+
+from flask_jwt_extended import create_access_token, get_jwt, jwt_required
+
+from benchmarks.common import app, report
+from api import auth
+
+
+def view():
+    return None
+
+
+@jwt_required()
+def legacy_view():
+    role = get_jwt().get('role')
+    if role not in ['admin', 'researcher']:
+        return 'forbidden'
+    return None
+
+
+def per_call_us(fn, headers, n):
+    with app.test_request_context('/telemetry', headers=headers):
+        fn()
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--extra-roles', type=int, default=1000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role': 'researcher'})
+    headers = {'Authorization': f'Bearer {token}'}
+    rbac_view = auth.permission_required('create')(view)
+
+    rows = [('inline jwt_required + get_jwt()', per_call_us(legacy_view, headers, args.calls))]
+    cache = app.extensions['token_cache']
+    maxsize = cache.maxsize
+    cache.maxsize = 0
+    rows.append(('permission_required, token cache off', per_call_us(rbac_view, headers, args.calls)))
+    cache.maxsize = maxsize
+    rows.append(('permission_required, token cache on', per_call_us(rbac_view, headers, args.calls)))
+
+    for i in range(args.extra_roles):
+        auth.ROLE_PERMISSIONS[f'role{i}'] = ('read', 'create')
+    auth.ROLES_WITH_PERMISSION['create'] = frozenset(
+        role for role, granted in auth.ROLE_PERMISSIONS.items() if 'create' in granted)
+    padded_view = auth.permission_required('create')(view)
+    rows.append((f'  ... with {len(auth.ROLE_PERMISSIONS)} roles', per_call_us(padded_view, headers, args.calls)))
+
+    report('Auth overhead per request', [(label, f'{us:.1f}us') for label, us in rows])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Rows/sec of POST /telemetry/bulk versus N calls to POST /telemetry."""
+import argparse
+
+from benchmarks.common import app, auth_headers, fresh_client, reading, report, timed
+
+
+def single_inserts(client, headers, n):
+    for i in range(n):
+        resp = client.post('/telemetry', json=reading(i=i), headers=headers)
+        assert resp.status_code == 201, resp.get_json()
+
+
+def bulk_insert(client, headers, n, batch):
+    for start in range(0, n, batch):
+        payload = [reading(i=i) for i in range(start, min(n, start + batch))]
+        resp = client.post('/telemetry/bulk', json=payload, headers=headers)
+        assert resp.status_code == 201, resp.get_json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args()
+
+    with app.app_context():
+        client = fresh_client()
+        headers = auth_headers(client)
+        single_s, _ = timed(single_inserts, client, headers, args.rows)
+
+        client = fresh_client()
+        headers = auth_headers(client)
+        bulk_s, _ = timed(bulk_insert, client, headers, args.rows, args.batch)
+
+    report(f"Ingest {args.rows} rows", [
+        ('POST /telemetry x N', f"{args.rows / single_s:,.0f} rows/s ({single_s:.2f}s)"),
+        (f'POST /telemetry/bulk (batch={args.batch})', f"{args.rows / bulk_s:,.0f} rows/s ({bulk_s:.2f}s)"),
+        ('speedup', f"{single_s / bulk_s:.1f}x"),
+    ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""SQL statements and latency per bulk PUT/DELETE request as the batch grows.
+
+Set-based handlers should issue a constant number of statements regardless of
+batch size (up to TELEMETRY_BULK_CHUNK_SIZE); the script exits non-zero if the
+count grows, so it doubles as an N+1 regression check.
+"""
+import argparse
+import sys
+
+from benchmarks.common import (
+    app, auth_headers, count_statements, fresh_client, reading, report, timed
+)
+
+
+def measure(client, headers, n):
+    ids = client.post('/telemetry/bulk', json=[reading(i=i) for i in range(n)],
+                      headers=headers).get_json()['created_ids']
+    with count_statements() as update_sql:
+        update_s, resp = timed(client.put, '/telemetry/bulk',
+                               json=[{'id': tid, 'salinity': 33.0} for tid in ids], headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    with count_statements() as delete_sql:
+        delete_s, resp = timed(client.delete, '/telemetry/bulk', json={'ids': ids}, headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    return len(update_sql), update_s, len(delete_sql), delete_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500])
+    args = parser.parse_args()
+
+    results = []
+    with app.app_context():
+        client = fresh_client()
+        headers = auth_headers(client)
+        for n in args.sizes:
+            results.append((n, measure(client, headers, n)))
+
+    report('Bulk PUT / DELETE', [
+        (f'n={n}', f'PUT {u_sql} stmts {u_s * 1000:.1f}ms | DELETE {d_sql} stmts {d_s * 1000:.1f}ms')
+        for n, (u_sql, u_s, d_sql, d_s) in results
+    ])
+    counts = {(u_sql, d_sql) for _, (u_sql, _, d_sql, _) in results}
+    if len(counts) != 1:
+        print('FAIL: statement count grows with batch size')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Read latency of GET /telemetry/<id> and bulk GET with and without the read cache.
+
+Seeds historical (closed-quarter) readings, then times repeated single and
+bulk reads with the cache disabled, warm, and revalidated with If-None-Match
+(304, no body).
+"""
+import argparse
+import datetime
+import random
+
+from benchmarks.common import app, auth_headers, fresh_client, report, seed_telemetry, timed
+from api import cache
+
+
+def requests_for(ids, count, bulk):
+    """Yield (url, query) pairs: single-record GETs or bulk GETs of `bulk` ids."""
+    for i in range(count):
+        if bulk:
+            offset = i % (len(ids) - bulk)
+            yield '/telemetry/bulk', {'ids': ids[offset:offset + bulk]}
+        else:
+            yield f'/telemetry/{ids[i % len(ids)]}', None
+
+
+def run(client, headers, targets, etags=None):
+    """Issue every request; with `etags`, revalidate and expect 304s. Returns ETags seen."""
+    seen = []
+    for i, (url, query) in enumerate(targets):
+        if etags is None:
+            resp = client.get(url, query_string=query, headers=headers)
+            seen.append(resp.headers.get('ETag'))
+        else:
+            resp = client.get(url, query_string=query, headers={**headers, 'If-None-Match': etags[i]})
+            assert resp.status_code == 304
+    return seen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--bulk', type=int, default=50)
+    args = parser.parse_args()
+
+    rows = []
+    with app.app_context():
+        client = fresh_client()
+        headers = auth_headers(client)
+        seed_telemetry(args.rows, start=datetime.datetime(2020, 1, 1))
+        ids = list(range(1, args.rows + 1))
+        random.Random(0).shuffle(ids)
+        ids = ids[:args.requests]
+
+        backend = app.extensions['telemetry_cache']
+        for bulk, label in ((0, 'single'), (args.bulk, f'bulk x{args.bulk}')):
+            targets = list(requests_for(ids, args.requests, bulk))
+            app.extensions['telemetry_cache'] = None
+            uncached, _ = timed(run, client, headers, targets)
+            app.extensions['telemetry_cache'] = backend
+            cache.clear()
+            etags = run(client, headers, targets)
+            warm, _ = timed(run, client, headers, targets)
+            revalidated, _ = timed(run, client, headers, targets, etags)
+            for name, elapsed in (('no cache', uncached), ('warm cache', warm),
+                                  ('If-None-Match -> 304', revalidated)):
+                rows.append((f'{label}: {name}', f'{elapsed / args.requests * 1e6:,.0f} us/request'))
+
+    report(f'{args.requests:,} reads over {args.rows:,} historical rows', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Response and request compression (api.compression): size versus latency.
+
+Seeds --rows readings, then times GET /telemetry/bulk for --ids records and a
+full NDJSON export uncompressed and with gzip and zstd at a few levels,
+reporting the bytes on the wire. Also times a PUT /telemetry/bulk of every
+fetched record with a plain, gzip and zstd request body.
+"""
+import argparse
+import datetime
+import gzip
+import json
+import statistics
+
+from benchmarks.common import app, auth_headers, fresh_client, report, seed_telemetry, timed
+from api import compression
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        elapsed, result = timed(fn)
+        samples.append(elapsed * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--ids', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    settings = [('identity', None), ('gzip', 1), ('gzip', 6)]
+    if 'zstd' in compression.response_encodings():
+        settings += [('zstd', 1), ('zstd', 3)]
+
+    rows = []
+    with app.app_context():
+        client = fresh_client()
+        headers = auth_headers(client)
+        seed_telemetry(args.rows, step=datetime.timedelta(seconds=5))  # all in the current quarter
+        ids = list(range(1, args.ids + 1))
+        cases = [(f'GET /telemetry/bulk, {args.ids:,} ids', '/telemetry/bulk', {'ids': ids}),
+                 (f'GET /telemetry/export, {args.rows:,} rows', '/telemetry/export', {})]
+        for label, path, params in cases:
+            for encoding, level in settings:
+                app.config['COMPRESSION_GZIP_LEVEL'] = app.config['COMPRESSION_ZSTD_LEVEL'] = level or 1
+                ms, size = median_ms(lambda: len(client.get(
+                    path, query_string=params, headers={**headers, 'Accept-Encoding': encoding}).get_data()),
+                    args.repeat)
+                name = encoding if level is None else f'{encoding} level {level}'
+                rows.append((f'{label}: {name}', f'{ms:8.1f} ms  {size:>11,} bytes'))
+
+        records = client.get('/telemetry/bulk', query_string={'ids': ids}, headers=headers).get_json()['data']
+        body = json.dumps([{'id': r['id'], 'salinity': r['salinity'] + 0.1} for r in records]).encode()
+        bodies = [('identity', body), ('gzip', gzip.compress(body, compresslevel=1))]
+        if zstandard is not None:
+            bodies.append(('zstd', zstandard.ZstdCompressor(level=1).compress(body)))
+        for encoding, data in bodies:
+            request_headers = {**headers, 'Content-Encoding': encoding}
+            ms, resp = median_ms(lambda: client.put('/telemetry/bulk', data=data, content_type='application/json',
+                                                    headers=request_headers), args.repeat)
+            assert resp.status_code == 200, resp.get_json()
+            rows.append((f'PUT /telemetry/bulk, {len(records):,} records: {encoding} body',
+                         f'{ms:8.1f} ms  {len(data):>11,} bytes'))
+
+    report(f'Compression (median of {args.repeat})', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Cost of retried uploads: first POST /telemetry versus repeats of the same reading.
+
+Readings carry their own timestamp, so repeats hit the (buoy_id, timestamp)
+natural key. A repeat is answered from the recent-readings LRU when warm,
+otherwise by INSERT ... ON CONFLICT DO NOTHING plus a lookup. A bulk batch
+made entirely of repeats is skipped row by row instead of failing.
+"""
+import argparse
+import datetime
+
+from benchmarks.common import app, auth_headers, fresh_client, reading, report, timed
+from api import ingest
+
+
+def readings(n):
+    start = datetime.datetime(2026, 1, 1)
+    return [{**reading(buoy_id=1 + i % 10, i=i), 'timestamp': (start + datetime.timedelta(seconds=i)).isoformat()}
+            for i in range(n)]
+
+
+def post_all(client, headers, payloads, expected):
+    for payload in payloads:
+        resp = client.post('/telemetry', json=payload, headers=headers)
+        assert resp.status_code == expected, resp.get_json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    payloads = readings(args.requests)
+    with app.app_context():
+        client = fresh_client()
+        headers = auth_headers(client)
+        ingest.recent_readings().clear()
+
+        first, _ = timed(post_all, client, headers, payloads, 201)
+        warm, _ = timed(post_all, client, headers, payloads, 200)
+        ingest.recent_readings().clear()
+        cold, _ = timed(post_all, client, headers, payloads, 200)
+        bulk, resp = timed(client.post, '/telemetry/bulk', json=payloads, headers=headers)
+        assert len(resp.get_json()['duplicates']) == args.requests
+
+    def per_request(elapsed):
+        return f'{elapsed / args.requests * 1e6:,.0f} us/request'
+
+    report(f'{args.requests:,} readings, then the same readings again', [
+        ('first upload', per_request(first)),
+        ('repeat, LRU hit', per_request(warm)),
+        ('repeat, LRU miss (ON CONFLICT)', per_request(cold)),
+        ('bulk repeat of all readings', f'{bulk * 1e3:,.0f} ms total'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
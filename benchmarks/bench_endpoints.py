@@ -0,0 +1,322 @@
+"""Latency percentiles and throughput per endpoint, in-process and over HTTP.
+
+Seeds `telemetry` with --rows synthetic readings (e.g. ``--rows 10k,1M,10M``;
+sizes run smallest first and the table is topped up in between), then drives
+each endpoint from --threads concurrent clients, first through
+``app.test_client()`` and then over real HTTP. The HTTP server is a threaded
+werkzeug server in a child process, so client and server don't share a GIL,
+or --url to load an already running server on the same database.
+
+Endpoints: create_telemetry, get_telemetry and the bulk GET, POST, PUT and
+DELETE handlers. Updates and deletes only touch readings the run created
+itself, and those are all deleted by the bulk DELETE phase, so the seeded
+table is left as it was. Request payloads come from --seed, so two runs send
+the same requests.
+
+The database is a temporary SQLite file unless SQLALCHEMY_DATABASE_URI is
+set; point it at a file to keep the seeded rows between runs. p50/p95/p99
+latency and throughput are printed and, with --output, written as JSON;
+--baseline compares against a previous --output file, e.g. from the parent
+commit:
+
+    python -m benchmarks.bench_endpoints --rows 1M --output before.json
+    python -m benchmarks.bench_endpoints --rows 1M --baseline before.json
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}")
+# Creates must return their IDs for the update and delete phases
+os.environ['TELEMETRY_INGEST_MODE'] = 'sync'
+
+from benchmarks.common import app, auth_headers, reading, report, seed_telemetry  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from api import cache  # noqa: E402
+from api.models import db, Telemetry  # noqa: E402
+
+SEED_START = datetime.datetime(2015, 1, 1)
+SEED_STEP = datetime.timedelta(seconds=30)
+
+
+def parse_size(text):
+    multiplier = {'k': 10 ** 3, 'm': 10 ** 6}.get(text[-1].lower(), 1)
+    return int(float(text[:-1] if multiplier > 1 else text) * multiplier)
+
+
+def ensure_rows(target):
+    """Top the table up to `target` seeded readings; returns how many were added."""
+    current = db.session.execute(select(func.count(Telemetry.id))).scalar()
+    if current > target:
+        sys.exit(f'telemetry already holds {current:,} rows, more than --rows {target:,}; '
+                 f'use a fresh database or list sizes smallest first')
+    seed_telemetry(target - current, start=SEED_START + current * SEED_STEP, step=SEED_STEP)
+    return target - current
+
+
+def sample_ids(rng, count):
+    """`count` random IDs of readings that exist (IDs can have gaps from earlier runs)."""
+    low, high = db.session.execute(select(func.min(Telemetry.id), func.max(Telemetry.id))).one()
+    ids = []
+    while len(ids) < count:
+        candidates = [rng.randint(low, high) for _ in range(min(500, 2 * (count - len(ids))))]
+        found = set(db.session.execute(select(Telemetry.id).where(Telemetry.id.in_(candidates))).scalars())
+        ids.extend(tid for tid in candidates if tid in found)
+    return ids[:count]
+
+
+class InProcessClient:
+    def __init__(self, headers):
+        self.client = app.test_client()
+        self.headers = headers
+
+    def request(self, method, path, query=None, body=None):
+        resp = self.client.open(path, method=method, query_string=query, json=body, headers=self.headers)
+        return resp.status_code, resp.get_data()
+
+    def close(self):
+        pass
+
+
+class HttpClient:
+    """One keep-alive connection per load-generating thread."""
+
+    def __init__(self, url, headers):
+        parsed = urllib.parse.urlsplit(url)
+        self.connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80)
+        self.prefix = parsed.path.rstrip('/')
+        self.headers = {**headers, 'Content-Type': 'application/json'}
+
+    def request(self, method, path, query=None, body=None):
+        if query:
+            path = f'{path}?{urllib.parse.urlencode(query, doseq=True)}'
+        payload = None if body is None else json.dumps(body)
+        self.connection.request(method, self.prefix + path, body=payload, headers=self.headers)
+        resp = self.connection.getresponse()
+        return resp.status, resp.read()
+
+    def close(self):
+        self.connection.close()
+
+
+def workloads(args, rng, created):
+    """(endpoint, expected status, request list) in run order; later phases use `created`."""
+    bulk = args.bulk_size
+    yield 'create_telemetry', 201, [
+        ('POST', '/telemetry', None, reading(buoy_id=1 + i % 10, i=i)) for i in range(args.requests)]
+    yield 'get_telemetry', 200, [
+        ('GET', f'/telemetry/{tid}', None, None) for tid in sample_ids(rng, args.requests)]
+    yield 'bulk_get_telemetry', 200, [
+        ('GET', '/telemetry/bulk', {'ids': sample_ids(rng, bulk)}, None) for _ in range(args.bulk_requests)]
+    yield 'bulk_create_telemetry', 201, [
+        ('POST', '/telemetry/bulk', None, [reading(buoy_id=1 + i % 10, i=i) for i in range(bulk)])
+        for _ in range(args.bulk_requests)]
+    yield 'bulk_update_telemetry', 200, [
+        ('PUT', '/telemetry/bulk', None,
+         [{'id': tid, 'salinity': round(rng.uniform(30, 40), 2)}
+          for tid in rng.sample(created, min(bulk, len(created)))])
+        for _ in range(args.bulk_requests)]
+    yield 'bulk_delete_telemetry', 200, [
+        ('DELETE', '/telemetry/bulk', None, {'ids': created[start:start + bulk]})
+        for start in range(0, len(created), bulk)]
+
+
+def collect_created(endpoint, body, created):
+    if endpoint == 'create_telemetry':
+        created.append(json.loads(body)['id'])
+    elif endpoint == 'bulk_create_telemetry':
+        created.extend(json.loads(body)['created_ids'])
+
+
+def run_phase(make_client, endpoint, expected, requests, threads, created):
+    """Send `requests` from `threads` clients; returns a result dict."""
+    pending = iter(requests)
+    lock = threading.Lock()
+    latencies, errors = [], []
+
+    def worker():
+        client = make_client()
+        try:
+            while True:
+                with lock:
+                    spec = next(pending, None)
+                if spec is None:
+                    return
+                start = time.perf_counter()
+                status, body = client.request(*spec)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if status == expected:
+                        collect_created(endpoint, body, created)
+                    else:
+                        errors.append((status, body[:200]))
+        finally:
+            client.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    wall = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    wall = time.perf_counter() - wall
+
+    if errors:
+        print(f'  {endpoint}: {len(errors)} unexpected responses, first: {errors[0]}', file=sys.stderr)
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {'endpoint': endpoint, 'requests': len(latencies), 'errors': len(errors),
+            'p50_ms': cuts[49] * 1000, 'p95_ms': cuts[94] * 1000, 'p99_ms': cuts[98] * 1000,
+            'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+            'throughput_rps': len(latencies) / wall if wall else 0.0}
+
+
+def run_transport(transport, make_client, args, rows):
+    rng = random.Random(f'{args.seed}-{rows}-{transport}')
+    created, results = [], []
+    for endpoint, expected, requests in workloads(args, rng, created):
+        cache.clear()  # no reads served from the previous transport's warm cache
+        result = run_phase(make_client, endpoint, expected, requests, args.threads, created)
+        results.append({'rows': rows, 'transport': transport, **result})
+    return results
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    """Serve the app from a child process on the same database; returns the process."""
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_endpoints', '--serve', str(port)])
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                sys.exit('benchmark server exited during startup')
+            time.sleep(0.1)
+    process.kill()
+    sys.exit('benchmark server did not start within 30s')
+
+
+def serve(port):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like a production server
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    make_server('127.0.0.1', port, app, threaded=True, request_handler=QuietHandler).serve_forever()
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit.strip(), bool(dirty.strip())
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['rows'], r['transport'], r['endpoint']): r for r in json.load(f)['results']}
+    rows = []
+    for r in results:
+        before = baseline.get((r['rows'], r['transport'], r['endpoint']))
+        if before is None:
+            continue
+        changes = []
+        for key, unit in (('p50_ms', 'ms'), ('p99_ms', 'ms'), ('throughput_rps', '/s')):
+            delta = (r[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            changes.append(f'{key.split("_")[0]} {before[key]:,.1f} -> {r[key]:,.1f}{unit} ({delta:+.0f}%)')
+        rows.append((f"{r['rows']:,} rows {r['transport']} {r['endpoint']}", ', '.join(changes)))
+    report(f'Compared with {baseline_path}', rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='10k', help='Seeded table sizes, comma-separated (10k,1M,10M)')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per single-record endpoint')
+    parser.add_argument('--bulk-requests', type=int, default=100, help='Requests per bulk endpoint')
+    parser.add_argument('--bulk-size', type=int, default=100, help='Records per bulk request')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--transport', choices=['inprocess', 'http', 'both'], default='both')
+    parser.add_argument('--url', help='Load this server instead of starting one (same database!)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare with a previous --output file')
+    parser.add_argument('--serve', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve)
+
+    sizes = sorted(parse_size(size) for size in args.rows.split(','))
+    transports = ['inprocess', 'http'] if args.transport == 'both' else [args.transport]
+    results = []
+    with app.app_context():
+        db.create_all()
+        headers = auth_headers(app.test_client())
+        dialect = db.engine.dialect.name
+        for rows in sizes:
+            started = time.perf_counter()
+            added = ensure_rows(rows)
+            if added:
+                print(f'Seeded {added:,} rows in {time.perf_counter() - started:,.1f}s', file=sys.stderr)
+            db.session.remove()
+            for transport in transports:
+                if transport == 'inprocess':
+                    results += run_transport(transport, lambda: InProcessClient(headers), args, rows)
+                    continue
+                port = free_port()
+                server = None if args.url else start_server(port)
+                url = args.url or f'http://127.0.0.1:{port}'
+                try:
+                    results += run_transport(transport, lambda: HttpClient(url, headers), args, rows)
+                finally:
+                    if server is not None:
+                        server.terminate()
+                        server.wait()
+
+    commit, dirty = git_revision()
+    document = {
+        'meta': {'commit': commit, 'dirty': dirty, 'python': platform.python_version(),
+                 'database': dialect, 'threads': args.threads, 'seed': args.seed,
+                 'bulk_size': args.bulk_size,
+                 'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat()},
+        'results': results,
+    }
+    report(f'{args.threads} threads, bulk requests of {args.bulk_size} records',
+           [(f"{r['rows']:,} rows {r['transport']} {r['endpoint']}",
+             f"p50 {r['p50_ms']:,.2f} ms  p95 {r['p95_ms']:,.2f} ms  p99 {r['p99_ms']:,.2f} ms  "
+             f"{r['throughput_rps']:,.0f} req/s" + (f"  ({r['errors']} errors)" if r['errors'] else ''))
+            for r in results])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Peak Python heap and time-to-first-byte of GET /telemetry/export.
+
+Peak memory should stay roughly constant as the exported row count grows;
+only the seeded table size changes between runs.
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.common import app, auth_headers, fresh_client, report, seed_telemetry
+
+
+def export(client, headers, fmt):
+    tracemalloc.start()
+    start = time.perf_counter()
+    resp = client.get('/telemetry/export', query_string={'format': fmt}, headers=headers, buffered=False)
+    first_byte = None
+    size = 0
+    for chunk in resp.response:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    resp.close()
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_byte, total, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 300000])
+    parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+    args = parser.parse_args()
+
+    rows = []
+    with app.app_context():
+        for n in args.sizes:
+            client = fresh_client()
+            headers = auth_headers(client)
+            seed_telemetry(n)
+            first_byte, total, size, peak = export(client, headers, args.format)
+            rows.append((f'{n:,} rows', f'ttfb {first_byte * 1000:.1f}ms, total {total:.2f}s, '
+                                        f'{size / 2**20:.1f} MiB out, peak heap {peak / 2**20:.2f} MiB'))
+
+    report(f'GET /telemetry/export?format={args.format}', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Bulk ingest payloads: JSON versus MessagePack versus packed column frames.
+
+Builds one batch of --rows timestamped readings (the largest batch POST
+/telemetry/bulk accepts by default) without pollutants/location, which
+frames can't carry, and reports each encoding's size and the time to decode
+and validate it, then times the whole POST /telemetry/bulk.
+"""
+import argparse
+import datetime
+import json
+
+from benchmarks.common import app, auth_headers, fresh_client, report, timed
+from api import formats, validation
+from api.validation import parse_timestamp
+
+
+def readings(n):
+    start = datetime.datetime.utcnow().replace(microsecond=0) - datetime.timedelta(seconds=30 * n)
+    return [{'buoy_id': 1 + i % 10, 'salinity': 30.0 + (i % 100) / 10, 'pH': 7.5 + (i % 10) / 10,
+             'temperature': 18.0 + (i % 50) / 5, 'timestamp': start + datetime.timedelta(seconds=30 * i)}
+            for i in range(n)]
+
+
+def decode_json(body):
+    return validation.validate_batch(json.loads(body))
+
+
+def decode_msgpack(body):
+    return validation.validate_batch(formats.decode_msgpack(body))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=app.config['TELEMETRY_BULK_MAX_ROWS'])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    batch = readings(args.rows)
+    as_strings = [{**r, 'timestamp': r['timestamp'].isoformat()} for r in batch]
+    max_rows = app.config['TELEMETRY_BULK_MAX_ROWS']
+    cases = [('JSON', 'application/json', json.dumps(as_strings).encode(), decode_json)]
+    if formats.msgpack_available():
+        import msgpack
+        cases.append(('MessagePack', 'application/msgpack', msgpack.packb(as_strings), decode_msgpack))
+    cases += [
+        ('frame, float32', formats.FRAME_MIMETYPE, formats.encode_frame(batch),
+         lambda body: formats.decode_frame(body, max_rows)),
+        ('frame, float64', formats.FRAME_MIMETYPE, formats.encode_frame(batch, float64=True),
+         lambda body: formats.decode_frame(body, max_rows)),
+    ]
+
+    posts = {label: [] for label, *_ in cases}
+    with app.app_context():
+        # Formats take turns in each round, so they see the same conditions
+        for _ in range(args.repeat):
+            for label, mimetype, body, _ in cases:
+                client = fresh_client()
+                headers = auth_headers(client)
+                elapsed, resp = timed(client.post, '/telemetry/bulk', data=body, content_type=mimetype,
+                                      headers=headers)
+                assert resp.status_code == 201, resp.get_json()
+                posts[label].append(elapsed)
+
+        rows = []
+        for label, _, body, decode in cases:
+            valid, errors = decode(body)
+            assert len(valid) == args.rows and not errors
+            assert valid[-1]['timestamp'] == parse_timestamp(as_strings[-1]['timestamp'])
+            elapsed = min(timed(decode, body)[0] for _ in range(args.repeat))
+            rows.append((f'{label}: {len(body):,} bytes ({len(body) / args.rows:.0f} B/reading)',
+                         f'decode+validate {elapsed * 1000:7.1f} ms, POST {min(posts[label]) * 1000:7.1f} ms'))
+
+    report(f'Bulk ingest formats, {args.rows:,} readings (best of {args.repeat})', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""JSON encode throughput of bulk telemetry payloads per provider.
+
+Encodes {"data": [...]} built from real-shaped rows, the way bulk GET does.
+"Flask default" is the previous setup: isoformat() per row, sorted keys.
+"""
+import argparse
+import datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.common import app, reading, report, timed
+from api import json_provider
+
+
+def records(n):
+    start = datetime.datetime(2026, 10, 1)
+    rows = []
+    for i in range(n):
+        row = reading(buoy_id=1 + i % 10, i=i)
+        row['id'] = i + 1
+        row['timestamp'] = start + datetime.timedelta(seconds=30 * i, microseconds=i % 1000)
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    data = records(args.rows)
+    legacy_data = [{**row, 'timestamp': row['timestamp'].isoformat()} for row in data]
+
+    legacy = DefaultJSONProvider(app)
+    legacy.sort_keys = True
+    providers = [('Flask default (isoformat per row, sorted)', legacy, legacy_data),
+                 ('stdlib provider', json_provider.StdlibJSONProvider(app), data)]
+    if json_provider.orjson is not None:
+        providers.append(('orjson provider', json_provider.OrjsonProvider(app), data))
+
+    rows = []
+    with app.app_context():
+        for label, provider, payload in providers:
+            best = min(timed(provider.response, data=payload)[0] for _ in range(args.repeat))
+            if payload is legacy_data:
+                # the isoformat() pass is part of the old per-request cost
+                best += timed(lambda: [row['timestamp'].isoformat() for row in data])[0]
+            rows.append((label, f'{args.rows / best:,.0f} rows/s ({best * 1000:.0f}ms)'))
+
+    report(f'Encode {args.rows:,} telemetry records', rows)
+
+
+if __name__ == '__main__':
+    main()
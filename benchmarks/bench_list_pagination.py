@@ -0,0 +1,59 @@
+"""GET /telemetry page latency near the start versus deep into the result set.
+
+With keyset pagination the cost of a page depends only on the page size, so
+the first page and a page ~N rows in should take about the same time.
+"""
+import argparse
+import statistics
+
+# benchmarks.common must be imported first: it selects the benchmark database
+from benchmarks.common import (
+    app, auth_headers, db, fresh_client, report, seed_telemetry, timed
+)
+from api.main import encode_cursor
+from api.models import Telemetry
+
+
+def cursor_at(position, buoy_id):
+    """Build the cursor a client would hold after reading `position` rows."""
+    ts, tid = (db.session.query(Telemetry.timestamp, Telemetry.id)
+               .filter(Telemetry.buoy_id == buoy_id)
+               .order_by(Telemetry.timestamp.desc(), Telemetry.id.desc())
+               .offset(position - 1).limit(1).one())
+    return encode_cursor(ts, tid)
+
+
+def page_ms(client, headers, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        elapsed, resp = timed(client.get, '/telemetry', query_string=params, headers=headers)
+        assert resp.status_code == 200, resp.get_json()
+        samples.append(elapsed * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with app.app_context():
+        client = fresh_client()
+        headers = auth_headers(client)
+        seed_telemetry(args.rows, buoys=2)
+        per_buoy = args.rows // 2
+        rows = []
+        for position in (0, per_buoy // 10, per_buoy // 2, per_buoy - args.limit - 1):
+            params = {'buoy_id': 1, 'limit': args.limit}
+            if position:
+                params['cursor'] = cursor_at(position, 1)
+            rows.append((f'row offset {position:,}',
+                         f'{page_ms(client, headers, params, args.repeat):.2f}ms'))
+
+    report(f'GET /telemetry?buoy_id=1&limit={args.limit} over {args.rows:,} rows (median)', rows)
+
+
+if __name__ == '__main__':
+    main()
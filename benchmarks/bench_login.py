@@ -0,0 +1,57 @@
+"""Logins per second per core for each password hash setting, versus token refresh.
+
+Each login runs the KDF once, so a single thread measures what one core can
+sustain when a fleet re-authenticates at once. The first login after
+PASSWORD_HASH_METHOD changes also re-hashes the password (a second KDF run
+plus a commit); that one-off cost is reported separately. POST /refresh
+exchanges a refresh token for an access token without touching the KDF.
+"""
+import argparse
+
+from benchmarks.common import app, fresh_client, report, timed
+
+CREDENTIALS = {'username': 'device1', 'password': 'Device123!'}
+
+
+def login(client, n):
+    for _ in range(n):
+        resp = client.post('/login', json=CREDENTIALS)
+        assert resp.status_code == 201, resp.get_json()
+    return resp.get_json()
+
+
+def refresh(client, token, n):
+    headers = {'Authorization': f'Bearer {token}'}
+    for _ in range(n):
+        resp = client.post('/refresh', headers=headers)
+        assert resp.status_code == 200, resp.get_json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--methods', default='scrypt:32768:8:1,scrypt:16384:8:1,pbkdf2:sha256:600000,'
+                                             'pbkdf2:sha256:100000')
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--refreshes', type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = []
+    with app.app_context():
+        client = fresh_client()
+        client.post('/register', json={**CREDENTIALS, 'email': 'device1@example.com', 'role': 'researcher'})
+        for method in args.methods.split(','):
+            app.config['PASSWORD_HASH_METHOD'] = method
+            rehash, tokens = timed(login, client, 1)
+            elapsed, _ = timed(login, client, args.logins)
+            rows.append((method, f'{args.logins / elapsed:,.1f} logins/s '
+                                 f'({elapsed / args.logins * 1000:,.1f} ms each, first login with '
+                                 f're-hash {rehash * 1000:,.1f} ms)'))
+        elapsed, _ = timed(refresh, client, tokens['refresh_token'], args.refreshes)
+        rows.append(('POST /refresh', f'{args.refreshes / elapsed:,.0f} refreshes/s '
+                                      f'({elapsed / args.refreshes * 1000:,.2f} ms each)'))
+
+    report('Single-threaded POST /login and POST /refresh', rows)
+
+
+if __name__ == '__main__':
+    main()
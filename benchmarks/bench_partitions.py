@@ -0,0 +1,95 @@
+"""Telemetry in one table versus closed quarters archived into their own tables.
+
+Seeds a temporary file-backed SQLite database with --rows readings spread
+over the last --quarters quarters, measures bulk ingest into the current
+quarter, a recent-week listing, a one-day export from an old quarter and
+GET /telemetry/<id>, then runs the archiver (api.partitions) and measures
+again. Also reports how long archiving took and the database file size.
+"""
+import argparse
+import datetime
+import os
+import random
+import statistics
+import tempfile
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}")
+
+from benchmarks.common import app, auth_headers, db, fresh_client, reading, report, seed_telemetry, timed  # noqa: E402
+from api import partitions  # noqa: E402
+from api.models import quarter_bounds  # noqa: E402
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        elapsed, resp = timed(fn)
+        assert resp.status_code in (200, 201), resp.status_code
+        samples.append(elapsed * 1000)
+    return statistics.median(samples)
+
+
+def read(resp):
+    resp.get_data()  # drain streamed bodies so their request context is popped
+    resp.close()
+    return resp
+
+
+def measure(client, headers, args, old_day, max_id, rng):
+    now = datetime.datetime.utcnow()
+    week = {'since': (now - datetime.timedelta(days=7)).isoformat(), 'limit': 1000}
+    day = {'since': old_day.isoformat(), 'until': (old_day + datetime.timedelta(days=1)).isoformat()}
+    batch = [reading(buoy_id=1 + i % 10, i=i) for i in range(args.batch)]
+    return {
+        f'bulk POST {args.batch} rows': median_ms(
+            lambda: client.post('/telemetry/bulk', json=batch, headers=headers), args.repeat),
+        'GET /telemetry, last 7 days, 1000 rows': median_ms(
+            lambda: client.get('/telemetry', query_string=week, headers=headers), args.repeat),
+        'export one day of an old quarter': median_ms(
+            lambda: read(client.get('/telemetry/export', query_string=day, headers=headers)), args.repeat),
+        'GET /telemetry/<random id>': median_ms(
+            lambda: client.get(f'/telemetry/{rng.randint(1, max_id)}', headers=headers), args.repeat * 10),
+    }
+
+
+def file_size():
+    return os.path.getsize(db.engine.url.database) / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--quarters', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with app.app_context():
+        client = fresh_client()
+        headers = auth_headers(client)
+        app.config['TELEMETRY_CACHE_BACKEND'] = 'none'
+        start, _ = quarter_bounds(datetime.datetime.utcnow())
+        for _ in range(args.quarters - 1):
+            start, _ = quarter_bounds(start - datetime.timedelta(days=1))
+        step = (datetime.datetime.utcnow() - datetime.timedelta(hours=1) - start) / args.rows
+        seed_telemetry(args.rows, start=start, step=step)
+        old_day = start + datetime.timedelta(days=30)
+
+        before = measure(client, headers, args, old_day, args.rows, rng)
+        size_before = file_size()
+        elapsed, (archived, _) = timed(partitions.run, keep=2, purge_delay=0)
+        partitions.vacuum()
+        after = measure(client, headers, args, old_day, args.rows, rng)
+        size_after = file_size()
+
+    rows = [(label, f'{before[label]:8.2f} ms -> {after[label]:8.2f} ms ({before[label] / after[label]:.2f}x)')
+            for label in before]
+    rows.append(('archive + purge', f'{elapsed:.1f} s for {len(archived)} quarters'))
+    rows.append(('database file', f'{size_before:.0f} MiB -> {size_after:.0f} MiB'))
+    report(f'One telemetry table vs per-quarter tables, {args.rows:,} readings over {args.quarters} quarters', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Serialization throughput: to_dict() + dict filtering versus per-role serializers.
+
+Times fetch + serialize of the whole table for the admin (all fields) and
+consumer (restricted) projections. "ORM + to_dict" is the old path; the
+serializer path selects only the role's columns in SQL.
+"""
+import argparse
+
+from sqlalchemy import select
+
+from benchmarks.common import app, db, fresh_client, report, seed_telemetry, timed
+from api import auth
+from api.models import Telemetry
+from api.serializers import FULL
+
+CONSUMER_FIELDS = ['salinity', 'pH', 'id', 'timestamp']
+
+
+def legacy(consumer):
+    result = []
+    for record in Telemetry.query.all():
+        data = record.to_dict()
+        if consumer:
+            data = {k: v for k, v in data.items() if k in CONSUMER_FIELDS}
+        result.append(data)
+    db.session.expunge_all()
+    return result
+
+
+def serializer_columns(serializer):
+    return serializer.rows(db.session.execute(select(*serializer.columns)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = []
+    with app.app_context():
+        fresh_client()
+        seed_telemetry(args.rows)
+        for role, serializer in (('admin', FULL), ('consumer', auth.SERIALIZERS['consumer'])):
+            consumer = role == 'consumer'
+            for label, fn, arg in (('ORM + to_dict()', legacy, consumer),
+                                   ('column select + serializer', serializer_columns, serializer)):
+                elapsed, out = timed(fn, arg)
+                assert len(out) == args.rows
+                rows.append((f'{role}: {label}', f'{args.rows / elapsed:,.0f} rows/s ({elapsed:.2f}s)'))
+
+    report(f'Fetch + serialize {args.rows:,} rows', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""GET /telemetry/<id> throughput under gunicorn as the worker count grows.
+
+Seeds a temporary file-backed SQLite database, then for each --workers value
+starts `gunicorn -c gunicorn.conf.py wsgi:app` on it and loads it from
+--clients client processes (so the load generator isn't limited to one core
+either) for --seconds, after a --warmup period. Reports requests/s, the
+speed-up over the first worker count and p50/p99 latency. Scaling flattens
+once workers outnumber the cores that are left after the clients (see the
+CPU count in the title).
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}")
+
+from benchmarks.common import app, auth_headers, fresh_client, report, seed_telemetry  # noqa: E402
+from api import server  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def client_process(port, headers, rows, warmup, seconds, seed):
+    """Issue GETs back to back on one keep-alive connection; returns measured latencies."""
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    latencies = []
+    started = time.perf_counter()
+    measure_from, stop_at = started + warmup, started + warmup + seconds
+    while True:
+        start = time.perf_counter()
+        if start >= stop_at:
+            break
+        connection.request('GET', f'/telemetry/{rng.randint(1, rows)}', headers=headers)
+        resp = connection.getresponse()
+        resp.read()
+        assert resp.status == 200, resp.status
+        if start >= measure_from:
+            latencies.append(time.perf_counter() - start)
+    connection.close()
+    return latencies
+
+
+def start_gunicorn(port, workers, threads):
+    env = {**os.environ, 'SERVER_BIND': f'127.0.0.1:{port}', 'SERVER_WORKERS': str(workers),
+           'SERVER_THREADS': str(threads)}
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                               cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit('gunicorn exited during startup (is it installed? pip install gunicorn)')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    sys.exit('gunicorn did not start within 30s')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def main():
+    cpus = server.available_cpus()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({1, 2, cpus, 2 * cpus + 1})))
+    parser.add_argument('--threads', type=int, default=app.config['SERVER_THREADS'])
+    parser.add_argument('--clients', type=int, default=max(4, cpus))
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--warmup', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with app.app_context():
+        headers = auth_headers(fresh_client())
+        seed_telemetry(args.rows)
+
+    rows, baseline = [], None
+    for workers in (int(n) for n in args.workers.split(',')):
+        port = free_port()
+        process = start_gunicorn(port, workers, args.threads)
+        try:
+            with multiprocessing.Pool(args.clients) as pool:
+                results = pool.starmap(client_process, [
+                    (port, headers, args.rows, args.warmup, args.seconds, seed) for seed in range(args.clients)])
+        finally:
+            process.terminate()
+            process.wait()
+        latencies = sorted(latency for result in results for latency in result)
+        throughput = len(latencies) / args.seconds
+        baseline = baseline or throughput
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        rows.append((f'{workers} workers x {args.threads} threads',
+                     f'{throughput:,.0f} req/s ({throughput / baseline:.2f}x)  '
+                     f'p50 {cuts[49] * 1000:.1f} ms  p99 {cuts[98] * 1000:.1f} ms'))
+
+    report(f'GET /telemetry/<id> under gunicorn, {args.clients} client processes, {cpus} CPUs', rows)
+
+
+if __name__ == '__main__':
+    main()
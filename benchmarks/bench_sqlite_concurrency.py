@@ -0,0 +1,118 @@
+"""Concurrent ingest + reads on a file-backed SQLite database, per profile.
+
+Writer threads commit small telemetry batches (like POST /telemetry) while
+reader threads page through a buoy's readings (like GET /telemetry), for a
+fixed duration. "default" is SQLite's rollback journal with synchronous=FULL;
+"performance" is the Config.SQLITE_PRAGMAS profile (WAL, synchronous=NORMAL,
+busy_timeout, mmap, cache_size). Failed statements ("database is locked")
+are counted separately.
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.common import app, reading, report
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from api import sqlite
+from api.models import db, Telemetry
+
+
+def make_engine(path, pragmas, pool_size):
+    # Without the profile, lock waits fall back to the driver's 5s timeout
+    engine = create_engine(f'sqlite:///{path}', pool_size=pool_size, max_overflow=0)
+    sqlite.configure_engine(engine, pragmas)
+    db.metadata.create_all(engine)
+    return engine
+
+
+def writer(engine, stop, batch, counts, buoy_id):
+    # Each writer has its own buoy and steps its clock per row, so no two
+    # rows share the unique (buoy_id, timestamp) key
+    start = datetime.datetime.utcnow()
+    i = 0
+    while not stop.is_set():
+        rows = []
+        for _ in range(batch):
+            row = reading(buoy_id=buoy_id, i=i)
+            row['timestamp'] = start + datetime.timedelta(microseconds=i)
+            rows.append(row)
+            i += 1
+        try:
+            with Session(engine) as session, session.begin():
+                session.execute(insert(Telemetry), rows)
+            counts['rows written'] += batch
+        except OperationalError:
+            counts['write errors'] += 1
+
+
+def reader(engine, stop, buoys, counts, seed):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        query = (select(Telemetry.id, Telemetry.timestamp, Telemetry.salinity, Telemetry.pH)
+                 .where(Telemetry.buoy_id == rng.randint(1, buoys))
+                 .order_by(Telemetry.timestamp.desc(), Telemetry.id.desc()).limit(100))
+        try:
+            with Session(engine) as session:
+                session.execute(query).all()
+            counts['pages read'] += 1
+        except OperationalError:
+            counts['read errors'] += 1
+
+
+def run(pragmas, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, 'bench.db'), pragmas, args.writers + args.readers)
+        with Session(engine) as session, session.begin():
+            seed = []
+            for i in range(args.seed_rows):
+                row = reading(buoy_id=1 + i % args.buoys, i=i)
+                row['timestamp'] = datetime.datetime.utcnow() - datetime.timedelta(seconds=args.seed_rows - i)
+                seed.append(row)
+            session.execute(insert(Telemetry), seed)
+
+        counts = {'rows written': 0, 'write errors': 0, 'pages read': 0, 'read errors': 0}
+        stop = threading.Event()
+        threads = ([threading.Thread(target=writer, args=(engine, stop, args.batch, counts, 1 + n))
+                    for n in range(args.writers)] +
+                   [threading.Thread(target=reader, args=(engine, stop, args.buoys, counts, n))
+                    for n in range(args.readers)])
+        for t in threads:
+            t.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+        engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=10)
+    parser.add_argument('--buoys', type=int, default=10)
+    parser.add_argument('--seed-rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    rows = []
+    for name, pragmas in (('default', {}), ('performance', app.config['SQLITE_PRAGMAS'])):
+        counts = run(pragmas, args)
+        rows.append((f'{name}: writes', f"{counts['rows written'] / args.seconds:,.0f} rows/s "
+                                        f"({counts['write errors']:,} lock errors)"))
+        rows.append((f'{name}: reads', f"{counts['pages read'] / args.seconds:,.0f} pages/s "
+                                       f"({counts['read errors']:,} lock errors)"))
+
+    report(f'{args.writers} writers + {args.readers} readers for {args.seconds:g}s on file-backed SQLite', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""User lookups with and without the api.users cache.
+
+Times POST /login for a username that doesn't exist (a credential-stuffing
+burst), then buoy_id validation for a bulk ingest batch: resolving its
+distinct buoy_ids cold (one IN query), warm (no query), and the old way of
+one SELECT per row.
+"""
+import argparse
+
+from sqlalchemy import insert, select
+
+from benchmarks.common import app, count_statements, fresh_client, report, timed
+from api import users
+from api.models import db, User
+
+
+def failed_logins(client, n):
+    for i in range(n):
+        resp = client.post('/login', json={'username': f'nobody{i % 10}', 'password': 'guess'})
+        assert resp.status_code == 401
+
+
+def per_row_lookups(buoy_ids):
+    return [db.session.execute(select(User.id).where(User.id == buoy_id)).first() for buoy_id in buoy_ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=2000)
+    parser.add_argument('--buoys', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = []
+    with app.app_context():
+        client = fresh_client()
+        db.session.execute(insert(User), [
+            {'username': f'buoy{i}', 'email': f'buoy{i}@example.com', 'password_hash': '-', 'role': 'researcher'}
+            for i in range(args.buoys)])
+        db.session.commit()
+        cache = app.extensions['user_cache']
+
+        for label, maxsize in (('off', 0), ('on', cache.maxsize)):
+            cache.maxsize = maxsize
+            users.clear()
+            elapsed, _ = timed(failed_logins, client, args.logins)
+            rows.append((f'unknown-user login, cache {label}', f'{args.logins / elapsed:,.0f} logins/s'))
+
+        buoy_ids = [1 + i % args.buoys for i in range(args.batch)]
+        users.clear()
+        for label, fn in (('per-row SELECT', lambda: per_row_lookups(buoy_ids)),
+                          ('missing_ids, cold cache', lambda: users.missing_ids(buoy_ids)),
+                          ('missing_ids, warm cache', lambda: users.missing_ids(buoy_ids))):
+            with count_statements() as statements:
+                elapsed, _ = timed(fn)
+            rows.append((f'validate {args.batch} buoy_ids: {label}',
+                         f'{elapsed * 1000:,.2f} ms ({len(statements)} statements)'))
+
+    report('User lookups', rows)
+
+
+if __name__ == '__main__':
+    main()
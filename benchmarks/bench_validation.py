@@ -0,0 +1,98 @@
+"""Bulk ingest validation: per-record checks versus NumPy column checks.
+
+Validates --sizes batches (with --invalid of the records broken in assorted
+ways) with a marshmallow schema per record, with api.validation's
+per-record validator, and with its NumPy column validator, and checks that
+the two api.validation paths report the same errors. Also times the whole
+POST /telemetry/bulk for the largest batch the endpoint accepts.
+"""
+import argparse
+import random
+
+from marshmallow import Schema, ValidationError, fields, validate
+
+from benchmarks.common import app, auth_headers, fresh_client, reading, report, timed
+from api import validation
+
+
+class ReadingSchema(Schema):
+    buoy_id = fields.Integer(required=True, strict=True)
+    salinity = fields.Float(required=True, allow_nan=False, validate=validate.Range(0, 70))
+    pH = fields.Float(required=True, allow_nan=False, validate=validate.Range(0, 14))
+    temperature = fields.Float(required=True, allow_nan=False, validate=validate.Range(-5, 45))
+    pollutants = fields.String(allow_none=True)
+    location = fields.String(allow_none=True)
+    timestamp = fields.DateTime(allow_none=True)
+
+
+def marshmallow_validate(schema, entries):
+    rows, errors = [], []
+    for index, entry in enumerate(entries):
+        try:
+            rows.append(schema.load(entry))
+        except ValidationError as e:
+            errors.append((index, e.messages))
+    return rows, errors
+
+
+BREAKAGES = [
+    lambda r: r.update(pH=15.2),
+    lambda r: r.update(salinity='salty'),
+    lambda r: r.pop('temperature'),
+    lambda r: r.update(salinity=float('nan')),
+    lambda r: r.update(buoy_id=True),
+]
+
+
+def batch(n, invalid, rng):
+    entries = []
+    for i in range(n):
+        entry = reading(buoy_id=1 + i % 10, i=i)
+        if rng.random() < invalid:
+            rng.choice(BREAKAGES)(entry)
+        entries.append(entry)
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--invalid', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    schema = ReadingSchema()
+    rows = []
+    with app.app_context():
+        for n in (int(size) for size in args.sizes.split(',')):
+            entries = batch(n, args.invalid, rng)
+            results = {}
+            for label, validator in (('marshmallow, per record', None), ('python', 'python'), ('numpy', 'auto')):
+                if validator is None:
+                    elapsed, _ = timed(marshmallow_validate, schema, entries)
+                else:
+                    app.config['TELEMETRY_BATCH_VALIDATOR'] = validator
+                    elapsed, results[label] = timed(validation.validate_batch, entries)
+                rows.append((f'{n:,} records: {label}', f'{elapsed * 1000:9.1f} ms ({n / elapsed:,.0f} records/s)'))
+            assert results['python'] == results['numpy']
+
+        n = app.config['TELEMETRY_BULK_MAX_ROWS']
+        entries = batch(n, 0, rng)
+        for label, validator in (('python', 'python'), ('numpy', 'auto')):
+            app.config['TELEMETRY_BATCH_VALIDATOR'] = validator
+            samples = []
+            for _ in range(args.repeat):
+                client = fresh_client()
+                headers = auth_headers(client)
+                elapsed, resp = timed(client.post, '/telemetry/bulk', json=entries, headers=headers)
+                assert resp.status_code == 201, resp.get_json()
+                samples.append(elapsed)
+            rows.append((f'POST /telemetry/bulk, {n:,} records: {label}',
+                         f'{min(samples) * 1000:9.1f} ms (best of {args.repeat})'))
+
+    report(f'Bulk validation, {args.invalid:.0%} invalid records', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Shared setup for the benchmark scripts.
+
+Benchmarks run in-process against ``app.test_client()`` with an in-memory
+SQLite database unless SQLALCHEMY_DATABASE_URI is already set. Run them from
+the repository root, e.g. ``python -m benchmarks.bench_bulk_insert``.
+"""
+import datetime
+import os
+import time
+from contextlib import contextmanager
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite:///:memory:")
+
+from sqlalchemy import event, insert  # noqa: E402
+
+from api import users  # noqa: E402
+from api.main import app, db  # noqa: E402
+from api.models import PARTITION_METADATA, Telemetry, partition_catalog  # noqa: E402
+
+
+def reading(buoy_id=1, i=0):
+    return {
+        'buoy_id': buoy_id,
+        'salinity': 30.0 + (i % 100) / 10,
+        'pH': 7.5 + (i % 10) / 10,
+        'temperature': 18.0 + (i % 50) / 5,
+        'pollutants': 'none',
+        'location': 'Gulf of Guinea'
+    }
+
+
+def auth_headers(client, username='benchadmin', role='admin'):
+    client.post('/register', json={
+        'username': username,
+        'password': 'Bench123!',
+        'email': f'{username}@example.com',
+        'role': role
+    })
+    resp = client.post('/login', json={'username': username, 'password': 'Bench123!'})
+    return {'Authorization': f"Bearer {resp.get_json()['access_token']}"}
+
+
+def fresh_client():
+    """Return a test client on an empty schema. Call inside app.app_context()."""
+    db.session.remove()
+    db.drop_all()
+    PARTITION_METADATA.drop_all(db.engine)
+    db.create_all()
+    users.clear()  # cached lookups refer to the dropped users
+    partition_catalog().invalidate()
+    return app.test_client()
+
+
+def seed_telemetry(n, buoys=10, start=None, step=datetime.timedelta(seconds=30), chunk=10000):
+    """Insert n synthetic readings spread round-robin over `buoys` buoy IDs.
+
+    Timestamps run forward from `start` (default: n steps before now), so the
+    data lands in the current quarter unless n * step is very large.
+    """
+    start = start or datetime.datetime.utcnow() - n * step
+    stmt = insert(Telemetry)
+    for offset in range(0, n, chunk):
+        rows = []
+        for i in range(offset, min(n, offset + chunk)):
+            row = reading(buoy_id=1 + i % buoys, i=i)
+            row['timestamp'] = start + i * step
+            rows.append(row)
+        db.session.execute(stmt, rows)
+    db.session.commit()
+
+
+@contextmanager
+def count_statements():
+    """Collect every SQL statement sent to the DBAPI cursor (executemany counts once)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def report(title, rows):
+    """Print a simple aligned table of (label, value) rows."""
+    print(title)
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print(f"  {label.ljust(width)}  {value}")
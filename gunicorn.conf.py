@@ -0,0 +1,31 @@
+"""gunicorn settings, taken from api.config.Config (i.e. environment variables).
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Workers are processes running SERVER_THREADS threads each; see api/server.py
+for the worker-count heuristic and SERVER_PRELOAD. `kill -HUP <master pid>`
+reloads gracefully: new workers start, and the old ones finish their
+in-flight requests (within SERVER_GRACEFUL_TIMEOUT) before exiting.
+"""
+from api import server as api_server
+from api.config import Config
+
+# Module-level names are read as gunicorn settings, hence the underscore
+_config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+
+bind = _config['SERVER_BIND']
+workers = api_server.worker_count(_config)
+worker_class = 'gthread'
+threads = _config['SERVER_THREADS']
+preload_app = _config['SERVER_PRELOAD']
+timeout = _config['SERVER_TIMEOUT']
+graceful_timeout = _config['SERVER_GRACEFUL_TIMEOUT']
+keepalive = _config['SERVER_KEEPALIVE']
+max_requests = _config['SERVER_MAX_REQUESTS']
+max_requests_jitter = max_requests // 10
+
+
+def post_fork(arbiter, worker):
+    if preload_app:
+        from wsgi import app
+        api_server.after_fork(app)
@@ -1,10 +1,74 @@
+import click
+
 from api.main import app, db
+from api import archive, partitions, profiler, rollups
 from flask_migrate import Migrate
 from flask.cli import FlaskGroup
 
 migrate = Migrate(app, db)
 
-cli = FlaskGroup(app)
+cli = FlaskGroup(create_app=lambda: app)
+
+
+@cli.command("rebuild-rollups")
+def rebuild_rollups():
+    """Recompute the hourly and daily telemetry rollups from scratch."""
+    hourly, daily = rollups.rebuild()
+    db.session.commit()
+    click.echo(f"Rebuilt {hourly} hourly and {daily} daily rollup rows")
+
+
+@cli.command("partition-telemetry")
+@click.option("--keep", default=None, type=int,
+              help="Quarters to keep in telemetry, counting the current one (default: TELEMETRY_PARTITION_KEEP_QUARTERS)")
+@click.option("--purge-delay", default=None, type=int,
+              help="Seconds between archiving a quarter and deleting it from telemetry "
+                   "(default: twice TELEMETRY_PARTITION_CATALOG_TTL)")
+@click.option("--vacuum", is_flag=True, help="VACUUM a SQLite database afterwards to return freed space")
+def partition_telemetry(keep, purge_delay, vacuum):
+    """Move closed quarters of telemetry into per-quarter, read-only tables."""
+    keep = keep or app.config["TELEMETRY_PARTITION_KEEP_QUARTERS"]
+    if purge_delay is None:
+        purge_delay = 2 * app.config["TELEMETRY_PARTITION_CATALOG_TTL"]
+    archived, purged = partitions.run(keep, purge_delay)
+    for partition in archived:
+        click.echo(f"Archived {partition.quarter}: {partition.rows} rows into {partition.table_name}")
+    for partition in purged:
+        click.echo(f"Purged {partition.quarter} from telemetry ({partition.rows} rows archived)")
+    if not archived and not purged:
+        click.echo("Nothing to archive or purge")
+    if vacuum and partitions.vacuum():
+        click.echo("Vacuumed the database")
+
+
+@cli.command("archive-telemetry")
+@click.option("--force", is_flag=True, help="Rewrite files that already exist")
+def archive_telemetry(force):
+    """Export archived telemetry quarters to Parquet files for column scans."""
+    if not archive.available():
+        raise click.ClickException("archive-telemetry needs pyarrow (pip install pyarrow)")
+    exported = archive.export_due(force)
+    for partition, size in exported:
+        click.echo(f"Exported {partition.quarter}: {partition.rows} rows, {size / 2 ** 20:.1f} MiB "
+                   f"-> {partition.archive_file}")
+    if not exported:
+        click.echo("No purged quarters left to export")
+
+
+@cli.command("profile-summary")
+@click.option("--dir", "directory", default=None, help="Dump directory (default: PROFILE_DIR)")
+@click.option("--top", default=20, show_default=True, help="Number of functions to list")
+def profile_summary(directory, top):
+    """List the hottest functions across the profiler's request dumps."""
+    dumps, samples, ranked = profiler.summarize(directory or app.config["PROFILE_DIR"], top)
+    if not samples:
+        click.echo("No profile samples found")
+        return
+    click.echo(f"{samples} samples from {dumps} dumps")
+    click.echo(f"{'self %':>7} {'total %':>8}  function")
+    for frame, self_count, total_count in ranked:
+        click.echo(f"{100 * self_count / samples:7.1f} {100 * total_count / samples:8.1f}  {frame}")
+
 
 if __name__ == "__main__":
-    cli()
\ No newline at end of file
+    cli()
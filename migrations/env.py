@@ -90,9 +90,17 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # Archived quarters' telemetry_q_* tables are created at runtime, not by
+    # migrations; keep autogenerate from proposing to drop them
+    def include_object(object, name, type_, reflected, compare_to):
+        table = object if type_ == 'table' else getattr(object, 'table', None)
+        return not (reflected and table is not None and table.name.startswith('telemetry_q_'))
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
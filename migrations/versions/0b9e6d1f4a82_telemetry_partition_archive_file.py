@@ -0,0 +1,26 @@
+"""Telemetry partitions: Parquet archive file of each quarter
+
+Revision ID: 0b9e6d1f4a82
+Revises: f2c8a4d6b357
+Create Date: 2026-10-18 18:02:47.115630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b9e6d1f4a82'
+down_revision = 'f2c8a4d6b357'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('telemetry_partition', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('archive_file', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('telemetry_partition', schema=None) as batch_op:
+        batch_op.drop_column('archive_file')
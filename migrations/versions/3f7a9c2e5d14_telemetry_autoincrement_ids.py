@@ -0,0 +1,39 @@
+"""Telemetry: never reuse ids (SQLite AUTOINCREMENT)
+
+Revision ID: 3f7a9c2e5d14
+Revises: 0b9e6d1f4a82
+Create Date: 2026-10-18 21:14:03.482917
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f7a9c2e5d14'
+down_revision = '0b9e6d1f4a82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Without AUTOINCREMENT SQLite hands out max(id) + 1, so purging the newest
+    # rows into an archived quarter let new readings take their ids. Serial ids
+    # elsewhere never repeat.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('telemetry', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+    # Start above every id used so far, archived ones included
+    op.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'telemetry', 0 "
+               "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'telemetry')")
+    op.execute("UPDATE sqlite_sequence SET seq = MAX(seq, "
+               "COALESCE((SELECT MAX(id) FROM telemetry), 0), "
+               "COALESCE((SELECT MAX(max_id) FROM telemetry_partition), 0)) "
+               "WHERE name = 'telemetry'")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('telemetry', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+        pass
@@ -0,0 +1,26 @@
+"""Telemetry: composite (buoy_id, timestamp) index for filtered listings
+
+Revision ID: 7c1e2f4a9b10
+Revises: 595d5bb04b66
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e2f4a9b10'
+down_revision = '595d5bb04b66'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('telemetry', schema=None) as batch_op:
+        batch_op.create_index('ix_telemetry_buoy_id_timestamp', ['buoy_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('telemetry', schema=None) as batch_op:
+        batch_op.drop_index('ix_telemetry_buoy_id_timestamp')
@@ -0,0 +1,41 @@
+"""Telemetry rollups: telemetry_hourly and telemetry_daily per-buoy summaries
+
+Revision ID: a3d58e6c2f71
+Revises: 7c1e2f4a9b10
+Create Date: 2026-10-18 11:40:02.551873
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d58e6c2f71'
+down_revision = '7c1e2f4a9b10'
+branch_labels = None
+depends_on = None
+
+
+def _rollup_columns():
+    columns = [
+        sa.Column('buoy_id', sa.Integer(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+    ]
+    for metric in ('salinity', 'temperature', 'ph'):
+        for stat in ('sum', 'min', 'max'):
+            columns.append(sa.Column(f'{metric}_{stat}', sa.Float(), nullable=False))
+    return columns
+
+
+def upgrade():
+    # Run `python manage.py rebuild-rollups` afterwards to backfill existing telemetry
+    op.create_table('telemetry_hourly', *_rollup_columns(),
+                    sa.PrimaryKeyConstraint('buoy_id', 'bucket_start'))
+    op.create_table('telemetry_daily', *_rollup_columns(),
+                    sa.PrimaryKeyConstraint('buoy_id', 'bucket_start'))
+
+
+def downgrade():
+    op.drop_table('telemetry_daily')
+    op.drop_table('telemetry_hourly')
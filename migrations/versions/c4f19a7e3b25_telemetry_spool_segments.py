@@ -0,0 +1,28 @@
+"""Telemetry spool: checkpoint table of replayed spool segments
+
+Revision ID: c4f19a7e3b25
+Revises: a3d58e6c2f71
+Create Date: 2026-10-18 14:12:37.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f19a7e3b25'
+down_revision = 'a3d58e6c2f71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('telemetry_spool_segment',
+                    sa.Column('name', sa.String(length=100), nullable=False),
+                    sa.Column('rows', sa.Integer(), nullable=False),
+                    sa.Column('loaded_at', sa.DateTime(), nullable=False),
+                    sa.PrimaryKeyConstraint('name'))
+
+
+def downgrade():
+    op.drop_table('telemetry_spool_segment')
@@ -0,0 +1,34 @@
+"""Telemetry: make (buoy_id, timestamp) a unique natural key
+
+Revision ID: d8a2b6e41c93
+Revises: c4f19a7e3b25
+Create Date: 2026-10-18 15:03:18.662140
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a2b6e41c93'
+down_revision = 'c4f19a7e3b25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the first copy of each duplicated reading; run
+    # `python manage.py rebuild-rollups` afterwards if any were removed.
+    op.execute(
+        'DELETE FROM telemetry WHERE id NOT IN '
+        '(SELECT MIN(id) FROM telemetry GROUP BY buoy_id, timestamp)'
+    )
+    with op.batch_alter_table('telemetry', schema=None) as batch_op:
+        batch_op.drop_index('ix_telemetry_buoy_id_timestamp')
+        batch_op.create_index('uq_telemetry_buoy_id_timestamp', ['buoy_id', 'timestamp'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('telemetry', schema=None) as batch_op:
+        batch_op.drop_index('uq_telemetry_buoy_id_timestamp')
+        batch_op.create_index('ix_telemetry_buoy_id_timestamp', ['buoy_id', 'timestamp'], unique=False)
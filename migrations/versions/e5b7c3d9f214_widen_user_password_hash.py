@@ -0,0 +1,29 @@
+"""User: widen password_hash for scrypt hashes
+
+Revision ID: e5b7c3d9f214
+Revises: d8a2b6e41c93
+Create Date: 2026-10-18 16:20:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b7c3d9f214'
+down_revision = 'd8a2b6e41c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # werkzeug's scrypt hashes are 162 characters
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=128),
+                              type_=sa.String(length=255), existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=255),
+                              type_=sa.String(length=128), existing_nullable=False)
@@ -0,0 +1,41 @@
+"""Telemetry: catalog of archived quarter partitions
+
+Revision ID: f2c8a4d6b357
+Revises: e5b7c3d9f214
+Create Date: 2026-10-18 17:05:12.640193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8a4d6b357'
+down_revision = 'e5b7c3d9f214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The per-quarter tables themselves are created by `manage.py partition-telemetry`
+    op.create_table('telemetry_partition',
+                    sa.Column('quarter', sa.String(length=6), nullable=False),
+                    sa.Column('table_name', sa.String(length=64), nullable=False),
+                    sa.Column('start', sa.DateTime(), nullable=False),
+                    sa.Column('end', sa.DateTime(), nullable=False),
+                    sa.Column('rows', sa.Integer(), nullable=False),
+                    sa.Column('min_id', sa.Integer(), nullable=True),
+                    sa.Column('max_id', sa.Integer(), nullable=True),
+                    sa.Column('archived_at', sa.DateTime(), nullable=False),
+                    sa.Column('purged_at', sa.DateTime(), nullable=True),
+                    sa.PrimaryKeyConstraint('quarter'),
+                    sa.UniqueConstraint('table_name'))
+
+
+def downgrade():
+    purged = op.get_bind().execute(
+        sa.text('SELECT quarter FROM telemetry_partition WHERE purged_at IS NOT NULL')).scalars().all()
+    if purged:
+        raise RuntimeError(f"Quarters {', '.join(purged)} exist only in their partition tables; "
+                           "copy them back into telemetry before downgrading")
+    op.drop_table('telemetry_partition')
@@ -1,6 +1,17 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+import time
+
 import pytest
-from api.main import app, db
-from api.models import User
+from sqlalchemy import create_engine, event, text
+
+from api import (archive, cache, formats, ingest, json_provider, metrics, partitions, profiler, rollups, server, spool, sqlite,
+                 users, validation)
+from api.main import app, db, encode_cursor
+from api.models import PARTITION_METADATA, SpoolSegment, User, Telemetry, partition_catalog
 
 @pytest.fixture
 def client():
@@ -8,9 +19,14 @@ def client():
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     with app.app_context():
         db.create_all()
+        cache.clear()
+        ingest.recent_readings(app).clear()
+        users.clear()
+        partition_catalog().invalidate()
         yield app.test_client()
         db.session.remove()
         db.drop_all()
+        PARTITION_METADATA.drop_all(db.engine)
 
 def test_register_and_login(client):
     # Register
@@ -56,4 +72,730 @@ def test_telemetry_create(client):
     }, headers={'Authorization': f'Bearer {token}'})
     assert response.status_code == 201
     data = response.get_json()
-    assert 'id' in data or 'data' in data
\ No newline at end of file
+    assert 'id' in data or 'data' in data
+
+def _auth_headers(client, username, role):
+    client.post('/register', json={
+        'username': username,
+        'password': 'Secret123!',
+        'email': f'{username}@example.com',
+        'role': role
+    })
+    login_resp = client.post('/login', json={
+        'username': username,
+        'password': 'Secret123!'
+    })
+    return {'Authorization': f"Bearer {login_resp.get_json()['access_token']}"}
+
+
+def _reading(buoy_id=1, **overrides):
+    reading = {
+        'buoy_id': buoy_id,
+        'salinity': 35.2,
+        'pH': 8.1,
+        'temperature': 23.3,
+        'pollutants': 'none',
+        'location': 'Gulf of Guinea'
+    }
+    reading.update(overrides)
+    return reading
+
+
+def test_telemetry_bulk_create(client):
+    headers = _auth_headers(client, 'bulkadmin', 'admin')
+    app.config['TELEMETRY_BULK_CHUNK_SIZE'] = 2
+    try:
+        response = client.post('/telemetry/bulk', json=[
+            _reading(salinity=30.0 + i) for i in range(5)
+        ], headers=headers)
+    finally:
+        app.config['TELEMETRY_BULK_CHUNK_SIZE'] = 500
+    assert response.status_code == 201
+    created_ids = response.get_json()['created_ids']
+    assert len(created_ids) == 5
+
+    response = client.get('/telemetry/bulk', query_string={'ids': created_ids}, headers=headers)
+    salinities = sorted(r['salinity'] for r in response.get_json()['data'])
+    assert salinities == [30.0, 31.0, 32.0, 33.0, 34.0]
+
+
+def test_telemetry_bulk_create_rejects_whole_batch(client):
+    headers = _auth_headers(client, 'bulkadmin', 'admin')
+    response = client.post('/telemetry/bulk', json=[
+        _reading(), _reading(pH='acidic')
+    ], headers=headers)
+    assert response.status_code == 400
+    assert 'Record 1' in response.get_json()['msg']
+
+    response = client.get('/telemetry/bulk', query_string={'ids': [1]}, headers=headers)
+    assert response.get_json()['data'] == []
+
+
+def test_bulk_validation_reports_every_invalid_record(client, monkeypatch):
+    headers = _auth_headers(client, 'validadmin', 'admin')
+    batch = [_reading(), _reading(pH=14.5), 'nope', _reading(salinity=float('nan')), _reading(pH=True),
+             _reading(temperature=None), _reading(buoy_id='7'), _reading(timestamp='yesterday'),
+             _reading(salinity=5, temperature=-2), _reading(pollutants={'x': 1}), _reading(location=['Bay A'])]
+    expected = [(1, 'has pH outside [0, 14]'), (2, 'must be an object'), (3, 'has a non-finite salinity'),
+                (4, 'has a non-numeric pH'), (5, 'is missing required field: temperature'),
+                (6, 'has a non-integer buoy_id'), (7, 'has an invalid timestamp'),
+                (9, 'has a non-string pollutants'), (10, 'has a non-string location')]
+    for validator in ('auto', 'python'):
+        monkeypatch.setitem(app.config, 'TELEMETRY_BATCH_VALIDATOR', validator)
+        rows, errors = validation.validate_batch(batch)
+        assert errors == expected
+        assert [row['salinity'] for row in rows] == [35.2, 5]
+    assert validation.validate_record(_reading(location=b'Bay A')) == (None, 'has a non-string location')
+
+    del batch[3]  # NaN isn't valid JSON
+    resp = client.post('/telemetry/bulk', json=batch, headers=headers)
+    assert resp.status_code == 400
+    assert resp.get_json()['msg'] == 'Record 1 has pH outside [0, 14]'
+    assert [e['index'] for e in resp.get_json()['errors']] == [1, 2, 3, 4, 5, 6, 8, 9]
+    resp = client.post('/telemetry/bulk', query_string={'partial': 'true'}, json=batch, headers=headers)
+    assert resp.status_code == 201
+    assert len(resp.get_json()['created_ids']) == 2
+    assert [e['index'] for e in resp.get_json()['rejected']] == [1, 2, 3, 4, 5, 6, 8, 9]
+
+
+def test_binary_ingest_formats(client, monkeypatch):
+    msgpack = pytest.importorskip('msgpack')
+    headers = _auth_headers(client, 'frameadmin', 'admin')
+    taken = datetime.datetime.utcnow().replace(microsecond=0)
+    readings = [{'buoy_id': 1, 'salinity': 35.25, 'pH': 8.0, 'temperature': 12.5,
+                 'timestamp': taken - datetime.timedelta(minutes=i)} for i in range(3)]
+
+    frame = formats.encode_frame(readings, float64=True)
+    assert len(frame) == 16 + 3 * 36
+    resp = client.post('/telemetry/bulk', data=frame, content_type=formats.FRAME_MIMETYPE, headers=headers)
+    assert resp.status_code == 201
+    [tid, *_] = resp.get_json()['created_ids']
+    stored = client.get(f'/telemetry/{tid}', headers=headers).get_json()['data']
+    assert (stored['salinity'], stored['timestamp'][:19]) == (35.25, taken.isoformat())
+
+    # float32 values, no timestamps; out-of-range readings are reported like JSON ones
+    frame = formats.encode_frame([{**readings[0], 'timestamp': None}, {**readings[1], 'pH': 15.0}])
+    resp = client.post('/telemetry/bulk', data=frame, content_type=formats.FRAME_MIMETYPE, headers=headers)
+    assert resp.get_json()['errors'] == [{'index': 1, 'msg': 'Record 1 has pH outside [0, 14]'}]
+    resp = client.post('/telemetry/bulk', data=frame[:-1], content_type=formats.FRAME_MIMETYPE, headers=headers)
+    assert resp.status_code == 400
+    # Timestamps outside datetime's range, also without NumPy
+    frame = formats.encode_frame(readings[:1])
+    frame = frame[:16] + (2 ** 62).to_bytes(8, 'little') + frame[24:]
+    for numpy in (formats.numpy, None):
+        monkeypatch.setattr(formats, 'numpy', numpy)
+        resp = client.post('/telemetry/bulk', data=frame, content_type=formats.FRAME_MIMETYPE, headers=headers)
+        assert resp.get_json()['errors'] == [{'index': 0, 'msg': 'Record 0 has an invalid timestamp'}]
+
+    taken_utc = (taken - datetime.timedelta(hours=1)).replace(tzinfo=datetime.timezone.utc)
+    body = msgpack.packb(_reading(timestamp=taken_utc), datetime=True)
+    resp = client.post('/telemetry', data=body, content_type='application/msgpack', headers=headers)
+    assert resp.status_code == 201
+    body = msgpack.packb([_reading(), _reading(pH='8')])
+    resp = client.post('/telemetry/bulk', query_string={'partial': 'true'}, data=body,
+                       content_type='application/msgpack', headers=headers)
+    assert resp.status_code == 201 and [e['index'] for e in resp.get_json()['rejected']] == [1]
+    resp = client.post('/telemetry', data=b'\xc1', content_type='application/msgpack', headers=headers)
+    assert resp.status_code == 400
+
+
+def test_content_encoding(client, monkeypatch):
+    headers = _auth_headers(client, 'gzipadmin', 'admin')
+    body = gzip.compress(json.dumps([_reading() for _ in range(50)]).encode())
+    resp = client.post('/telemetry/bulk', data=body, content_type='application/json',
+                       headers={**headers, 'Content-Encoding': 'gzip'})
+    assert resp.status_code == 201
+    ids = resp.get_json()['created_ids']
+
+    resp = client.get('/telemetry/bulk', query_string={'ids': ids}, headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip' and 'Accept-Encoding' in resp.headers['Vary']
+    assert len(json.loads(gzip.decompress(resp.get_data()))['data']) == 50
+    etag = resp.headers['ETag']
+    assert etag.startswith('W/')
+    resp = client.get('/telemetry/bulk', query_string={'ids': ids},
+                      headers={**headers, 'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert resp.status_code == 304
+    resp = client.get(f'/telemetry/{ids[0]}', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in resp.headers  # below COMPRESSION_MIN_SIZE
+
+    # Streamed exports are compressed chunk by chunk
+    plain = client.get('/telemetry/export', headers=headers).get_data()
+    resp = client.get('/telemetry/export', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert resp.headers['Content-Encoding'] == 'gzip' and gzip.decompress(resp.get_data()) == plain
+
+    monkeypatch.setitem(app.config, 'COMPRESSION_MAX_INFLATED_BYTES', 10000)
+    bomb = gzip.compress(b'[' + b' ' * 1000000 + b']')
+    resp = client.post('/telemetry/bulk', data=bomb, content_type='application/json',
+                       headers={**headers, 'Content-Encoding': 'gzip'})
+    assert resp.status_code == 413 and 'exceeds 10000 bytes' in resp.get_json()['msg']
+    resp = client.post('/telemetry/bulk', data=b'not gzip', content_type='application/json',
+                       headers={**headers, 'Content-Encoding': 'gzip'})
+    assert resp.status_code == 400
+    resp = client.post('/telemetry/bulk', data=body, content_type='application/json',
+                       headers={**headers, 'Content-Encoding': 'br'})
+    assert resp.status_code == 415
+
+
+def _count_statements(fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+
+def test_telemetry_bulk_update_and_delete(client):
+    headers = _auth_headers(client, 'bulkadmin', 'admin')
+    ids = client.post('/telemetry/bulk', json=[_reading() for _ in range(3)],
+                      headers=headers).get_json()['created_ids']
+
+    response = client.put('/telemetry/bulk', json=[
+        {'id': ids[0], 'salinity': 1.0},
+        {'id': ids[1], 'location': 'Bay A'},
+        {'id': ids[0], 'pH': 7.0},
+    ], headers=headers)
+    assert response.status_code == 200
+    first = client.get(f'/telemetry/{ids[0]}', headers=headers).get_json()['data']
+    assert (first['salinity'], first['pH'], first['location']) == (1.0, 7.0, 'Gulf of Guinea')
+    second = client.get(f'/telemetry/{ids[1]}', headers=headers).get_json()['data']
+    assert second['location'] == 'Bay A'
+
+    response = client.delete('/telemetry/bulk', json={'ids': ids[:2] + [9999]}, headers=headers)
+    assert response.status_code == 200
+    remaining = client.get('/telemetry/bulk', query_string={'ids': ids}, headers=headers)
+    assert [r['id'] for r in remaining.get_json()['data']] == [ids[2]]
+
+
+def test_telemetry_bulk_mutations_report_offending_id(client):
+    headers = _auth_headers(client, 'bulkadmin', 'admin')
+    current_id = client.post('/telemetry', json=_reading(), headers=headers).get_json()['id']
+    old = Telemetry(timestamp=datetime.datetime(2000, 1, 1), **_reading())
+    db.session.add(old)
+    db.session.commit()
+
+    response = client.put('/telemetry/bulk', json=[{'id': current_id}, {'id': 4242}], headers=headers)
+    assert response.status_code == 404
+    assert 'ID 4242' in response.get_json()['msg']
+
+    response = client.put('/telemetry/bulk', json=[{'id': current_id}, {'id': old.id}], headers=headers)
+    assert response.status_code == 403
+    assert f'ID: {old.id}' in response.get_json()['msg']
+
+    response = client.delete('/telemetry/bulk', json={'ids': [current_id, old.id]}, headers=headers)
+    assert response.status_code == 403
+    assert f'ID: {old.id}' in response.get_json()['msg']
+    assert client.get(f'/telemetry/{current_id}', headers=headers).status_code == 200
+
+
+def test_telemetry_bulk_mutations_statement_count_is_constant(client):
+    headers = _auth_headers(client, 'bulkadmin', 'admin')
+
+    def run(n):
+        ids = client.post('/telemetry/bulk', json=[_reading() for _ in range(n)],
+                          headers=headers).get_json()['created_ids']
+        updates = _count_statements(lambda: client.put(
+            '/telemetry/bulk', json=[{'id': tid, 'salinity': 1.0} for tid in ids], headers=headers))
+        deletes = _count_statements(lambda: client.delete(
+            '/telemetry/bulk', json={'ids': ids}, headers=headers))
+        return updates, deletes
+
+    assert run(3) == run(60)
+
+
+def test_telemetry_list_keyset_pagination(client):
+    headers = _auth_headers(client, 'listadmin', 'admin')
+    base = datetime.datetime.utcnow().replace(microsecond=0)
+    for i in range(7):
+        db.session.add(Telemetry(timestamp=base - datetime.timedelta(hours=i), **_reading(buoy_id=1 + i % 2)))
+    db.session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {'buoy_id': 1, 'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        body = client.get('/telemetry', query_string=params, headers=headers).get_json()
+        seen.extend(body['data'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    timestamps = [r['timestamp'] for r in seen]
+    assert len(seen) == 4
+    assert timestamps == sorted(timestamps, reverse=True)
+    assert {r['buoy_id'] for r in seen} == {1}
+
+    since = (base - datetime.timedelta(hours=2, minutes=30)).isoformat()
+    body = client.get('/telemetry', query_string={'since': since}, headers=headers).get_json()
+    assert len(body['data']) == 3
+    assert body['next_cursor'] is None
+
+    response = client.get('/telemetry', query_string={'cursor': 'not-a-cursor'}, headers=headers)
+    assert response.status_code == 400
+    cursor = encode_cursor(datetime.datetime.max, 1)
+    assert client.get('/telemetry', query_string={'cursor': cursor}, headers=headers).status_code == 400
+    # Converting to UTC would leave the datetime range
+    for path in ('/telemetry', '/telemetry/export', '/telemetry/aggregate'):
+        response = client.get(path, query_string={'since': '0001-01-01T00:00:00+01:00', 'bucket': 'hour'},
+                              headers=headers)
+        assert response.status_code == 400
+
+
+def test_telemetry_export_streams_ndjson_and_csv(client):
+    headers = _auth_headers(client, 'exportadmin', 'admin')
+    client.post('/telemetry/bulk', json=[_reading(buoy_id=1 + i % 2, salinity=30.0 + i) for i in range(5)],
+                headers=headers)
+
+    response = client.get('/telemetry/export', query_string={'buoy_id': 1}, headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r['salinity'] for r in lines] == [30.0, 32.0, 34.0]
+    assert lines[0]['location'] == 'Gulf of Guinea'
+
+    consumer = _auth_headers(client, 'exportconsumer', 'consumer')
+    response = client.get('/telemetry/export', query_string={'format': 'csv'}, headers=consumer)
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0] == ['id', 'timestamp', 'salinity', 'pH']
+    assert len(rows) == 6
+
+
+def test_telemetry_aggregate_by_bucket(client):
+    headers = _auth_headers(client, 'aggadmin', 'admin')
+    base = datetime.datetime(2026, 1, 5, 10, 0)
+    for minutes, buoy_id, salinity in [(0, 1, 30.0), (20, 1, 34.0), (70, 1, 31.0), (5, 2, 40.0)]:
+        db.session.add(Telemetry(timestamp=base + datetime.timedelta(minutes=minutes),
+                                 **_reading(buoy_id=buoy_id, salinity=salinity)))
+    assert rollups.rebuild() == (3, 2)
+    db.session.commit()
+
+    body = client.get('/telemetry/aggregate', query_string={'bucket': 'hour'}, headers=headers).get_json()
+    buckets = [(r['bucket_start'], r['buoy_id'], r['count'], r['salinity']) for r in body['data']]
+    assert buckets == [
+        ('2026-01-05T10:00:00', 1, 2, {'min': 30.0, 'max': 34.0, 'avg': 32.0}),
+        ('2026-01-05T10:00:00', 2, 1, {'min': 40.0, 'max': 40.0, 'avg': 40.0}),
+        ('2026-01-05T11:00:00', 1, 1, {'min': 31.0, 'max': 31.0, 'avg': 31.0}),
+    ]
+
+    consumer = _auth_headers(client, 'aggconsumer', 'consumer')
+    body = client.get('/telemetry/aggregate', query_string={'bucket': 'day'}, headers=consumer).get_json()
+    assert body['data'] == [{
+        'bucket_start': '2026-01-05T00:00:00',
+        'count': 4,
+        'salinity': {'min': 30.0, 'max': 40.0, 'avg': 33.75},
+        'pH': {'min': 8.1, 'max': 8.1, 'avg': pytest.approx(8.1)},
+    }]
+
+
+def test_telemetry_rollups_follow_writes(client):
+    headers = _auth_headers(client, 'rollupadmin', 'admin')
+    ids = client.post('/telemetry/bulk', json=[_reading(buoy_id=1 + i % 2, salinity=30.0 + i) for i in range(6)],
+                      headers=headers).get_json()['created_ids']
+    client.post('/telemetry', json=_reading(buoy_id=2, salinity=50.0), headers=headers)
+    client.put(f'/telemetry/{ids[0]}', json={'salinity': 10.0, 'buoy_id': 3}, headers=headers)
+    client.put('/telemetry/bulk', json=[{'id': ids[1], 'salinity': 60.0}], headers=headers)
+    client.delete(f'/telemetry/{ids[2]}', headers=headers)
+    client.delete('/telemetry/bulk', json={'ids': [ids[3]]}, headers=headers)
+
+    def aggregate(bucket):
+        data = client.get('/telemetry/aggregate', query_string={'bucket': bucket},
+                          headers=headers).get_json()['data']
+        for row in data:
+            for metric in ('salinity', 'temperature', 'pH'):
+                row[metric]['avg'] = round(row[metric]['avg'], 9)
+        return data
+
+    from_rollups = {bucket: aggregate(bucket) for bucket in ('hour', 'day')}
+    app.config['TELEMETRY_ROLLUPS_ENABLED'] = False
+    try:
+        from_raw = {bucket: aggregate(bucket) for bucket in ('hour', 'day')}
+    finally:
+        app.config['TELEMETRY_ROLLUPS_ENABLED'] = True
+    assert from_rollups == from_raw
+    assert sorted(r['buoy_id'] for r in from_rollups['day']) == [1, 2, 3]
+
+
+def test_permissions_by_role(client):
+    admin = _auth_headers(client, 'rbacadmin', 'admin')
+    researcher = _auth_headers(client, 'rbacresearcher', 'researcher')
+    consumer = _auth_headers(client, 'rbacconsumer', 'consumer')
+
+    tid = client.post('/telemetry', json=_reading(), headers=researcher).get_json()['id']
+    assert client.post('/telemetry', json=_reading(), headers=consumer).status_code == 403
+    assert client.put(f'/telemetry/{tid}', json={'pH': 7.0}, headers=researcher).status_code == 403
+    assert client.delete(f'/telemetry/{tid}', headers=researcher).status_code == 403
+
+    data = client.get(f'/telemetry/{tid}', headers=consumer).get_json()['data']
+    assert set(data) == {'id', 'timestamp', 'salinity', 'pH'}
+    data = client.get(f'/telemetry/{tid}', headers=admin).get_json()['data']
+    assert 'location' in data
+    assert client.get(f'/telemetry/{tid}').status_code == 401
+
+
+def test_token_cache_only_serves_verified_unexpired_tokens(client):
+    headers = _auth_headers(client, 'cacheadmin', 'admin')
+    cache = app.extensions['token_cache']
+    cache.clear()
+    assert client.get('/telemetry', headers=headers).status_code == 200
+    assert cache.get(headers['Authorization']) is not None
+    assert client.get('/telemetry', headers=headers).status_code == 200
+
+    tampered = {'Authorization': headers['Authorization'][:-2] + 'xx'}
+    assert client.get('/telemetry', headers=tampered).status_code == 401
+    assert cache.get(tampered['Authorization']) is None
+
+    cache.put('Bearer expired', {}, {'role': 'admin', 'exp': 0})
+    assert cache.get('Bearer expired') is None
+
+
+def test_telemetry_read_cache_and_etags(client):
+    headers = _auth_headers(client, 'readcacheadmin', 'admin')
+    tid = client.post('/telemetry', json=_reading(), headers=headers).get_json()['id']
+    old = Telemetry(timestamp=datetime.datetime(2000, 1, 1), **_reading())
+    db.session.add(old)
+    db.session.commit()
+
+    first = client.get(f'/telemetry/{tid}', headers=headers)
+    assert first.headers['ETag']
+    assert _count_statements(lambda: client.get(f'/telemetry/{tid}', headers=headers)) == 0
+    response = client.get(f'/telemetry/{tid}', headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304 and response.get_data() == b''
+
+    client.put(f'/telemetry/{tid}', json={'pH': 7.0}, headers=headers)
+    updated = client.get(f'/telemetry/{tid}', headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert updated.status_code == 200 and updated.get_json()['data']['pH'] == 7.0
+
+    bulk = client.get('/telemetry/bulk', query_string={'ids': [old.id, tid, 9999]}, headers=headers)
+    assert [r['id'] for r in bulk.get_json()['data']] == [old.id, tid]
+    response = client.get('/telemetry/bulk', query_string={'ids': [old.id, tid, 9999]},
+                          headers={**headers, 'If-None-Match': bulk.headers['ETag']})
+    assert response.status_code == 304
+
+    client.delete('/telemetry/bulk', json={'ids': [tid]}, headers=headers)
+    assert client.get(f'/telemetry/{tid}', headers=headers).status_code == 404
+
+
+def test_telemetry_ingest_skips_duplicate_readings(client):
+    headers = _auth_headers(client, 'dedupadmin', 'admin')
+    base = datetime.datetime.utcnow().replace(microsecond=0) - datetime.timedelta(minutes=1)
+    reading = _reading(timestamp=base.isoformat() + 'Z')
+    later = (base + datetime.timedelta(seconds=30)).isoformat()
+    first = client.post('/telemetry', json=reading, headers=headers)
+    assert first.status_code == 201
+    tid = first.get_json()['id']
+
+    retry = client.post('/telemetry', json=reading, headers=headers)
+    assert (retry.status_code, retry.get_json()['id']) == (200, tid)
+    ingest.recent_readings(app).clear()
+    retry = client.post('/telemetry', json=reading, headers=headers)
+    assert (retry.status_code, retry.get_json()['id']) == (200, tid)
+
+    response = client.post('/telemetry/bulk', json=[
+        reading, _reading(timestamp=later), _reading(timestamp=later)
+    ], headers=headers)
+    assert response.status_code == 201
+    assert len(response.get_json()['created_ids']) == 1
+    assert response.get_json()['duplicates'] == [0, 2]
+    assert client.get('/telemetry', headers=headers).get_json()['data'][0]['id'] != tid
+
+    # Converting to UTC would leave the datetime range
+    early = _reading(timestamp='0001-01-01T00:00:00+01:00')
+    response = client.post('/telemetry', json=early, headers=headers)
+    assert response.status_code == 400
+    response = client.post('/telemetry/bulk', json=[_reading(), early], headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'index': 1, 'msg': 'Record 1 has an invalid timestamp'}]
+
+    client.delete(f'/telemetry/{tid}', headers=headers)
+    assert client.post('/telemetry', json=reading, headers=headers).status_code == 201
+    assert client.post('/telemetry', json=_reading(timestamp='yesterday'), headers=headers).status_code == 400
+
+
+def test_async_ingest_queues_and_batches_writes(client, monkeypatch):
+    headers = _auth_headers(client, 'ingestadmin', 'admin')
+    monkeypatch.setitem(app.config, 'TELEMETRY_INGEST_QUEUE_SIZE', 3)
+    ingest_queue = ingest.IngestQueue(app)
+    monkeypatch.setitem(app.extensions, 'ingest_queue', ingest_queue)
+
+    assert client.post('/telemetry', json=_reading(pH='acidic'), headers=headers).status_code == 400
+    for i in range(3):
+        assert client.post('/telemetry', json=_reading(salinity=30.0 + i), headers=headers).status_code == 202
+    response = client.post('/telemetry', json=_reading(), headers=headers)
+    assert response.status_code == 429 and response.headers['Retry-After']
+    status = client.get('/telemetry/ingest/status', headers=headers).get_json()
+    assert (status['queue_depth'], status['accepted'], status['rejected']) == (3, 3, 1)
+
+    ingest_queue.start()
+    ingest_queue.flush()
+    ingest_queue.stop()
+    status = client.get('/telemetry/ingest/status', headers=headers).get_json()
+    assert (status['queue_depth'], status['written'], status['batches']) == (0, 3, 1)
+    data = client.get('/telemetry', headers=headers).get_json()['data']
+    assert sorted(r['salinity'] for r in data) == [30.0, 31.0, 32.0]
+
+    # A reading the database rejects is set aside; the rest of its batch is written
+    rows = [_reading(salinity=40.0), _reading(pollutants={'x': 1}), _reading(salinity=41.0)]
+    ingest.stamp_receive_time(rows)
+    ingest_queue._write(rows)
+    status = ingest_queue.status()
+    assert (status['written'], status['failed']) == (5, 1) and status['last_error']
+
+
+def test_spool_replays_leftovers_once_at_startup(client, monkeypatch, tmp_path):
+    headers = _auth_headers(client, 'spooladmin', 'admin')
+    monkeypatch.setitem(app.config, 'TELEMETRY_SPOOL_DIR', str(tmp_path))
+    crashed = spool.Spool(app)
+    monkeypatch.setitem(app.extensions, 'ingest_queue', crashed)
+    for i in range(3):
+        assert client.post('/telemetry', json=_reading(salinity=30.0 + i), headers=headers).status_code == 202
+    crashed._file.close()
+
+    row = {**_reading(salinity=99.0), 'timestamp': datetime.datetime.utcnow()}
+    # A torn append at the tail was never acknowledged and is dropped
+    with open(crashed.path, 'ab') as f:
+        f.write(spool.encode_record(row)[:-3])
+    # A segment committed just before the crash must not be loaded twice
+    (tmp_path / '1-loaded.segment').write_bytes(spool.encode_record(row))
+    db.session.add(SpoolSegment(name='1-loaded.segment', rows=1))
+    db.session.commit()
+
+    restarted = spool.Spool(app)
+    restarted.start()
+    restarted.stop()
+    data = client.get('/telemetry', headers=headers).get_json()['data']
+    assert sorted(r['salinity'] for r in data) == [30.0, 31.0, 32.0]
+    assert [p.name for p in tmp_path.iterdir()] == [spool.ACTIVE_NAME]
+    assert restarted.status()['pending_bytes'] == 0
+
+    # A reading the database rejects is set aside; the rest of its segment and later segments still load
+    now = datetime.datetime.utcnow()
+    restarted = spool.Spool(app)
+    restarted.submit({**_reading(salinity=40.0), 'timestamp': now})
+    restarted.submit({**_reading(pollutants={'x': 1}), 'timestamp': now + datetime.timedelta(seconds=1)})
+    restarted._rotate()
+    restarted.submit({**_reading(salinity=41.0), 'timestamp': now + datetime.timedelta(seconds=2)})
+    restarted.stop()
+    status = restarted.status()
+    assert (status['written'], status['failed'], status['pending_bytes']) == (2, 1, 0)
+    [line] = (tmp_path / spool.REJECTED_NAME).read_text().splitlines()
+    assert json.loads(line)['reading']['pollutants'] == {'x': 1}
+
+
+def test_sqlite_profile_applies_pragmas_on_connect(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    sqlite.configure_engine(engine, app.config['SQLITE_PRAGMAS'])
+    with engine.connect() as conn:
+        assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+        assert conn.execute(text('PRAGMA busy_timeout')).scalar() == app.config['SQLITE_PRAGMAS']['busy_timeout']
+    engine.dispose()
+
+
+def test_metrics_report_latency_and_sql_per_route(client, monkeypatch):
+    headers = _auth_headers(client, 'metricsadmin', 'admin')
+    monkeypatch.setitem(app.extensions, 'metrics', metrics.RequestMetrics(app))
+    ids = client.post('/telemetry/bulk', json=[_reading() for _ in range(3)],
+                      headers=headers).get_json()['created_ids']
+    client.get('/telemetry/bulk', query_string={'ids': ids}, headers=headers)
+
+    text = client.get('/metrics').get_data(as_text=True)
+    route = 'method="GET",route="/telemetry/bulk"'
+    assert f'http_request_duration_seconds_count{{{route},status="200"}} 1' in text
+    assert f'db_statements_per_request_count{{{route}}} 1' in text
+    assert f'db_statements_total{{{route}}} 1' in text
+    assert 'route="/metrics"' not in text
+
+
+def test_login_rehashes_passwords_and_refresh_issues_access_tokens(client, monkeypatch):
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    credentials = {'username': 'device7', 'password': 'Device123!'}
+    client.post('/register', json={**credentials, 'email': 'device7@example.com', 'role': 'researcher'})
+    assert User.query.filter_by(username='device7').one().password_hash.startswith('pbkdf2:sha256:1000$')
+
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:2000')
+    tokens = client.post('/login', json=credentials).get_json()
+    db.session.expire_all()
+    assert User.query.filter_by(username='device7').one().password_hash.startswith('pbkdf2:sha256:2000$')
+    assert client.post('/login', json={**credentials, 'password': 'wrong'}).status_code == 401
+
+    refresh_headers = {'Authorization': f"Bearer {tokens['refresh_token']}"}
+    resp = client.post('/refresh', headers=refresh_headers)
+    assert resp.status_code == 200
+    access_headers = {'Authorization': f"Bearer {resp.get_json()['access_token']}"}
+    assert client.get('/telemetry', headers=access_headers).status_code == 200
+    # Each token only works where it belongs
+    assert client.get('/telemetry', headers=refresh_headers).status_code == 401
+    assert client.post('/refresh', headers=access_headers).status_code == 401
+
+
+def test_user_cache_absorbs_unknown_logins_and_validates_buoys(client, monkeypatch):
+    headers = _auth_headers(client, 'buoyadmin', 'admin')
+    ghost = {'username': 'ghost', 'password': 'Ghost123!'}
+    assert client.post('/login', json=ghost).status_code == 401
+    assert _count_statements(lambda: client.post('/login', json=ghost)) == 0
+
+    # Registering drops the cached miss
+    client.post('/register', json={**ghost, 'email': 'ghost@example.com', 'role': 'user'})
+    assert client.post('/login', json=ghost).status_code == 201
+
+    monkeypatch.setitem(app.config, 'TELEMETRY_VALIDATE_BUOY_IDS', True)
+    ghost_id = User.query.filter_by(username='ghost').one().id
+    resp = client.post('/telemetry/bulk', json=[_reading(buoy_id=ghost_id), _reading(buoy_id=99)], headers=headers)
+    assert resp.status_code == 400
+    assert resp.get_json()['msg'] == 'Record 1 has an unknown buoy_id: 99'
+    assert _count_statements(lambda: users.missing_ids([1, ghost_id, 99])) == 0
+    resp = client.post('/telemetry/bulk', json=[_reading(buoy_id=1), _reading(buoy_id=ghost_id)], headers=headers)
+    assert resp.status_code == 201
+
+
+def test_profiler_dumps_slow_requests_and_summarizes(monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setitem(app.config, 'PROFILE_SLOW_MS', 0)
+    monkeypatch.setitem(app.config, 'PROFILE_SAMPLE_RATE', 0.0)
+    sampler = profiler.Sampler(0.001)
+    sampler.start()
+    monkeypatch.setitem(app.extensions, 'profiler', sampler)
+
+    def slow_handler():
+        time.sleep(0.05)
+
+    with app.test_request_context('/telemetry', method='POST', headers={'X-Request-ID': 'req-1'}):
+        profiler._start_request()
+        slow_handler()
+        assert profiler._finish_request(app.make_response('')).headers['X-Request-ID'] == 'req-1'
+        profiler._dump_if_wanted(None)
+
+    assert [p.name for p in tmp_path.iterdir()] == ['POST_telemetry-req_1.collapsed']
+    dumps, samples, ranked = profiler.summarize(str(tmp_path))
+    assert dumps == 1 and samples > 0
+    assert ranked[0][0].startswith('slow_handler (test_api.py:')
+
+
+def test_server_worker_count_heuristic(monkeypatch):
+    monkeypatch.setattr(server, 'available_cpus', lambda: 4)
+    config = {'SERVER_WORKERS': 0, 'SERVER_PRELOAD': False, 'TELEMETRY_INGEST_MODE': 'sync'}
+    assert server.worker_count(config) == 9
+    assert server.worker_count({**config, 'SERVER_WORKERS': 3}) == 3
+    assert server.worker_count({**config, 'SERVER_PRELOAD': True}) == 9
+    assert server.worker_count({**config, 'TELEMETRY_INGEST_MODE': 'spool'}) == 1
+    with pytest.raises(ValueError):
+        server.worker_count({**config, 'SERVER_WORKERS': 2, 'TELEMETRY_INGEST_MODE': 'spool'})
+    with pytest.raises(ValueError):
+        server.worker_count({**config, 'SERVER_PRELOAD': True, 'TELEMETRY_INGEST_MODE': 'spool'})
+
+
+def test_closed_quarters_are_archived_and_still_readable(client):
+    headers = _auth_headers(client, 'partitionadmin', 'admin')
+    old = datetime.datetime(2025, 2, 1, 10, 0)
+    for i in range(3):
+        db.session.add(Telemetry(timestamp=old + datetime.timedelta(minutes=20 * i), **_reading(salinity=30.0 + i)))
+    db.session.commit()
+    old_ids = [t.id for t in Telemetry.query.order_by(Telemetry.id)]
+    new_ids = client.post('/telemetry/bulk', json=[_reading(salinity=40.0), _reading(salinity=41.0)],
+                          headers=headers).get_json()['created_ids']
+
+    # Archived but not yet purged: reads already come from the quarter's table
+    archived, purged = partitions.run(keep=2, purge_delay=3600)
+    assert archived[0].quarter == '2025q1' and archived[0].rows == 3 and not purged
+    assert client.get(f'/telemetry/{old_ids[0]}', headers=headers).get_json()['data']['salinity'] == 30.0
+    archived, purged = partitions.run(keep=2, purge_delay=0)
+    assert not archived and purged[0].quarter == '2025q1'
+    assert Telemetry.query.count() == 2
+
+    resp = client.get('/telemetry/bulk', query_string={'ids': [new_ids[0], old_ids[2]]}, headers=headers)
+    assert [r['salinity'] for r in resp.get_json()['data']] == [40.0, 32.0]
+    seen, cursor = [], None
+    while True:
+        body = client.get('/telemetry', query_string={'limit': 2, **({'cursor': cursor} if cursor else {})},
+                          headers=headers).get_json()
+        seen += [r['id'] for r in body['data']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert seen == new_ids[::-1] + old_ids[::-1]
+    lines = client.get('/telemetry/export', headers=headers).get_data(as_text=True).splitlines()
+    assert [json.loads(line)['id'] for line in lines] == old_ids + new_ids
+    until = {'until': '2025-04-01T00:00:00'}
+    assert len(client.get('/telemetry', query_string=until, headers=headers).get_json()['data']) == 3
+
+    # Archived quarters are read-only
+    assert client.put(f'/telemetry/{old_ids[0]}', json={'salinity': 1.0}, headers=headers).status_code == 403
+    assert client.delete('/telemetry/bulk', json={'ids': [old_ids[1]]}, headers=headers).status_code == 403
+    resp = client.post('/telemetry', json=_reading(timestamp='2025-03-01T00:00:00Z'), headers=headers)
+    assert resp.status_code == 403
+
+    assert rollups.rebuild() == (2, 2)
+    app.config['TELEMETRY_ROLLUPS_ENABLED'] = False
+    try:
+        body = client.get('/telemetry/aggregate', query_string={'bucket': 'hour'}, headers=headers).get_json()
+    finally:
+        app.config['TELEMETRY_ROLLUPS_ENABLED'] = True
+    assert body['data'][0]['count'] == 3 and body['data'][0]['salinity']['avg'] == 31.0
+
+
+def test_ids_are_not_reused_after_purging_every_reading(client):
+    headers = _auth_headers(client, 'purgeadmin', 'admin')
+    old = datetime.datetime(2025, 2, 1, 10, 0)
+    for i in range(2):
+        db.session.add(Telemetry(timestamp=old + datetime.timedelta(minutes=i), **_reading(salinity=30.0 + i)))
+    db.session.commit()
+    old_ids = [t.id for t in Telemetry.query.order_by(Telemetry.id)]
+    partitions.run(keep=2, purge_delay=0)
+    assert Telemetry.query.count() == 0
+
+    new_id = client.post('/telemetry', json=_reading(salinity=40.0), headers=headers).get_json()['id']
+    assert new_id > max(old_ids)
+    assert client.get(f'/telemetry/{new_id}', headers=headers).get_json()['data']['salinity'] == 40.0
+    assert client.get(f'/telemetry/{old_ids[0]}', headers=headers).get_json()['data']['salinity'] == 30.0
+
+
+def test_archived_quarters_are_scanned_from_parquet(client, monkeypatch, tmp_path):
+    pytest.importorskip('pyarrow')
+    monkeypatch.setitem(app.config, 'TELEMETRY_ARCHIVE_DIR', str(tmp_path))
+    headers = _auth_headers(client, 'archiveadmin', 'admin')
+    old = datetime.datetime(2025, 2, 1, 10, 0)
+    for i in range(6):
+        db.session.add(Telemetry(timestamp=old + datetime.timedelta(minutes=7 * i),
+                                 **_reading(buoy_id=1 + i % 2, salinity=30.0 + i)))
+    db.session.commit()
+    partitions.run(keep=2, purge_delay=0)
+    [(partition, size)] = [(p, size) for p, size in archive.export_due() if p.rows]
+    assert (tmp_path / partition.archive_file).stat().st_size == size
+
+    def get(path, **params):
+        return client.get(path, query_string=params, headers=headers).get_data(as_text=True)
+
+    queries = [('/telemetry/aggregate', {'bucket': 'minute', 'until': '2025-04-01T00:00:00'}),
+               ('/telemetry/aggregate', {'bucket': 'hour', 'since': '2025-02-01T10:10:00',
+                                         'until': '2025-02-02T00:00:00', 'buoy_id': 2}),
+               ('/telemetry/export', {'since': '2025-02-01T10:10:00', 'until': '2025-04-01T00:00:00'}),
+               ('/telemetry/export', {'format': 'csv', 'until': '2025-04-01T00:00:00'})]
+    monkeypatch.setitem(app.config, 'TELEMETRY_ARCHIVE_READS', False)
+    from_sql = [get(path, **params) for path, params in queries]
+    monkeypatch.setitem(app.config, 'TELEMETRY_ARCHIVE_READS', True)
+    from_files = []
+    statements = _count_statements(lambda: from_files.extend(get(path, **params) for path, params in queries))
+    assert from_files == from_sql
+    assert json.loads(from_files[1])['data'] == [{
+        'bucket_start': '2025-02-01T10:00:00', 'buoy_id': 2, 'count': 2,
+        'salinity': {'min': 33.0, 'max': 35.0, 'avg': 34.0}, 'temperature': {'min': 23.3, 'max': 23.3, 'avg': 23.3},
+        'pH': {'min': 8.1, 'max': 8.1, 'avg': 8.1}}]
+    assert statements == 0
+
+
+def test_json_providers_encode_datetimes_as_iso8601():
+    record = {'id': 1, 'timestamp': datetime.datetime(2026, 1, 5, 10, 30, 0, 123456), 'pH': 8.1}
+    expected = {'id': 1, 'timestamp': '2026-01-05T10:30:00.123456', 'pH': 8.1}
+    providers = [json_provider.StdlibJSONProvider(app)]
+    if json_provider.orjson is not None:
+        providers.append(json_provider.OrjsonProvider(app))
+    for provider in providers:
+        assert json.loads(provider.dumps(record)) == expected
+        with app.app_context():
+            assert json.loads(provider.response(record).get_data()) == expected
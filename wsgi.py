@@ -0,0 +1,22 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+or, for servers that take a callable, ``wsgi:get_app()``.
+"""
+from api.main import app as _app
+
+
+def get_app():
+    """Return the application, configured from api.config.Config.
+
+    This is an accessor, not an app factory: every call returns the same
+    module-level `api.main.app`, built when api.main is imported. The routes
+    are registered on that object with @app.route and read app.config and
+    app.extensions directly, so building a fresh app per call would first
+    mean moving them onto a blueprint.
+    """
+    return _app
+
+
+app = get_app()